@@ -0,0 +1,84 @@
+"""
+Benchmark: fuzzy author deduplication, indexed resolver (blocking + trigram prefix filter)
+vs an all-pairs trigram comparison, plus the cached re-run cost.
+Usage: python benchmarks/bench_author_dedupe.py [--sizes 1000 5000 20000 50000] [--variants 0.2] [--pairs-max 5000]
+"""
+import argparse
+import os
+import string
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation.authors import DEFAULT_THRESHOLD, AuthorResolver, _trigrams, normalize_name  # noqa: E402
+
+
+def make_names(n, variant_share, seed=0):
+    """n distinct "First Last" names plus spelling variants (initials, "LAST, First", case, spacing)."""
+    rng = np.random.default_rng(seed)
+    letters = np.array(list(string.ascii_lowercase))
+
+    def word(k):
+        return "".join(rng.choice(letters, k)).title()
+
+    base = [f"{word(int(rng.integers(4, 9)))} {word(int(rng.integers(5, 10)))}" for _ in range(n)]
+    variants = []
+    for name in base[:int(n * variant_share)]:
+        first, last = name.split()
+        variants.append(rng.choice([f"{first[0]}. {last}", f"{last.upper()}, {first}", f" {name}  ", name.lower()]))
+    return pd.Series(base + variants)
+
+
+def all_pairs(names):
+    """Reference O(n^2) clustering: every pair of distinct keys compared by trigram Jaccard."""
+    keys = sorted({normalize_name(s) for s in names})
+    grams = [_trigrams(k) for k in keys]
+    parent = list(range(len(keys)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(len(keys)):
+        for j in range(i + 1, len(keys)):
+            shared = len(grams[i] & grams[j])
+            if shared / (len(grams[i]) + len(grams[j]) - shared) >= DEFAULT_THRESHOLD:
+                parent[find(i)] = find(j)
+    return len({find(i) for i in range(len(keys))})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20_000, 50_000])
+    parser.add_argument("--variants", type=float, default=0.2, help="Extra variant spellings per base name.")
+    parser.add_argument("--pairs-max", type=int, default=5000, help="Skip the all-pairs run above this size.")
+    args = parser.parse_args()
+
+    print(f"{'names':>7} {'indexed s':>10} {'cached s':>9} {'all-pairs s':>12} {'authors':>8} {'expected':>9}")
+    for n in args.sizes:
+        names = make_names(n, args.variants)
+        resolver = AuthorResolver(":memory:")
+        t0 = time.perf_counter()
+        canonical = resolver.resolve(names)
+        indexed = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        resolver.resolve(names)
+        cached = time.perf_counter() - t0
+        pairs = "-"
+        if n <= args.pairs_max:
+            t0 = time.perf_counter()
+            all_pairs(names)
+            pairs = f"{time.perf_counter() - t0:.2f}"
+        print(f"{len(names):>7} {indexed:>10.2f} {cached:>9.3f} {pairs:>12} {canonical.nunique():>8} {n:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: Excel ingestion, plain pd.read_excel vs the streaming (and calamine, if installed) readers.
+Usage: python benchmarks/bench_excel_read.py [--sizes 10000 100000] [--padding 5000]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from helper.readers import CALAMINE_AVAILABLE, read_excel  # noqa: E402
+
+
+def make_xlsx(n_rows, padding_rows, seed=0):
+    """Monitoring-style export: a few text and numeric columns, plus formatted-but-empty rows below the data."""
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Mentions")
+    ws.append(["Authors", "Outlet", "Reach", "Sentiment Score", "Title"])
+    authors = [f"Author {i}" for i in range(2000)]
+    for i in range(n_rows):
+        ws.append([
+            authors[rng.integers(0, len(authors))],
+            f"Outlet {i % 300}",
+            int(rng.integers(0, 5_000_000)),
+            float(rng.normal()),
+            f"Headline number {i}",
+        ])
+    for _ in range(padding_rows):
+        ws.append([None] * 5)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def timed(fn):
+    """Wall time of one run, then peak traced memory of a second run (tracemalloc slows it down)."""
+    t0 = time.perf_counter()
+    df = fn()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return df, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--padding", type=int, default=5_000, help="Empty rows written below the data.")
+    args = parser.parse_args()
+
+    engines = ["pandas", "stream"] + (["calamine"] if CALAMINE_AVAILABLE else [])
+    print(f"{'rows':>10} {'engine':>9} {'seconds':>9} {'peak MB':>9} {'speedup':>9}")
+    for n in args.sizes:
+        data = make_xlsx(n, args.padding)
+        base = None
+        for engine in engines:
+            df, elapsed, peak = timed(lambda: read_excel(io.BytesIO(data), engine=engine))
+            assert len(df) == n, (engine, len(df))
+            base = base or elapsed
+            print(f"{n:>10,} {engine:>9} {elapsed:>9.3f} {peak:>9.1f} {base / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: cold import time of the app's modules, measured with python -X importtime in fresh
+subprocesses (best of N runs). Reports the slowest top-level imports, flags heavy backends
+(matplotlib, openai) that got loaded, and exits 1 if any target is over its budget or a light
+target loaded the data stack.
+Usage: python benchmarks/bench_import_time.py [--runs 5] [--budget-ms 1500] [--top 8] [--targets app service]
+"""
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def module_imports(path):
+    """The module-level import statements of a source file, joined into one statement."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "; ".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+# Target name -> import statement run in the subprocess
+TARGETS = {
+    "chart_creation": "import chart_creation",
+    "helper": "import helper",
+    "service": "import service.deepseek",
+    "writeups_generation": "import writeups_generation",
+    # Read from src/app.py so the budget follows what the app actually imports (importing app
+    # itself would run the Streamlit script)
+    "app": module_imports(os.path.join(_src, "app.py")),
+}
+# Backends that should only load when actually used
+HEAVY = ("matplotlib", "openai")
+# Targets that need none of the data stack; loading it there is a failure regardless of budget
+LIGHT = {"service": ("pandas", "numpy")}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(statement):
+    """One cold import: (total_us, {top-level module: cumulative_us}, set of all loaded modules)."""
+    env = dict(os.environ, PYTHONPATH=_src + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, env=env, cwd=_src,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    top, loaded = {}, set()
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        cumulative, indent, name = int(m.group(2)), len(m.group(3)), m.group(4)
+        loaded.add(name)
+        # Two spaces of indentation = imported directly by the statement
+        if indent <= 2:
+            top[name] = top.get(name, 0) + cumulative
+    return sum(top.values()), top, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Subprocess runs per target (best is kept).")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Fail if a target imports slower.")
+    parser.add_argument("--top", type=int, default=8, help="Slowest top-level imports to list.")
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+    args = parser.parse_args()
+
+    over, leaked = [], []
+    print(f"{'target':>20} {'best ms':>9} {'worst ms':>9}  heavy backends loaded")
+    details = {}
+    for name in args.targets:
+        runs = [measure(TARGETS[name]) for _ in range(args.runs)]
+        best = min(runs, key=lambda r: r[0])
+        worst = max(r[0] for r in runs)
+        heavy = [h for h in HEAVY if h in best[2]]
+        print(f"{name:>20} {best[0] / 1000:>9.1f} {worst / 1000:>9.1f}  {', '.join(heavy) or '-'}")
+        details[name] = best[1]
+        if best[0] / 1000 > args.budget_ms:
+            over.append(name)
+        stray = [m for m in LIGHT.get(name, ()) if m in best[2]]
+        if stray:
+            leaked.append(f"{name} ({', '.join(stray)})")
+
+    for name, top in details.items():
+        print(f"\n{name}: slowest imports")
+        for module, us in sorted(top.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+            print(f"  {us / 1000:>9.1f} ms  {module}")
+
+    if leaked:
+        print(f"\nData stack loaded by: {'; '.join(leaked)}")
+    if over:
+        print(f"\nOver the {args.budget_ms:g} ms budget: {', '.join(over)}")
+    if over or leaked:
+        sys.exit(1)
+    print(f"\nAll targets within the {args.budget_ms:g} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: daily refresh cost, full recompute from the whole history vs merging one delta
+file into the author aggregate store and rendering from it.
+Usage: python benchmarks/bench_incremental_update.py [--days 7 30 90] [--rows-per-day 20000] [--authors 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation import (  # noqa: E402
+    AuthorStore,
+    aggregate_csv,
+    build_quadrant_figure_plotly,
+    build_sankey_figure,
+)
+from chart_creation.sankey import THEME_COLS  # noqa: E402
+
+
+def make_day(day, rows, n_authors):
+    """One day of article-level mentions with reach, sentiment and 0/1 theme flags."""
+    rng = np.random.default_rng(day)
+    data = {
+        "Authors": [f"Author {i}" for i in rng.integers(0, n_authors, rows)],
+        "Reach": rng.integers(0, 5_000_000, rows),
+        "Sentiment Score": rng.normal(size=rows).round(3),
+    }
+    for theme in THEME_COLS:
+        data[theme] = rng.integers(0, 2, rows)
+    return pd.DataFrame(data)
+
+
+def render(quadrant_df, sankey_df):
+    build_quadrant_figure_plotly(quadrant_df)
+    build_sankey_figure(sankey_df, max_authors=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 90], help="History lengths to test.")
+    parser.add_argument("--rows-per-day", type=int, default=20_000)
+    parser.add_argument("--authors", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'days':>5} {'history rows':>13} {'full s':>8} {'delta s':>8} {'speedup':>8}")
+    for days in args.days:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for day in range(days):
+                path = os.path.join(tmp, f"day_{day:03d}.csv")
+                make_day(day, args.rows_per_day, args.authors).to_csv(path, index=False)
+                paths.append(path)
+            history = os.path.join(tmp, "history.csv")
+            pd.concat(pd.read_csv(p) for p in paths).to_csv(history, index=False)
+
+            # Full recompute: re-aggregate the whole history for both charts
+            t0 = time.perf_counter()
+            render(aggregate_csv(history, "quadrant"), aggregate_csv(history, "sankey"))
+            full = time.perf_counter() - t0
+
+            # Incremental: the store already holds days - 1; merge today's delta and render
+            with AuthorStore(os.path.join(tmp, "store.sqlite")) as store:
+                for path in paths[:-1]:
+                    store.merge_file(path, "quadrant")
+                    store.merge_file(path, "sankey")
+                t0 = time.perf_counter()
+                store.merge_file(paths[-1], "quadrant")
+                store.merge_file(paths[-1], "sankey")
+                render(store.quadrant_df(), store.sankey_df())
+                delta = time.perf_counter() - t0
+            print(f"{days:>5} {days * args.rows_per_day:>13} {full:>8.2f} {delta:>8.2f} {full / delta:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: multi-period quadrant comparison (author alignment, classification, transition
+matrix and the animated figure) for many authors x periods.
+Usage: python benchmarks/bench_period_comparison.py [--authors 5000 50000] [--periods 12 24] [--presence 0.9]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation import build_quadrant_animation, compare_periods  # noqa: E402
+
+
+def make_periods(n_authors, n_periods, presence, seed=0):
+    """Monthly author-level frames; each author appears in a period with probability presence."""
+    rng = np.random.default_rng(seed)
+    names = np.array([f"Author {i}" for i in range(n_authors)], dtype=object)
+    frames = {}
+    for p in range(n_periods):
+        idx = np.flatnonzero(rng.random(n_authors) < presence)
+        frames[f"M{p + 1:02d}"] = pd.DataFrame({
+            "Authors": names[idx],
+            "Reach": rng.integers(0, 5_000_000, len(idx)),
+            "Sentiment Score": rng.normal(size=len(idx)),
+        })
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--authors", type=int, nargs="+", default=[5000, 50_000])
+    parser.add_argument("--periods", type=int, nargs="+", default=[12, 24])
+    parser.add_argument("--presence", type=float, default=0.9, help="Share of authors present in each period.")
+    args = parser.parse_args()
+
+    print(f"{'authors':>8} {'periods':>8} {'align s':>9} {'matrix s':>9} {'figure s':>9}")
+    for n_authors in args.authors:
+        for n_periods in args.periods:
+            frames = make_periods(n_authors, n_periods, args.presence)
+            t0 = time.perf_counter()
+            comparison = compare_periods(frames)
+            align = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            comparison.transitions()
+            comparison.movers()
+            matrix = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            build_quadrant_animation(comparison)
+            figure = time.perf_counter() - t0
+            print(f"{n_authors:>8} {n_periods:>8} {align:>9.3f} {matrix:>9.3f} {figure:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
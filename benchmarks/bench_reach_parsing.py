@@ -0,0 +1,64 @@
+"""
+Benchmark: Reach column parsing, legacy per-cell regex vs parse_reach.
+Usage: python benchmarks/bench_reach_parsing.py [--sizes 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation.quadrant import format_reach, parse_reach  # noqa: E402
+
+
+def legacy_parse(col):
+    """The previous prepare_quadrant_df conversion."""
+    return (
+        col.astype(str)
+        .str.replace(r'[^0-9]', '', regex=True)
+        .replace('', '0')
+        .astype(int)
+    )
+
+
+def make_columns(n, seed=0):
+    """Reach columns in the shapes seen in exports: integers, "1,234" strings, and K/M/B strings."""
+    rng = np.random.default_rng(seed)
+    ints = pd.Series(rng.integers(0, 50_000_000, n))
+    return {
+        "int64": ints,
+        "thousands": pd.Series([f"{v:,}" for v in ints]),
+        "suffixed": pd.Series([format_reach(v) for v in ints]),
+    }
+
+
+def best_of(fn, arg, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'column':>10} {'legacy s':>10} {'parse s':>10} {'speedup':>9}")
+    for n in args.sizes:
+        for kind, col in make_columns(n).items():
+            t_old = best_of(legacy_parse, col)
+            t_new = best_of(parse_reach, col)
+            print(f"{n:>10,} {kind:>10} {t_old:>10.4f} {t_new:>10.4f} {t_old / t_new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: Sankey link construction, legacy row loop vs vectorized builder.
+Usage: python benchmarks/bench_sankey_links.py [--sizes 10000 100000 1000000] [--authors 500]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation.sankey import THEME_COLS, _build_links  # noqa: E402
+
+
+def make_df(n_rows, n_authors, seed=0):
+    """Synthetic article-level rows: one author and a 0/1 flag per theme."""
+    rng = np.random.default_rng(seed)
+    data = {"Authors": [f"Author {i}" for i in rng.integers(0, n_authors, n_rows)]}
+    for theme in THEME_COLS:
+        data[theme] = rng.integers(0, 2, n_rows)
+    return pd.DataFrame(data)
+
+
+def legacy_links(df, author_col, theme_cols, node_index):
+    """The previous per-row implementation (one link per input row and theme)."""
+    sources, targets, values = [], [], []
+    for _, row in df.iterrows():
+        author = row[author_col]
+        for theme in theme_cols:
+            count = row[theme]
+            if count > 0:
+                sources.append(node_index[author])
+                targets.append(node_index[theme])
+                values.append(count)
+    total_flow = sum(values) if values else 0
+    source_totals = defaultdict(int)
+    for s, v in zip(sources, values):
+        source_totals[s] += v
+    labels = []
+    for s, v in zip(sources, values):
+        p_src = (v / source_totals[s] * 100) if source_totals[s] else 0
+        p_tot = (v / total_flow * 100) if total_flow else 0
+        labels.append((p_src, p_tot, f"{v} ({p_src:.1f}%)"))
+    return sources, targets, values, labels
+
+
+def vectorized_links(df, author_col, theme_cols):
+    grouped = df.groupby(author_col)[theme_cols].sum()
+    authors = grouped.sum(axis=1).sort_values(ascending=False).index.tolist()
+    return _build_links(grouped, authors, theme_cols)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--authors", type=int, default=500)
+    parser.add_argument("--legacy-max-rows", type=int, default=1_000_000,
+                        help="Skip the legacy path above this many rows (it is slow).")
+    args = parser.parse_args()
+
+    theme_cols = list(THEME_COLS)
+    print(f"{'rows':>10} {'legacy s':>10} {'vector s':>10} {'speedup':>9} {'links old/new':>16}")
+    for n in args.sizes:
+        df = make_df(n, args.authors)
+        t0 = time.perf_counter()
+        links = vectorized_links(df, "Authors", theme_cols)
+        t_new = time.perf_counter() - t0
+
+        if n <= args.legacy_max_rows:
+            grouped = df.groupby("Authors")[theme_cols].sum()
+            authors = grouped.sum(axis=1).sort_values(ascending=False).index.tolist()
+            node_index = {name: i for i, name in enumerate(authors + theme_cols)}
+            t0 = time.perf_counter()
+            old = legacy_links(df, "Authors", theme_cols, node_index)
+            t_old = time.perf_counter() - t0
+            print(f"{n:>10,} {t_old:>10.3f} {t_new:>10.4f} {t_old / t_new:>8.0f}x "
+                  f"{len(old[0]):>8,}/{len(links['value']):<7,}")
+        else:
+            print(f"{n:>10,} {'skipped':>10} {t_new:>10.4f} {'-':>9} {'-':>8}/{len(links['value']):<7,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: quadrant split lines from a streaming QuantileSketch vs exact quantiles over the
+full column (time, values retained and rank error), plus sketches merged from shards.
+Usage: python benchmarks/bench_split_thresholds.py [--sizes 100000 1000000 10000000] [--chunk 200000] [--k 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation.thresholds import QuantileSketch, split_value  # noqa: E402
+
+SPECS = ["median", "p75", "p90", "log-mean"]
+
+
+def stream(n, chunk, seed=0):
+    """Heavy-tailed reach values (a few mega-outlets) in chunks, generated on the fly."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, chunk):
+        yield rng.lognormal(9, 2.5, min(chunk, n - start))
+
+
+def rank_error(sorted_values, value, q):
+    """|rank of value - q| as a fraction of n."""
+    return abs(np.searchsorted(sorted_values, value) / len(sorted_values) - q)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--chunk", type=int, default=200_000, help="Values per streamed chunk.")
+    parser.add_argument("--k", type=int, default=200, help="Sketch size parameter.")
+    parser.add_argument("--shards", type=int, default=8, help="Sketches merged in the shard run.")
+    args = parser.parse_args()
+
+    print(f"{'values':>9} {'sketch s':>9} {'exact s':>8} {'kept':>6} {'merged kept':>12} "
+          + " ".join(f"{s + ' err':>13}" for s in SPECS))
+    for n in args.sizes:
+        t0 = time.perf_counter()
+        sketch = QuantileSketch(args.k, seed=0)
+        for chunk in stream(n, args.chunk):
+            sketch.update(chunk)
+        lines = {spec: sketch.split(spec) for spec in SPECS}
+        sketched = time.perf_counter() - t0
+
+        # Exact reference keeps the whole column in memory
+        t0 = time.perf_counter()
+        values = np.concatenate(list(stream(n, args.chunk)))
+        exact = {spec: split_value(values, spec) for spec in SPECS}
+        exact_s = time.perf_counter() - t0
+
+        shards = [QuantileSketch(args.k, seed=i) for i in range(args.shards)]
+        for i, chunk in enumerate(stream(n, args.chunk)):
+            shards[i % args.shards].update(chunk)
+        merged = shards[0]
+        for shard in shards[1:]:
+            merged.merge(shard)
+
+        values.sort()
+        errors = []
+        for spec in SPECS:
+            if spec == "log-mean":
+                # Exact running sums: only float rounding separates it from the full pass
+                errors.append(f"{abs(lines[spec] - exact[spec]) / exact[spec]:>13.1e}")
+                continue
+            q = 0.5 if spec == "median" else int(spec[1:]) / 100
+            single = rank_error(values, lines[spec], q)
+            shard = rank_error(values, merged.split(spec), q)
+            errors.append(f"{single:>6.2%}/{shard:>6.2%}")
+        print(f"{n:>9} {sketched:>9.2f} {exact_s:>8.2f} {sketch.size:>6} {merged.size:>12} " + " ".join(errors))
+    print("err: rank error single sketch / merged shards (log-mean: relative error)")
+
+
+if __name__ == "__main__":
+    main()
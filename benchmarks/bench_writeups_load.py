@@ -0,0 +1,144 @@
+"""
+Load test: concurrent writeup generation against the local mock DeepSeek server.
+Reports p50/p95/p99 latency (and time to first token when streaming), throughput and errors.
+Usage: python benchmarks/bench_writeups_load.py [--requests 64] [--concurrency 1 8 32] [--mode sync stream async]
+       [--latency 0.5 --tokens-per-sec 50 --rate-429 0.05] [--base-url http://127.0.0.1:8555]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+_here = os.path.dirname(os.path.abspath(__file__))
+_src = os.path.join(os.path.dirname(_here), "src")
+for _p in (_src, _here):
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+from mock_deepseek import add_config_args, config_from_args, start_server  # noqa: E402
+
+MODES = ("sync", "stream", "async")
+
+
+def make_frame(seed, n_authors=500):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Authors": [f"Author {i}" for i in range(n_authors)],
+        "Reach": rng.integers(0, 5_000_000, n_authors),
+        "Sentiment Score": rng.normal(size=n_authors),
+    })
+
+
+def run_sync(frames, concurrency):
+    """generate_writeups from a thread pool; returns [(latency, ttft, error)]."""
+    from writeups_generation import generate_writeups
+
+    def one(df):
+        t0 = time.perf_counter()
+        try:
+            generate_writeups(df, analysis_type="quadrant", api_key="mock", use_cache=False)
+            return time.perf_counter() - t0, None, None
+        except Exception as e:
+            return time.perf_counter() - t0, None, type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, frames))
+
+
+def run_stream(frames, concurrency):
+    """generate_writeups_stream from a thread pool, recording time to first delta."""
+    from writeups_generation import generate_writeups_stream
+
+    def one(df):
+        t0 = time.perf_counter()
+        ttft = None
+        try:
+            for _ in generate_writeups_stream(df, analysis_type="quadrant", api_key="mock", use_cache=False):
+                if ttft is None:
+                    ttft = time.perf_counter() - t0
+            return time.perf_counter() - t0, ttft, None
+        except Exception as e:
+            return time.perf_counter() - t0, ttft, type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, frames))
+
+
+def run_async(frames, concurrency):
+    """DeepSeekService.acomplete on the writeup prompts, fanned out from one event loop."""
+    from service.deepseek import DeepSeekService, aclose_async_clients
+    from writeups_generation.chat_completion import _build_user_content
+
+    prompts = [_build_user_content(df, "quadrant", None, 30) for df in frames]
+
+    async def main():
+        svc = DeepSeekService(api_key="mock")
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one(prompt):
+            async with gate:
+                t0 = time.perf_counter()
+                try:
+                    await svc.acomplete(prompt)
+                    return time.perf_counter() - t0, None, None
+                except Exception as e:
+                    return time.perf_counter() - t0, None, type(e).__name__
+
+        try:
+            return await asyncio.gather(*(one(p) for p in prompts))
+        finally:
+            await aclose_async_clients()
+
+    return asyncio.run(main())
+
+
+def summarize(results, wall):
+    ok = [r for r in results if r[2] is None]
+    lat = np.array([r[0] for r in ok]) if ok else np.array([np.nan])
+    ttft = np.array([r[1] for r in ok if r[1] is not None])
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+    first = f"{np.percentile(ttft, 50):>9.3f}" if len(ttft) else f"{'-':>9}"
+    return f"{p50:>9.3f} {p95:>9.3f} {p99:>9.3f} {first} {len(ok) / wall:>9.2f} {len(results) - len(ok):>7}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--mode", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--base-url", default=None, help="Use an already running server instead of starting one.")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="DEEPSEEK_MAX_CONCURRENCY for the client.")
+    add_config_args(parser)
+    args = parser.parse_args()
+
+    server = None
+    if args.base_url:
+        url = args.base_url
+    else:
+        server, url = start_server(config_from_args(args))
+    # Read when the first DeepSeekService is created (inside the run_* functions)
+    os.environ["DEEPSEEK_BASE_URL"] = url
+    os.environ["DEEPSEEK_MAX_CONCURRENCY"] = str(args.max_in_flight)
+
+    frames = [make_frame(seed) for seed in range(args.requests)]
+    print(f"{args.requests} requests against {url}")
+    print(f"{'mode':>6} {'conc':>5} {'p50 s':>9} {'p95 s':>9} {'p99 s':>9} {'ttft p50':>9} {'req/s':>9} {'errors':>7}")
+    runners = {"sync": run_sync, "stream": run_stream, "async": run_async}
+    for mode in args.mode:
+        for concurrency in args.concurrency:
+            t0 = time.perf_counter()
+            results = runners[mode](frames, concurrency)
+            wall = time.perf_counter() - t0
+            print(f"{mode:>6} {concurrency:>5} {summarize(results, wall)}")
+    if server is not None:
+        server.shutdown()
+        print(f"Server counts: {server.RequestHandlerClass.config.counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Local OpenAI-compatible stub of the DeepSeek chat API for offline load tests.
+Serves POST /chat/completions (and /v1/chat/completions), streaming or not, with configurable
+time to first token, token rate and injected 429/500 errors. Point DeepSeekService at it with
+base_url=... or DEEPSEEK_BASE_URL=http://127.0.0.1:PORT (any API key is accepted).
+Usage: python benchmarks/mock_deepseek.py [--port 8555] [--latency 0.5] [--tokens-per-sec 50]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("coverage", "reach", "sentiment", "author", "theme", "quadrant", "analysis", "media", "outlet", "trend")
+
+
+class MockConfig:
+    def __init__(self, latency=0.5, tokens_per_sec=50.0, response_tokens=200, rate_429=0.0, rate_500=0.0, seed=None):
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.response_tokens = response_tokens
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "429": 0, "500": 0, "ok": 0}
+
+    def pick_error(self):
+        with self.lock:
+            self.counts["requests"] += 1
+            roll = self.random.random()
+            if roll < self.rate_429:
+                self.counts["429"] += 1
+                return 429
+            if roll < self.rate_429 + self.rate_500:
+                self.counts["500"] += 1
+                return 500
+            self.counts["ok"] += 1
+            return None
+
+
+def _tokens(n):
+    return [WORDS[i % len(WORDS)] + " " for i in range(n)]
+
+
+def _chunk(model, content=None, finish=None):
+    delta = {"content": content} if content is not None else {}
+    return {
+        "id": "mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+    }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: MockConfig = MockConfig()
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/chat/completions", "/v1/chat/completions"):
+            self._json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("content-length") or 0)) or b"{}")
+        cfg = self.config
+        model = request.get("model", "deepseek-chat")
+        error = cfg.pick_error()
+        time.sleep(cfg.latency)
+        if error == 429:
+            self._json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}}, {"retry-after": "0.1"})
+            return
+        if error == 500:
+            self._json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+            return
+        tokens = _tokens(int(request.get("max_tokens") or cfg.response_tokens))
+        step = 1.0 / cfg.tokens_per_sec if cfg.tokens_per_sec > 0 else 0.0
+        prompt_tokens = sum(len(m.get("content") or "") for m in request.get("messages", [])) // 4
+        if not request.get("stream"):
+            time.sleep(step * len(tokens))
+            self._json(200, {
+                "id": "mock", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                    "total_tokens": prompt_tokens + len(tokens),
+                },
+            })
+            return
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("transfer-encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in tokens:
+                self._write_chunk(f"data: {json.dumps(_chunk(model, token))}\n\n".encode())
+                time.sleep(step)
+            self._write_chunk(f"data: {json.dumps(_chunk(model, finish='stop'))}\n\n".encode())
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client closed the stream early
+            self.close_connection = True
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The stdlib default backlog (5) makes bursts of new connections wait for SYN retries
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections is normal under load
+        pass
+
+
+def start_server(config=None, host="127.0.0.1", port=0):
+    """Start the mock in a daemon thread; returns (server, base_url). Call server.shutdown() to stop."""
+    handler = type("Handler", (MockHandler,), {"config": config or MockConfig()})
+    server = MockServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def add_config_args(parser):
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first token.")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="Generation speed (0 = instant).")
+    parser.add_argument("--response-tokens", type=int, default=200, help="Tokens per reply (unless max_tokens).")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429.")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="Fraction of requests answered with 500.")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args):
+    return MockConfig(
+        latency=args.latency,
+        tokens_per_sec=args.tokens_per_sec,
+        response_tokens=args.response_tokens,
+        rate_429=args.rate_429,
+        rate_500=args.rate_500,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8555)
+    add_config_args(parser)
+    args = parser.parse_args()
+    config = config_from_args(args)
+    server, url = start_server(config, args.host, args.port)
+    print(f"Mock DeepSeek API on {url} (set DEEPSEEK_BASE_URL={url}); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Served: {config.counts}")
+
+
+if __name__ == "__main__":
+    main()
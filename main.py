@@ -1,12 +1,22 @@
 """
-Entry point: run the Streamlit app.
+Entry point: run the Streamlit app, or the headless batch / update commands.
 Usage: python main.py
+       python main.py batch <files|dirs|globs> [--out DIR] [--formats html png] ...
+       python main.py update <store.sqlite> <delta files> [--out DIR] ...
 """
 import os
 import sys
 
 if __name__ == "__main__":
     root = os.path.dirname(os.path.abspath(__file__))
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        sys.path.insert(0, os.path.join(root, "src"))
+        from batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "update":
+        sys.path.insert(0, os.path.join(root, "src"))
+        from update import main as update_main
+        sys.exit(update_main(sys.argv[2:]))
     app_path = os.path.join(root, "src", "app.py")
     if not os.path.isfile(app_path):
         sys.exit(f"App not found: {app_path}")
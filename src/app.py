@@ -9,16 +9,36 @@ _src_dir = os.path.dirname(os.path.abspath(__file__))
 if _src_dir not in sys.path:
     sys.path.insert(0, _src_dir)
 
+import plotly.io as pio
 import streamlit as st
 
-try:
-    from openai import AuthenticationError
-except ImportError:
-    AuthenticationError = None  # type: ignore
+from chart_creation import (
+    OTHER_AUTHORS_LABEL,
+    ExportError,
+    ExportTimeout,
+    aggregate_quadrant_chunks,
+    aggregate_sankey_df,
+    build_quadrant_figure_plotly,
+    build_sankey_figure,
+    canonicalize_authors,
+    export_figure,
+    prepare_quadrant_df,
+    quadrant_read_schema,
+    sankey_read_schema,
+    sankey_tail_authors,
+)
+from chart_creation.thresholds import DEFAULT_SPLIT
+from helper import content_hash, profiled, read_uploaded_file, shared_cache, span, start_trace
+from writeups_generation import generate_writeups_stream
 
-from chart_creation import build_quadrant_figure_plotly, build_sankey_figure
-from helper import read_uploaded_file
-from writeups_generation import generate_writeups
+# Authors per page when drilling into the folded "Other authors" Sankey node
+DRILL_PAGE_SIZE = 25
+# Seconds an image export may take before its worker is recycled
+EXPORT_TIMEOUT = 60
+# Raw rows the writeup prompt falls back to when the data does not fit the analysis
+WRITEUP_SAMPLE_ROWS = 30
+# Append every run's stage timings to this JSON lines file when set
+TRACE_FILE = os.environ.get("TCA_TRACE_FILE")
 
 st.set_page_config(page_title="Top Contributors Analysis", layout="wide")
 st.title("Top Contributors Analysis")
@@ -42,14 +62,26 @@ if not uploaded:
     st.info("Upload a file to run the selected analysis.")
     st.stop()
 
+# Stage timings for this run (shown under "Performance")
+trace = start_trace("app")
+
+# Parsed data, prepared frames, figures and writeups are cached process-wide by upload content
+cache = shared_cache()
+file_hash = content_hash(uploaded.getvalue(), os.path.splitext(uploaded.name or "")[1].lower())
+
+# Only the columns the selected analysis needs are read, with compact dtypes
+read_schema = quadrant_read_schema if analysis == "Quadrants" else sankey_read_schema
+
 try:
-    df = read_uploaded_file(uploaded)
+    df = cache.get_or_set(("df", file_hash, analysis), lambda: read_uploaded_file(uploaded, schema=read_schema))
 except Exception as e:
     st.error(f"Could not read file: {e}")
     st.stop()
 
 st.subheader("Data preview")
 st.dataframe(df.head(20), width="stretch")
+if "encoding" in df.attrs:
+    st.caption(f"Read with encoding {df.attrs['encoding']} (engine: {df.attrs['engine']}).")
 
 
 def _get_deepseek_api_key():
@@ -66,8 +98,135 @@ def _get_deepseek_api_key():
     return raw.strip() if raw else ""
 
 
-run = st.button("Run analysis", type="primary", key="run_analysis")
-if not run:
+def _canonical(df):
+    """df with author name variants mapped to one canonical name, and the spellings that were merged."""
+    with span("canonicalize_authors"):
+        return canonicalize_authors(df)
+
+
+def _prepare(df, analysis, group_authors=False):
+    """
+    Compact frame the chart is built from: prepared quadrant columns or author-level theme totals.
+    With group_authors, quadrant rows are merged per author (reach summed, sentiment averaged).
+    """
+    if analysis == "Quadrants":
+        with span("prepare_quadrant_df"):
+            prepared, err = prepare_quadrant_df(df)
+        if err:
+            raise ValueError(err)
+        if group_authors:
+            with span("aggregate_quadrant"):
+                prepared = aggregate_quadrant_chunks([prepared])
+        return prepared
+    with span("aggregate_sankey_df"):
+        return aggregate_sankey_df(df)
+
+
+def _split_control(container, label, key, log_scale=False):
+    """Split-line selector for one quadrant axis; returns a chart_creation.thresholds spec."""
+    methods = ["Mean", "Median"] + (["Log-scale mean"] if log_scale else []) + ["Percentile", "Fixed value"]
+    method = container.selectbox(label, methods, key=key)
+    if method == "Percentile":
+        pct = container.number_input("Percentile", min_value=1, max_value=99, value=75, key=f"{key}_pct")
+        return f"p{int(pct)}"
+    if method == "Fixed value":
+        return float(container.number_input("Split at", value=0.0, key=f"{key}_fixed"))
+    return {"Mean": "mean", "Median": "median", "Log-scale mean": "log-mean"}[method]
+
+
+def _request_regeneration():
+    """Button callback: the next run bypasses the writeup caches."""
+    st.session_state["refresh_writeups"] = True
+
+
+def _render_stream(placeholder, deltas):
+    """Render text deltas into placeholder as they arrive; returns the full text.
+    A rerun interrupts the loop and closing the generator cancels the request."""
+    text = ""
+    try:
+        for delta in deltas:
+            text += delta
+            placeholder.markdown(text + "▌")
+    finally:
+        deltas.close()
+    return text.strip()
+
+
+def _cached_figure(key, build, stage):
+    """Plotly figure from the shared cache (stored as JSON), building it on a miss (timed as stage)."""
+    def build_json():
+        with span(stage):
+            return build().to_json()
+    return pio.from_json(cache.get_or_set(key, build_json))
+
+
+def _show_performance(trace):
+    """Stage timings of this run, trace downloads and any TCA_PROFILE reports."""
+    if TRACE_FILE:
+        try:
+            trace.write_jsonl(TRACE_FILE)
+        except OSError:
+            pass
+    with st.expander("Performance"):
+        if not trace.spans:
+            st.caption("No stages ran (results came from the cache).")
+        else:
+            st.dataframe(trace.stage_totals(), width="stretch")
+            col_jsonl, col_chrome = st.columns(2)
+            col_jsonl.download_button(
+                "Download spans (JSONL)", trace.to_jsonl(), file_name="trace.jsonl", key="trace_jsonl",
+            )
+            col_chrome.download_button(
+                "Download Chrome trace", trace.to_chrome_trace(), file_name="trace.json", key="trace_chrome",
+                help="Open in chrome://tracing or ui.perfetto.dev",
+            )
+        if trace.profile:
+            st.text("cProfile (cumulative)")
+            st.code(trace.profile, language=None)
+        if trace.memory:
+            st.text("tracemalloc")
+            st.code(trace.memory, language=None)
+
+
+max_authors = None
+if analysis == "Sankey":
+    max_authors = int(st.number_input(
+        "Max authors shown",
+        min_value=1,
+        value=30,
+        step=5,
+        help=f"Smaller contributors are folded into an \"{OTHER_AUTHORS_LABEL}\" node to keep the diagram fast.",
+    ))
+
+reach_split = sentiment_split = DEFAULT_SPLIT
+if analysis == "Quadrants":
+    reach_col, sentiment_col = st.columns(2)
+    # Mean lines get dragged by a few mega-outlets; median / log-scale mean / percentiles are robust
+    reach_split = _split_control(reach_col, "Reach split line", "reach_split", log_scale=True)
+    sentiment_split = _split_control(sentiment_col, "Sentiment split line", "sentiment_split")
+splits = (reach_split, sentiment_split)
+
+map_reduce = st.checkbox(
+    "Detailed writeups for every author",
+    value=False,
+    help="Summarize the data section by section in parallel and merge the results. "
+         "Otherwise the model sees summary statistics and the top authors per group (faster and cheaper).",
+)
+
+merge_authors = st.checkbox(
+    "Merge author name variants",
+    value=True,
+    help="Treat spellings such as \"J. Smith\", \"John Smith\" and \"SMITH, John\" as one author. "
+         "Matches are fuzzy and made within this file only.",
+)
+# Cache keys for everything derived from the (possibly canonicalized) data
+data_hash = f"{file_hash}:merged" if merge_authors else file_hash
+
+# Keep showing results on widget reruns (e.g. drill-down paging) until the inputs change
+run_key = (file_hash, analysis, max_authors, splits, map_reduce, merge_authors)
+if st.button("Run analysis", type="primary", key="run_analysis"):
+    st.session_state["run_key"] = run_key
+if st.session_state.get("run_key") != run_key:
     st.stop()
 
 # Single run: progress bar, then chart, then writeups (all in one go)
@@ -75,33 +234,108 @@ progress = st.progress(0, text="Starting…")
 status = st.empty()
 
 try:
-    # Step 1: Build chart (no PNG export here - it can hang)
-    progress.progress(15, text="Building chart…")
-    if analysis == "Quadrants":
-        fig = build_quadrant_figure_plotly(df)
-    else:
-        fig = build_sankey_figure(df)
+    with profiled(trace):
+        # Step 1: Build chart (image export runs on request in the export worker pool)
+        progress.progress(15, text="Building chart…")
+        if merge_authors:
+            source, variants = cache.get_or_set(("canonical", file_hash, analysis), lambda: _canonical(df))
+        else:
+            source, variants = df, None
+        prepared = cache.get_or_set(
+            ("prepared", data_hash, analysis), lambda: _prepare(source, analysis, group_authors=merge_authors),
+        )
+        if analysis == "Quadrants":
+            fig = _cached_figure(
+                ("fig", data_hash, analysis, splits),
+                lambda: build_quadrant_figure_plotly(prepared, reach_split=reach_split, sentiment_split=sentiment_split),
+                "build_quadrant_figure_plotly",
+            )
+        else:
+            fig = _cached_figure(
+                ("fig", data_hash, analysis, max_authors),
+                lambda: build_sankey_figure(prepared, max_authors=max_authors),
+                "build_sankey_figure",
+            )
 
-    # Show chart right away (st.plotly_chart only; PNG export moved to end)
-    st.subheader("Quadrant plot" if analysis == "Quadrants" else "Sankey diagram")
-    st.plotly_chart(fig, width="stretch")
+        # Show chart right away
+        st.subheader("Quadrant plot" if analysis == "Quadrants" else "Sankey diagram")
+        st.plotly_chart(fig, width="stretch")
+        if variants is not None and len(variants):
+            with st.expander(f"Merged name variants ({len(variants)})"):
+                st.dataframe(variants, width="stretch", hide_index=True)
 
-    # Step 2: Generate writeups (uses same df from uploaded CSV)
-    progress.progress(50, text="Generating writeups…")
-    analysis_type = "quadrant" if analysis == "Quadrants" else "sankey"
-    api_key = _get_deepseek_api_key()
-    writeups = generate_writeups(df, analysis_type=analysis_type, api_key=api_key or None)
-    writeups = (writeups or "").strip()
+        fmt_col, export_col = st.columns([1, 3])
+        image_format = fmt_col.selectbox("Image format", ["png", "svg", "pdf"], key="image_format")
+        image_key = ("image", data_hash, analysis, max_authors, splits, image_format)
+        if export_col.button("Export image", key="export_image"):
+            try:
+                with st.spinner("Exporting image…"), span("export_figure", format=image_format):
+                    cache.get_or_set(image_key, lambda: export_figure(
+                        fig, image_format, width=1200, height=800, timeout=EXPORT_TIMEOUT,
+                    ))
+            except ExportTimeout:
+                st.warning(f"Image export timed out after {EXPORT_TIMEOUT}s; the export worker was restarted. Try again.")
+            except ExportError as e:
+                st.warning(f"Image export failed: {e}")
+        image = cache.get(image_key)
+        if image is not None:
+            export_col.download_button(
+                f"Download {image_format.upper()}",
+                data=image,
+                file_name=f"{analysis.lower()}.{image_format}",
+                mime={"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}[image_format],
+                key="download_image",
+            )
 
-    progress.progress(100, text="Done")
-    status.empty()
-    progress.empty()
+        # Step 2: Generate writeups from the frame the chart was built from (merged authors, same split lines)
+        progress.progress(50, text="Generating writeups…")
+        analysis_type = "quadrant" if analysis == "Quadrants" else "sankey"
+        api_key = _get_deepseek_api_key()
+        writeups_key = ("writeups", data_hash, analysis_type, splits, map_reduce)
+        refresh = st.session_state.pop("refresh_writeups", False)
 
-    st.subheader("Sample writeups")
-    if writeups:
-        st.markdown(writeups)
-    else:
-        st.caption("(No content returned)")
+        st.subheader("Sample writeups")
+        output = st.empty()
+        writeups = None if refresh else cache.get(writeups_key)
+        if writeups is None:
+            # Stream so the first tokens show up immediately instead of after the full generation
+            with span("generate_writeups", map_reduce=map_reduce):
+                writeups = _render_stream(output, generate_writeups_stream(
+                    prepared, analysis_type=analysis_type, api_key=api_key or None, refresh=refresh,
+                    max_sample_rows=WRITEUP_SAMPLE_ROWS, map_reduce=map_reduce,
+                    reach_split=reach_split, sentiment_split=sentiment_split,
+                ))
+            cache.put(writeups_key, writeups)
+
+        progress.progress(100, text="Done")
+        status.empty()
+        progress.empty()
+
+        if writeups:
+            output.markdown(writeups)
+        else:
+            output.caption("(No content returned)")
+        st.button("Regenerate writeups", key="regenerate_writeups", on_click=_request_regeneration)
+
+        if analysis == "Sankey":
+            tail = cache.get_or_set(
+                ("tail", data_hash, max_authors),
+                lambda: sankey_tail_authors(prepared, max_authors=max_authors),
+            )
+            if tail:
+                with st.expander(f"{OTHER_AUTHORS_LABEL} ({len(tail)})"):
+                    # Built only on request, one page at a time
+                    if st.checkbox("Show other authors", key="drill_tail"):
+                        n_pages = (len(tail) + DRILL_PAGE_SIZE - 1) // DRILL_PAGE_SIZE
+                        page = int(st.number_input("Page", min_value=1, max_value=n_pages, value=1, key="drill_page"))
+                        page_authors = tail[(page - 1) * DRILL_PAGE_SIZE: page * DRILL_PAGE_SIZE]
+                        st.caption(f"Page {page} of {n_pages}; percentages are relative to this page.")
+                        page_fig = _cached_figure(
+                            ("drill", data_hash, max_authors, page),
+                            lambda: build_sankey_figure(prepared, only_authors=page_authors),
+                            "build_sankey_figure",
+                        )
+                        st.plotly_chart(page_fig, width="stretch")
 
 except ValueError as e:
     progress.empty()
@@ -111,8 +345,10 @@ except Exception as e:
     progress.empty()
     status.empty()
     err_msg = str(e).lower()
+    # openai is imported lazily by the DeepSeek client; if it never loaded, e cannot be one of its errors
+    openai = sys.modules.get("openai")
     is_auth_error = (
-        (AuthenticationError and isinstance(e, AuthenticationError))
+        (openai is not None and isinstance(e, openai.AuthenticationError))
         or "401" in err_msg
         or "authentication" in err_msg
         or "invalid" in err_msg and "api key" in err_msg
@@ -126,3 +362,5 @@ except Exception as e:
     else:
         st.error(f"Analysis failed: {e}")
     raise
+
+_show_performance(trace)
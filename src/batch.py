@@ -0,0 +1,317 @@
+"""
+Headless batch run: render quadrant / Sankey charts (HTML, PNG) and writeups for many input files.
+Per-file reading and rendering runs in a process pool, PNG export in the export worker pool
+(with a per-image timeout) and writeup calls overlap in a thread pool.
+Usage: python main.py batch "data/clients/*.csv" --out reports --formats html png
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Optional
+
+# Ensure src is on path when run as python src/batch.py (and in spawned workers)
+_src_dir = os.path.dirname(os.path.abspath(__file__))
+if _src_dir not in sys.path:
+    sys.path.insert(0, _src_dir)
+
+from chart_creation import (  # noqa: E402
+    ExportPool,
+    build_quadrant_figure_plotly,
+    build_sankey_figure,
+    quadrant_read_schema,
+    sankey_read_schema,
+)
+from chart_creation.thresholds import DEFAULT_SPLIT, parse_split  # noqa: E402
+from helper import read_file  # noqa: E402
+
+INPUT_SUFFIXES = (".csv", ".xlsx", ".xls")
+ANALYSIS_TYPES = ("quadrant", "sankey")
+FORMATS = ("html", "png")
+# Seconds a single PNG export may take before its worker is recycled
+EXPORT_TIMEOUT = 120.0
+
+
+def collect_inputs(patterns: list[str]) -> list[Path]:
+    """Expand files, directories (non-recursive) and glob patterns into a sorted list of input files."""
+    found = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = path.iterdir()
+        elif path.is_file():
+            candidates = [path]
+        else:
+            candidates = (Path(p) for p in glob.glob(pattern, recursive=True))
+        found.update(p for p in candidates if p.is_file() and p.suffix.lower() in INPUT_SUFFIXES)
+    return sorted(found)
+
+
+def output_names(inputs: list[Path]) -> dict[str, str]:
+    """
+    Output file prefix per input, unique across inputs: the stem, plus the extension where stems
+    collide (q.csv / q.xlsx -> q_csv / q_xlsx), plus a counter where that still collides (the same
+    file name in different directories -> q_csv, q_csv_2).
+    """
+    def by_name(names):
+        groups = {}
+        for path, name in names.items():
+            groups.setdefault(name, []).append(path)
+        return groups
+
+    names = {str(p): Path(p).stem for p in inputs}
+    for paths in by_name(names).values():
+        if len(paths) > 1:
+            for path in paths:
+                ext = Path(path).suffix.lstrip(".").lower()
+                names[path] = f"{names[path]}_{ext}" if ext else names[path]
+    taken = set(names.values())
+    for name, paths in by_name(names).items():
+        i = 2
+        for path in sorted(paths)[1:]:
+            while f"{name}_{i}" in taken:
+                i += 1
+            names[path] = f"{name}_{i}"
+            taken.add(names[path])
+    return names
+
+
+def _auto_schema(chosen: dict):
+    """Read schema that picks quadrant when the sample has Reach/Sentiment columns, else Sankey."""
+    def schema(sample):
+        try:
+            spec = quadrant_read_schema(sample)
+            chosen["analysis"] = "quadrant"
+        except ValueError:
+            spec = sankey_read_schema(sample)
+            chosen["analysis"] = "sankey"
+        return spec
+    return schema
+
+
+def render_file(
+    path: str, analysis: str, out_dir: str, formats: tuple, max_authors: Optional[int],
+    splits: tuple = (DEFAULT_SPLIT, DEFAULT_SPLIT), name: Optional[str] = None,
+) -> dict:
+    """
+    Process-pool worker: read one file, build its figure and write the HTML export
+    (quadrants split on the (reach_split, sentiment_split) pair splits) as <name>_<analysis>.html,
+    name defaulting to the file stem (see output_names).
+    Returns timings, output paths, the frame used for writeups and, when PNG is requested,
+    the figure JSON for the export pool.
+    """
+    path = Path(path)
+    timings = {}
+    t0 = time.perf_counter()
+    chosen = {"analysis": analysis}
+    if analysis == "auto":
+        schema = _auto_schema(chosen)
+    else:
+        schema = quadrant_read_schema if analysis == "quadrant" else sankey_read_schema
+    df = read_file(path, schema=schema)
+    analysis = chosen["analysis"]
+    timings["read"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if analysis == "quadrant":
+        fig = build_quadrant_figure_plotly(df, reach_split=splits[0], sentiment_split=splits[1])
+    else:
+        fig = build_sankey_figure(df, max_authors=max_authors)
+    timings["chart"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    outputs = []
+    stem = os.path.join(out_dir, f"{name or path.stem}_{analysis}")
+    if "html" in formats:
+        fig.write_html(f"{stem}.html", include_plotlyjs="cdn")
+        outputs.append(f"{stem}.html")
+    timings["export"] = time.perf_counter() - t0
+    fig_json = fig.to_json() if "png" in formats else None
+    return {"path": str(path), "analysis": analysis, "df": df, "fig": fig_json, "outputs": outputs, "timings": timings}
+
+
+def _write_image(data: bytes, out_path: str) -> None:
+    with open(out_path, "wb") as f:
+        f.write(data)
+
+
+def _write_writeups(
+    df, analysis: str, out_path: str, api_key: Optional[str], map_reduce: bool = False,
+    splits: tuple = (DEFAULT_SPLIT, DEFAULT_SPLIT),
+) -> float:
+    """Thread-pool task: generate and save writeups; returns elapsed seconds."""
+    from writeups_generation import generate_writeups
+
+    t0 = time.perf_counter()
+    text = (generate_writeups(
+        df, analysis_type=analysis, api_key=api_key, map_reduce=map_reduce,
+        reach_split=splits[0], sentiment_split=splits[1],
+    ) or "").strip()
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    return time.perf_counter() - t0
+
+
+def run_batch(
+    inputs: list[Path],
+    out_dir: str,
+    *,
+    analysis: str = "auto",
+    formats: tuple = ("html",),
+    writeups: bool = True,
+    workers: Optional[int] = None,
+    llm_threads: int = 4,
+    max_authors: Optional[int] = 30,
+    map_reduce: bool = False,
+    reach_split=DEFAULT_SPLIT,
+    sentiment_split=DEFAULT_SPLIT,
+    api_key: Optional[str] = None,
+    log=print,
+) -> list[dict]:
+    """
+    Render every input; returns one result dict per file (with timings and any error).
+    reach_split / sentiment_split pick the quadrant split lines (see chart_creation.thresholds).
+    """
+    splits = (reach_split, sentiment_split)
+    names = output_names(inputs)
+    os.makedirs(out_dir, exist_ok=True)
+    results = {}
+    started = {}
+    remaining = {}
+    total = len(inputs)
+    done = 0
+    export_pool = ExportPool(workers=workers, timeout=EXPORT_TIMEOUT, warm=True) if "png" in formats else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as procs, ThreadPoolExecutor(max_workers=llm_threads) as threads:
+            pending = {}
+            for path in inputs:
+                started[str(path)] = time.perf_counter()
+                fut = procs.submit(
+                    render_file, str(path), analysis, out_dir, tuple(formats), max_authors, splits, names[str(path)],
+                )
+                pending[fut] = ("render", str(path), None)
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    kind, key, extra = pending.pop(fut)
+                    if kind == "render":
+                        try:
+                            res = fut.result()
+                        except Exception as e:
+                            res = {"path": key, "error": f"{type(e).__name__}: {e}", "timings": {}, "outputs": []}
+                        df = res.pop("df", None)
+                        fig_json = res.pop("fig", None)
+                        results[key] = res
+                        remaining[key] = 0
+                        stem = os.path.join(out_dir, f"{names[key]}_{res.get('analysis')}")
+                        if export_pool is not None and fig_json is not None:
+                            image_fut = export_pool.submit(fig_json, "png", width=1200, height=800)
+                            pending[image_fut] = ("image", key, (f"{stem}.png", time.perf_counter()))
+                            remaining[key] += 1
+                        if writeups and df is not None:
+                            out_path = f"{stem}_writeups.md"
+                            res["outputs"].append(out_path)
+                            writeups_fut = threads.submit(
+                                _write_writeups, df, res["analysis"], out_path, api_key, map_reduce, splits,
+                            )
+                            pending[writeups_fut] = ("writeups", key, None)
+                            remaining[key] += 1
+                    elif kind == "image":
+                        res = results[key]
+                        remaining[key] -= 1
+                        out_path, submitted = extra
+                        try:
+                            _write_image(fut.result(), out_path)
+                            res["outputs"].append(out_path)
+                        except Exception as e:
+                            res["error"] = f"png: {type(e).__name__}: {e}"
+                        res["timings"]["export"] = res["timings"].get("export", 0.0) + time.perf_counter() - submitted
+                    else:
+                        res = results[key]
+                        remaining[key] -= 1
+                        try:
+                            res["timings"]["writeups"] = fut.result()
+                        except Exception as e:
+                            res["error"] = f"writeups: {type(e).__name__}: {e}"
+                    if remaining[key]:
+                        continue
+                    res["timings"]["total"] = time.perf_counter() - started[key]
+                    done += 1
+                    status = f"FAILED ({res['error']})" if res.get("error") else "ok"
+                    log(f"[{done}/{total}] {key}: {status} in {res['timings']['total']:.1f}s")
+    finally:
+        if export_pool is not None:
+            export_pool.close()
+    return [results[str(p)] for p in inputs]
+
+
+def format_summary(results: list[dict]) -> str:
+    """Per-file timing table plus totals."""
+    stages = ["read", "chart", "export", "writeups", "total"]
+    name_width = max([len(Path(r["path"]).name) for r in results] + [4])
+    lines = [f"{'file':<{name_width}} {'analysis':>9} " + " ".join(f"{s:>9}" for s in stages)]
+    for r in results:
+        cells = [f"{r['timings'][s]:>9.2f}" if s in r["timings"] else f"{'-':>9}" for s in stages]
+        lines.append(f"{Path(r['path']).name:<{name_width}} {r.get('analysis', '-'):>9} " + " ".join(cells))
+    failed = sum(1 for r in results if r.get("error"))
+    lines.append(f"{len(results)} files, {failed} failed")
+    return "\n".join(lines)
+
+
+def _split_arg(text: str) -> str:
+    """argparse type for split specs: validated but passed on as text."""
+    try:
+        parse_split(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+    return text
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Render reports for many input files.")
+    parser.add_argument("inputs", nargs="+", help="Files, directories or glob patterns (.csv, .xlsx).")
+    parser.add_argument("--out", default="reports", help="Output directory (default: reports).")
+    parser.add_argument("--analysis", choices=("auto",) + ANALYSIS_TYPES, default="auto")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["html"])
+    parser.add_argument("--no-writeups", action="store_true", help="Skip DeepSeek writeups.")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default: CPU count).")
+    parser.add_argument("--llm-threads", type=int, default=4, help="Concurrent writeup requests.")
+    parser.add_argument("--max-authors", type=int, default=30, help="Sankey authors before folding into 'Other'.")
+    parser.add_argument("--map-reduce", action="store_true", help="Writeups cover the full dataset (section summaries).")
+    for axis in ("reach", "sentiment"):
+        parser.add_argument(
+            f"--{axis}-split", type=_split_arg, default=DEFAULT_SPLIT,
+            help=f"Quadrant {axis} split line: mean, median, log-mean, pNN (e.g. p75) or a number (default: mean).",
+        )
+    args = parser.parse_args(argv)
+
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        print("No input files found.", file=sys.stderr)
+        return 1
+    print(f"Processing {len(inputs)} file(s) -> {args.out}", file=sys.stderr)
+    t0 = time.perf_counter()
+    results = run_batch(
+        inputs,
+        args.out,
+        analysis=args.analysis,
+        formats=tuple(args.formats),
+        writeups=not args.no_writeups,
+        workers=args.workers,
+        llm_threads=args.llm_threads,
+        max_authors=args.max_authors,
+        map_reduce=args.map_reduce,
+        reach_split=args.reach_split,
+        sentiment_split=args.sentiment_split,
+        log=lambda msg: print(msg, file=sys.stderr),
+    )
+    print(format_summary(results))
+    print(f"Wall time: {time.perf_counter() - t0:.1f}s")
+    return 1 if any(r.get("error") for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,97 @@
 """
 Chart creation: quadrant and sankey figures.
+Submodules are imported on first attribute access (PEP 562), so importing the package
+stays cheap and only the backends a caller actually uses get loaded.
 """
-from .quadrant import build_quadrant_figure_plotly, build_quadrant_figure, prepare_quadrant_df
-from .sankey import build_sankey_figure
+import importlib
+
+_EXPORTS = {
+    "AuthorResolver": ".authors",
+    "author_column_position": ".authors",
+    "canonicalize_authors": ".authors",
+    "normalize_names": ".authors",
+    "shared_resolver": ".authors",
+    "aggregate_csv": ".aggregate",
+    "aggregate_quadrant_chunks": ".aggregate",
+    "aggregate_sankey_chunks": ".aggregate",
+    "quadrant_split_lines": ".aggregate",
+    "quadrant_split_sketches": ".aggregate",
+    "QuantileSketch": ".thresholds",
+    "describe_split": ".thresholds",
+    "split_value": ".thresholds",
+    "AuthorStore": ".store",
+    "PeriodComparison": ".periods",
+    "build_quadrant_animation": ".periods",
+    "build_transition_figure": ".periods",
+    "compare_periods": ".periods",
+    "ExportPool": ".export",
+    "ExportError": ".export",
+    "ExportTimeout": ".export",
+    "export_figure": ".export",
+    "shared_export_pool": ".export",
+    "QUADRANT_LABELS": ".quadrant",
+    "build_quadrant_figure_plotly": ".quadrant",
+    "build_quadrant_figure": ".quadrant",
+    "classify_quadrants": ".quadrant",
+    "parse_reach": ".quadrant",
+    "prepare_quadrant_df": ".quadrant",
+    "quadrant_frame": ".quadrant",
+    "quadrant_read_schema": ".quadrant",
+    "OTHER_AUTHORS_LABEL": ".sankey",
+    "aggregate_sankey_df": ".sankey",
+    "build_sankey_figure": ".sankey",
+    "sankey_read_schema": ".sankey",
+    "sankey_tail_authors": ".sankey",
+}
 
 __all__ = [
     "build_quadrant_figure_plotly",
     "build_quadrant_figure",
     "prepare_quadrant_df",
+    "quadrant_frame",
+    "classify_quadrants",
+    "parse_reach",
+    "QUADRANT_LABELS",
+    "quadrant_read_schema",
+    "sankey_read_schema",
     "build_sankey_figure",
+    "sankey_tail_authors",
+    "aggregate_sankey_df",
+    "OTHER_AUTHORS_LABEL",
+    "aggregate_csv",
+    "aggregate_quadrant_chunks",
+    "aggregate_sankey_chunks",
+    "quadrant_split_lines",
+    "quadrant_split_sketches",
+    "QuantileSketch",
+    "split_value",
+    "describe_split",
+    "AuthorStore",
+    "AuthorResolver",
+    "author_column_position",
+    "canonicalize_authors",
+    "normalize_names",
+    "shared_resolver",
+    "compare_periods",
+    "PeriodComparison",
+    "build_quadrant_animation",
+    "build_transition_figure",
+    "ExportPool",
+    "ExportError",
+    "ExportTimeout",
+    "export_figure",
+    "shared_export_pool",
 ]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
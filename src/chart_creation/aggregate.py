@@ -0,0 +1,122 @@
+"""
+Out-of-core aggregation of article-level data into author-level frames.
+Chunks are folded into per-author partial sums, so memory is bounded by the number of
+authors, not rows. The results feed prepare_quadrant_df / build_sankey_figure directly.
+"""
+import pandas as pd
+
+from helper.readers import iter_csv_chunks
+
+from .quadrant import prepare_quadrant_df, quadrant_read_schema
+from .sankey import _aggregate_by_author, sankey_read_schema
+from .thresholds import DEFAULT_SKETCH_K, DEFAULT_SPLIT, QuantileSketch
+
+DEFAULT_CHUNKSIZE = 200_000
+
+
+def _fold(acc, part):
+    """Combine a running per-author partial aggregate with the next one (sums by author)."""
+    if acc is None:
+        return part
+    return pd.concat([acc, part]).groupby(level=0, sort=False).sum()
+
+
+def quadrant_partial(chunk):
+    """
+    Per-author partial sums of one article-level chunk, indexed by author:
+    Reach (sum), sentiment_sum and Mentions (row count). Partials add up across chunks.
+    """
+    prepared, err = prepare_quadrant_df(chunk)
+    if err:
+        raise ValueError(err)
+    prepared = prepared[prepared['Authors'].notna()]
+    prepared['Authors'] = prepared['Authors'].astype(str)
+    prepared['Sentiment Score'] = prepared['Sentiment Score'].astype('float64')
+    return prepared.groupby('Authors', sort=False).agg(
+        Reach=('Reach', 'sum'),
+        sentiment_sum=('Sentiment Score', 'sum'),
+        Mentions=('Sentiment Score', 'size'),
+    )
+
+
+def quadrant_from_partial(acc):
+    """Author-level quadrant frame (Authors, Reach, mean Sentiment Score, Mentions) from partial sums."""
+    if acc is None:
+        return pd.DataFrame(columns=['Authors', 'Reach', 'Sentiment Score', 'Mentions'])
+    return pd.DataFrame({
+        'Authors': acc.index,
+        'Reach': acc['Reach'].to_numpy(),
+        'Sentiment Score': (acc['sentiment_sum'] / acc['Mentions']).to_numpy(),
+        'Mentions': acc['Mentions'].to_numpy(),
+    })
+
+
+def sankey_partial(chunk):
+    """Per-author theme totals of one chunk, indexed by author (str). Partials add up across chunks."""
+    grouped, _ = _aggregate_by_author(chunk)
+    grouped = grouped[grouped.index.notna()]
+    grouped.index = grouped.index.astype(str)
+    return grouped
+
+
+def aggregate_quadrant_chunks(chunks):
+    """
+    Fold article-level chunks into one row per author: summed Reach, mean Sentiment Score
+    and the number of rows (Mentions). Returns a frame ready for prepare_quadrant_df.
+    """
+    acc = None
+    for chunk in chunks:
+        acc = _fold(acc, quadrant_partial(chunk))
+    return quadrant_from_partial(acc)
+
+
+def aggregate_sankey_chunks(chunks):
+    """Fold article-level chunks into per-author theme totals (author column first)."""
+    acc = None
+    author_col = None
+    for chunk in chunks:
+        grouped = sankey_partial(chunk)
+        author_col = grouped.index.name
+        acc = _fold(acc, grouped)
+    if acc is None:
+        return pd.DataFrame()
+    acc.index.name = author_col
+    return acc.reset_index()
+
+
+def quadrant_split_sketches(chunks, k=DEFAULT_SKETCH_K):
+    """
+    One pass over author-level quadrant chunks (one row per author, e.g. an aggregated export
+    read with iter_csv_chunks) into a (reach, sentiment) QuantileSketch pair. Memory stays
+    O(k log n) however many rows stream past; sketches of separate passes merge.
+    """
+    reach, sentiment = QuantileSketch(k), QuantileSketch(k)
+    for chunk in chunks:
+        prepared, err = prepare_quadrant_df(chunk)
+        if err:
+            raise ValueError(err)
+        reach.update(prepared['Reach'].to_numpy())
+        sentiment.update(prepared['Sentiment Score'].to_numpy())
+    return reach, sentiment
+
+
+def quadrant_split_lines(chunks, reach_split=DEFAULT_SPLIT, sentiment_split=DEFAULT_SPLIT, k=DEFAULT_SKETCH_K):
+    """
+    (reach_line, sentiment_line) for author-level chunks in a single pass (approximate for
+    quantile specs). Pass the lines as fixed splits to draw a sample against the full data.
+    """
+    reach, sentiment = quadrant_split_sketches(chunks, k)
+    return reach.split(reach_split), sentiment.split(sentiment_split)
+
+
+def aggregate_csv(source, analysis_type, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Stream a CSV (path, bytes or binary file-like) in chunks and return the author-level
+    frame for analysis_type ('quadrant' or 'sankey'), reading only the needed columns.
+    """
+    key = (analysis_type or "").strip().lower()
+    if key == "quadrant":
+        return aggregate_quadrant_chunks(iter_csv_chunks(source, chunksize, schema=quadrant_read_schema))
+    if key == "sankey":
+        return aggregate_sankey_chunks(iter_csv_chunks(source, chunksize, schema=sankey_read_schema))
+    raise ValueError(f"Unknown analysis type: {analysis_type!r} (expected 'quadrant' or 'sankey')")
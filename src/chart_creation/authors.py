@@ -0,0 +1,287 @@
+"""
+Author-name normalization and fuzzy deduplication.
+"J. Smith", "John Smith " and "SMITH, John" are mapped to one canonical spelling before
+aggregation. Candidates come from blocking (surname + first initial) and a character-trigram
+inverted index probed with only each name's rarest grams (prefix filtering), so each new name
+is compared with a handful of others rather than all of them. By default each resolver (and each
+canonicalize_authors call) matches within one dataset only, so a wrong merge cannot leak into unrelated
+files. Give it a path (or set TCA_AUTHOR_MAP) to persist the raw -> canonical mapping in SQLite for one
+source that is refreshed over time: later runs then only match spellings they have not seen, and an
+existing author's canonical name never changes.
+"""
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Trigram Jaccard similarity needed for a fuzzy match
+DEFAULT_THRESHOLD = 0.8
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS author_map (
+    raw TEXT PRIMARY KEY,
+    canonical TEXT NOT NULL,
+    created REAL NOT NULL
+)
+"""
+
+_PUNCT = re.compile(r"[^\w\s,]+")
+_SPACE = re.compile(r"\s+")
+_DIGITS = re.compile(r"\d+")
+
+
+def author_column_position(columns) -> Optional[int]:
+    """
+    Position of the author column: the first named 'Authors' in any case (surrounding spaces
+    ignored), else the first column; None without columns. Shared by the quadrant and Sankey
+    builders and canonicalize_authors, so they all pick the same column.
+    """
+    names = [str(c).strip().lower() for c in columns]
+    if 'authors' in names:
+        return names.index('authors')
+    return 0 if names else None
+
+
+def normalize_name(name: str) -> str:
+    """
+    Match key for one author name: accents and punctuation dropped, case-folded, whitespace
+    collapsed and "Last, First" turned into "first last".
+    """
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = _PUNCT.sub(' ', text)
+    if text.count(',') == 1:
+        last, first = text.split(',')
+        if first.strip():
+            text = f"{first} {last}"
+    return _SPACE.sub(' ', text.replace(',', ' ')).strip()
+
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    """normalize_name for a column, computed once per distinct spelling."""
+    codes, uniques = pd.factorize(names)
+    keys = np.array([normalize_name(u) for u in uniques], dtype=object)
+    out = np.where(codes >= 0, keys[codes] if len(keys) else '', None)
+    return pd.Series(out, index=names.index, name=names.name, dtype=object)
+
+
+def _trigrams(key: str) -> frozenset:
+    padded = f"  {key} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _block_key(tokens: list) -> Optional[str]:
+    return f"{tokens[-1]}|{tokens[0][0]}" if len(tokens) > 1 else None
+
+
+def _given_compatible(a: list, b: list) -> bool:
+    """Given names agree: each pair of leading tokens is equal, or one is the other's initial."""
+    for x, y in zip(a[:2], b[:2]):
+        if x != y and not ((len(x) == 1 and y.startswith(x)) or (len(y) == 1 and x.startswith(y))):
+            return False
+    return True
+
+
+class AuthorResolver:
+    """
+    Incremental raw name -> canonical name mapping. Thread-safe; kept in memory unless path (or
+    TCA_AUTHOR_MAP) names an SQLite file it is loaded from and appended to.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: float = DEFAULT_THRESHOLD):
+        self.path = path or os.environ.get("TCA_AUTHOR_MAP") or ":memory:"
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._mapping: dict = {}
+        self._key_canonical: dict = {}
+        self._blocks: dict = {}
+        self._grams: dict = {}
+        self._gram_sets: dict = {}
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(_SCHEMA)
+                rows = conn.execute("SELECT raw, canonical FROM author_map ORDER BY created").fetchall()
+            for raw, canonical in rows:
+                self._mapping[raw] = canonical
+                key = normalize_name(raw)
+                if key and key not in self._key_canonical:
+                    self._index(key, canonical)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self._mapping)
+
+    @property
+    def mapping(self) -> dict:
+        """Copy of every raw spelling seen so far and its canonical name."""
+        with self._lock:
+            return dict(self._mapping)
+
+    def _index(self, key: str, canonical: str) -> None:
+        self._key_canonical[key] = canonical
+        block = _block_key(key.split())
+        if block is not None:
+            self._blocks.setdefault(block, []).append(key)
+        grams = _trigrams(key)
+        self._gram_sets[key] = grams
+        for gram in grams:
+            self._grams.setdefault(gram, []).append(key)
+
+    def _ambiguous_initial(self, key: str) -> bool:
+        """An initial ("j smith") whose block holds more than one full given name ("john", "jane")."""
+        tokens = key.split()
+        if len(tokens) < 2 or len(tokens[0]) != 1:
+            return False
+        block = self._blocks.get(_block_key(tokens), ())
+        return len({c.split()[0] for c in block if len(c.split()[0]) > 1}) > 1
+
+    def _block_match(self, key: str) -> Optional[str]:
+        """Same surname and first initial, compatible given names; initials only match an unambiguous full name."""
+        tokens = key.split()
+        block = self._blocks.get(_block_key(tokens)) if len(tokens) > 1 else None
+        if not block:
+            return None
+        given = tokens[:-1]
+        candidates = [c for c in block if _given_compatible(given, c.split()[:-1])]
+        if not candidates:
+            return None
+        full_given = {c.split()[0] for c in block if len(c.split()[0]) > 1}
+        if len(given[0]) > 1 and (full_given - {given[0]}):
+            candidates = [c for c in candidates if c.split()[0] == given[0]]
+        if not candidates:
+            return None
+        # Prefer the candidate spelled most like the query
+        grams = _trigrams(key)
+        return max(candidates, key=lambda c: len(grams & self._gram_sets[c]))
+
+    def _gram_match(self, key: str) -> Optional[str]:
+        """
+        Best trigram-Jaccard candidate at or above threshold. Any such candidate shares at least
+        ceil(threshold * |A|) grams with the query's |A| grams, hence one of any |A| - that + 1 of
+        them: only the postings of the rarest ones are read.
+        """
+        grams = _trigrams(key)
+        digits = _DIGITS.findall(key)
+        postings = sorted((self._grams.get(g, ()) for g in grams), key=len)
+        probe = len(grams) - math.ceil(self.threshold * len(grams)) + 1
+        candidates = set()
+        for posting in postings[:probe]:
+            candidates.update(posting)
+        n = len(grams)
+        # Jaccard >= threshold also bounds the candidate's gram count
+        low, high = self.threshold * n, n / self.threshold
+        best, best_score = None, self.threshold
+        for cand in candidates:
+            other = self._gram_sets[cand]
+            if not low <= len(other) <= high:
+                continue
+            shared = len(grams & other)
+            score = shared / (n + len(other) - shared)
+            # "Author 1" and "Author 11" are different people
+            if score >= best_score and _DIGITS.findall(cand) == digits:
+                best, best_score = cand, score
+        return best
+
+    def resolve(self, names: pd.Series) -> pd.Series:
+        """Canonical name for every value of names (missing values stay missing)."""
+        codes, uniques = pd.factorize(names)
+        spellings = [str(u) for u in uniques]
+        with self._lock:
+            new = [s for s in spellings if s not in self._mapping]
+            if new:
+                counts = np.bincount(codes[codes >= 0], minlength=len(spellings))
+                self._add(new, dict(zip(spellings, counts.tolist())))
+            canonical = np.array([self._mapping[s] for s in spellings], dtype=object)
+        out = np.where(codes >= 0, canonical[codes] if len(canonical) else None, None)
+        return pd.Series(out, index=names.index, name=names.name, dtype=object)
+
+    def _add(self, spellings: list, counts: dict) -> None:
+        """
+        Match new spellings and persist their mapping. Names with a full given name go first (most
+        frequent, then longest), initials last: by the time "j smith" is linked, every "john smith" /
+        "jane smith" of this batch and the stored map is indexed, so ambiguity does not depend on order.
+        """
+        by_key: dict = {}
+        for s in spellings:
+            by_key.setdefault(normalize_name(s), []).append(s)
+        order = sorted(
+            by_key,
+            key=lambda k: (len(k.split()[0]) == 1 if k else True, -sum(counts[s] for s in by_key[k]), -len(k)),
+        )
+        rows = []
+        now = time.time()
+        for key in order:
+            group = by_key[key]
+            canonical = self._key_canonical.get(key)
+            # "j smith" next to both "john smith" and "jane smith" stays its own author
+            if canonical is None and key and not self._ambiguous_initial(key):
+                match = self._block_match(key) or self._gram_match(key)
+                if match is not None:
+                    canonical = self._key_canonical[match]
+            if canonical is None:
+                # New author: its most frequent spelling, trimmed, is the display name
+                canonical = _SPACE.sub(' ', max(group, key=lambda s: counts[s])).strip()
+            if key and key not in self._key_canonical:
+                self._index(key, canonical)
+            for s in group:
+                self._mapping[s] = canonical
+                rows.append((s, canonical, now))
+        if self.path != ":memory:":
+            with self._connect() as conn:
+                conn.executemany("INSERT OR IGNORE INTO author_map (raw, canonical, created) VALUES (?, ?, ?)", rows)
+
+
+_shared: Optional[AuthorResolver] = None
+_shared_lock = threading.Lock()
+
+
+def shared_resolver() -> AuthorResolver:
+    """
+    Process-wide resolver (in memory, or at TCA_AUTHOR_MAP), for callers that deliberately want one
+    mapping across datasets; canonicalize_authors does not use it unless it is passed in.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = AuthorResolver()
+        return _shared
+
+
+def canonicalize_authors(df: pd.DataFrame, column=None, resolver: Optional[AuthorResolver] = None):
+    """
+    Copy of df with the author column ('Authors' in any case, else the first column) replaced by canonical
+    names, plus a frame of the spellings that changed (Name, Canonical). Group or aggregate
+    afterwards to merge the variants (build_sankey_figure does this by itself). Without a resolver
+    the variants are matched within df only (plus the TCA_AUTHOR_MAP file, if set).
+    """
+    resolver = resolver or AuthorResolver()
+    if column is None:
+        column = df.columns[author_column_position(df.columns)]
+    canonical = resolver.resolve(df[column])
+    changed = canonical.notna() & (canonical != df[column].astype(str))
+    merged = (
+        pd.DataFrame({'Name': df.loc[changed, column].astype(str), 'Canonical': canonical[changed]})
+        .drop_duplicates()
+        .sort_values(['Canonical', 'Name'], ignore_index=True)
+    )
+    out = df.copy()
+    out[column] = canonical
+    return out, merged
@@ -0,0 +1,255 @@
+"""
+Static image export (PNG/SVG/PDF) in a pool of reusable worker processes.
+Workers keep kaleido / matplotlib warm between jobs. Each job has a timeout; a worker that
+hangs or dies is killed (with any renderer subprocesses it started) and replaced, so a stuck
+export costs one worker restart instead of freezing the caller.
+"""
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import signal
+import sys
+import threading
+import types
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Optional
+
+EXPORT_FORMATS = ("png", "svg", "pdf")
+DEFAULT_TIMEOUT = 60.0
+# Seconds a fresh worker may spend importing and warming up its renderers
+STARTUP_TIMEOUT = 120.0
+
+
+class ExportError(RuntimeError):
+    """Rendering failed inside the export worker."""
+
+
+class ExportTimeout(ExportError, TimeoutError):
+    """A job exceeded its timeout; the worker was recycled."""
+
+
+def _warm_up() -> None:
+    """Import the renderers and render a tiny figure so the first real job is fast."""
+    import io
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(1, 1))
+    fig.savefig(io.BytesIO(), format="png")
+    plt.close(fig)
+    try:
+        import plotly.graph_objects as go
+        import plotly.io as pio
+
+        pio.to_image(go.Figure(), format="png", width=10, height=10)
+    except Exception:
+        # plotly/kaleido missing or broken: matplotlib jobs still work, plotly jobs report the error
+        pass
+
+
+def _render(kind: str, payload: Any, fmt: str, options: dict) -> bytes:
+    if kind == "plotly":
+        import plotly.io as pio
+
+        fig = pio.from_json(payload)
+        return pio.to_image(
+            fig, format=fmt, width=options.get("width"), height=options.get("height"), scale=options.get("scale"),
+        )
+    import io
+
+    import matplotlib.pyplot as plt
+
+    fig = pickle.loads(payload)
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format=fmt, dpi=options.get("dpi", 300), transparent=True, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return buf.getvalue()
+
+
+def _worker_main(conn, warm: bool) -> None:
+    """Worker loop: receive (kind, payload, fmt, options), reply ("ok", bytes) or ("error", message)."""
+    if hasattr(os, "setsid"):
+        # Own process group, so a timeout can also kill the renderer subprocesses
+        os.setsid()
+    if warm:
+        _warm_up()
+    conn.send(("ready", None))
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        try:
+            conn.send(("ok", _render(*job)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+_start_lock = threading.Lock()
+
+
+@contextmanager
+def _bare_main():
+    """
+    Hide the __main__ module while a worker is spawned. Under `streamlit run` __main__ is the
+    app script, and spawn would otherwise re-execute the whole app in every export worker.
+    """
+    with _start_lock:
+        main = sys.modules.get("__main__")
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            yield
+        finally:
+            sys.modules["__main__"] = main
+
+
+class _Worker:
+    def __init__(self, ctx, warm: bool):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, warm), daemon=True)
+        with _bare_main():
+            self.process.start()
+        child.close()
+        self.ready = False
+
+    def run(self, job: tuple, timeout: float) -> bytes:
+        if not self.ready:
+            if not self.conn.poll(STARTUP_TIMEOUT):
+                raise ExportTimeout("Export worker did not start in time")
+            self.conn.recv()
+            self.ready = True
+        self.conn.send(job)
+        if not self.conn.poll(timeout):
+            raise ExportTimeout(f"Export did not finish within {timeout:g}s")
+        status, value = self.conn.recv()
+        if status != "ok":
+            raise ExportError(value)
+        return value
+
+    def kill(self) -> None:
+        pid = self.process.pid
+        try:
+            if hasattr(os, "killpg") and pid:
+                os.killpg(pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.process.join(timeout=5)
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=5)
+        except (OSError, BrokenPipeError):
+            pass
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+def _job(fig, fmt: str, width, height, scale, dpi) -> tuple:
+    fmt = fmt.lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format {fmt!r}; expected one of {EXPORT_FORMATS}")
+    options = {"width": width, "height": height, "scale": scale, "dpi": dpi}
+    if isinstance(fig, str):
+        return ("plotly", fig, fmt, options)
+    if hasattr(fig, "to_json"):
+        return ("plotly", fig.to_json(), fmt, options)
+    if hasattr(fig, "savefig"):
+        return ("matplotlib", pickle.dumps(fig), fmt, options)
+    raise TypeError(f"Cannot export object of type {type(fig).__name__}")
+
+
+class ExportPool:
+    """
+    Pool of export worker processes. Accepts Plotly figures (or their JSON) and matplotlib
+    figures; export() blocks, submit() returns a Future. Use as a context manager or call close().
+    """
+
+    def __init__(self, workers: Optional[int] = None, timeout: float = DEFAULT_TIMEOUT, warm: bool = True):
+        self.size = workers or max(1, min(4, os.cpu_count() or 1))
+        self.timeout = timeout
+        self._warm = warm
+        self._ctx = mp.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for _ in range(self.size):
+            self._idle.put(_Worker(self._ctx, warm))
+        self._threads = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="export")
+        self._closed = False
+        self.recycled = 0
+
+    def _run(self, job: tuple, timeout: Optional[float]) -> bytes:
+        worker = self._idle.get()
+        try:
+            result = worker.run(job, self.timeout if timeout is None else timeout)
+        except ExportError as e:
+            if isinstance(e, ExportTimeout):
+                worker.kill()
+                worker = _Worker(self._ctx, self._warm)
+                self.recycled += 1
+            raise
+        except (EOFError, OSError, BrokenPipeError) as e:
+            # Worker crashed mid-job
+            worker.kill()
+            exitcode = worker.process.exitcode
+            worker = _Worker(self._ctx, self._warm)
+            self.recycled += 1
+            raise ExportError(f"Export worker died (exit code {exitcode})") from e
+        finally:
+            self._idle.put(worker)
+        return result
+
+    def submit(self, fig, fmt: str = "png", *, width=None, height=None, scale=None, dpi=300,
+               timeout: Optional[float] = None) -> Future:
+        if self._closed:
+            raise RuntimeError("ExportPool is closed")
+        return self._threads.submit(self._run, _job(fig, fmt, width, height, scale, dpi), timeout)
+
+    def export(self, fig, fmt: str = "png", **kwargs) -> bytes:
+        """Render fig to image bytes; raises ExportTimeout / ExportError on failure."""
+        return self.submit(fig, fmt, **kwargs).result()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._threads.shutdown(wait=True)
+        while not self._idle.empty():
+            self._idle.get_nowait().stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_shared: Optional[ExportPool] = None
+_shared_lock = threading.Lock()
+
+
+def shared_export_pool() -> ExportPool:
+    """Process-wide export pool (started on first use; size from TCA_EXPORT_WORKERS)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            workers = os.environ.get("TCA_EXPORT_WORKERS", "").strip()
+            _shared = ExportPool(workers=int(workers) if workers else None)
+        return _shared
+
+
+def export_figure(fig, fmt: str = "png", **kwargs) -> bytes:
+    """Export a figure with the shared pool. See ExportPool.submit for options."""
+    return shared_export_pool().export(fig, fmt, **kwargs)
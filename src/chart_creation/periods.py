@@ -0,0 +1,286 @@
+"""
+Multi-period quadrant comparison: align authors across N period frames, classify every
+(period, author) in one vectorized pass and summarize movement between quadrants.
+Authors are matched on normalized names (optionally after fuzzy canonicalization with an
+AuthorResolver) with a hash join (pd.factorize over all periods);
+reach, sentiment and quadrant codes are dense (periods x authors) arrays, -1 / NaN where an
+author is absent. Each period is split on its own reach / sentiment lines (mean by default, or
+any chart_creation.thresholds spec), as in quadrant_frame.
+"""
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .authors import AuthorResolver, normalize_names
+from .quadrant import QUADRANT_COLORS, QUADRANT_LABELS, classify_quadrants, prepare_quadrant_df
+from .thresholds import DEFAULT_SPLIT, split_value
+
+NOT_PRESENT_LABEL = 'NOT PRESENT'
+# Authors drawn in the animated figure (largest total reach first)
+DEFAULT_ANIMATION_AUTHORS = 2000
+
+
+class PeriodComparison:
+    """
+    Aligned quadrant data for several periods. Arrays are indexed [period, author]:
+    reach (float, NaN if absent), sentiment (float, NaN if absent) and codes (int8 index into
+    QUADRANT_LABELS, -1 if absent). reach_split / sentiment_split hold each period's split lines
+    (computed from the reach_split / sentiment_split specs, mean by default).
+    """
+
+    def __init__(self, periods, keys, authors, reach, sentiment,
+                 reach_split=DEFAULT_SPLIT, sentiment_split=DEFAULT_SPLIT):
+        self.periods = list(periods)
+        self.keys = keys
+        self.authors = authors
+        self.reach = reach
+        self.sentiment = sentiment
+        self.present = ~np.isnan(reach)
+        self.reach_split = split_value(reach, reach_split, axis=1)
+        self.sentiment_split = split_value(sentiment, sentiment_split, axis=1)
+        codes = classify_quadrants(
+            np.nan_to_num(reach), np.nan_to_num(sentiment),
+            self.reach_split[:, None], self.sentiment_split[:, None],
+        )
+        self.codes = np.where(self.present, codes, -1).astype(np.int8)
+
+    def __len__(self) -> int:
+        return len(self.authors)
+
+    def _period_index(self, period) -> int:
+        if isinstance(period, (int, np.integer)) and period not in self.periods:
+            return int(period) % len(self.periods)
+        return self.periods.index(period)
+
+    def labels(self) -> pd.DataFrame:
+        """Quadrant label per author (rows) and period (columns); NOT PRESENT where absent."""
+        names = np.array(QUADRANT_LABELS + [NOT_PRESENT_LABEL], dtype=object)
+        return pd.DataFrame(names[self.codes.T], index=self.authors, columns=self.periods)
+
+    def transitions(self, start=None, end=None) -> pd.DataFrame:
+        """
+        Transition counts, rows = quadrant in the earlier period, columns = quadrant in the later.
+        With start / end (period labels, or positions for ints that are not labels) compares
+        those two periods; by default sums every consecutive pair. NOT PRESENT counts authors
+        entering or leaving.
+        """
+        if start is None and end is None:
+            before, after = self.codes[:-1], self.codes[1:]
+        else:
+            before = self.codes[self._period_index(0 if start is None else start)]
+            after = self.codes[self._period_index(-1 if end is None else end)]
+        k = len(QUADRANT_LABELS) + 1
+        # Absent (-1) maps to the last row / column
+        pairs = np.where(before < 0, k - 1, before).astype(np.int64) * k + np.where(after < 0, k - 1, after)
+        counts = np.bincount(pairs.ravel(), minlength=k * k).reshape(k, k)
+        names = QUADRANT_LABELS + [NOT_PRESENT_LABEL]
+        matrix = pd.DataFrame(counts, index=pd.Index(names, name='from'), columns=pd.Index(names, name='to'))
+        matrix.loc[NOT_PRESENT_LABEL, NOT_PRESENT_LABEL] = 0
+        return matrix
+
+    def movers(self, start=0, end=-1) -> pd.DataFrame:
+        """Authors whose quadrant differs between two periods (entering / leaving included), largest reach first."""
+        i, j = self._period_index(start), self._period_index(end)
+        moved = self.codes[i] != self.codes[j]
+        names = np.array(QUADRANT_LABELS + [NOT_PRESENT_LABEL], dtype=object)
+        out = pd.DataFrame({
+            'Authors': self.authors[moved],
+            'From': names[self.codes[i][moved]],
+            'To': names[self.codes[j][moved]],
+            f'Reach {self.periods[i]}': self.reach[i][moved],
+            f'Reach {self.periods[j]}': self.reach[j][moved],
+            f'Sentiment {self.periods[i]}': self.sentiment[i][moved],
+            f'Sentiment {self.periods[j]}': self.sentiment[j][moved],
+        })
+        return out.sort_values(f'Reach {self.periods[j]}', ascending=False, na_position='last', ignore_index=True)
+
+    def long_frame(self) -> pd.DataFrame:
+        """One row per (period, present author): Period, Authors, Reach, Sentiment Score, Quadrant."""
+        p, a = np.nonzero(self.present)
+        return pd.DataFrame({
+            'Period': np.asarray(self.periods, dtype=object)[p],
+            'Authors': self.authors[a],
+            'Reach': self.reach[p, a],
+            'Sentiment Score': self.sentiment[p, a],
+            'Quadrant': pd.Categorical.from_codes(self.codes[p, a], categories=QUADRANT_LABELS),
+        })
+
+
+def compare_periods(
+    frames: Union[Mapping[str, pd.DataFrame], Sequence[pd.DataFrame]],
+    resolver: Optional[AuthorResolver] = None,
+    reach_split=DEFAULT_SPLIT,
+    sentiment_split=DEFAULT_SPLIT,
+) -> PeriodComparison:
+    """
+    Align quadrant frames for several periods (a {label: frame} mapping in period order, or a
+    list labelled 1..N). Authors repeated within a period after name normalization are merged
+    (reach summed, sentiment averaged); the display name is the first spelling seen, or the
+    canonical name when a resolver also merges fuzzy variants ("J. Smith" / "John Smith").
+    reach_split / sentiment_split choose each period's split lines as in quadrant_frame.
+    Raises ValueError if a frame lacks the quadrant columns.
+    """
+    if isinstance(frames, Mapping):
+        periods, frames = list(frames.keys()), list(frames.values())
+    else:
+        frames = list(frames)
+        periods = list(range(1, len(frames) + 1))
+    if not frames:
+        raise ValueError("Need at least one period frame.")
+    parts = []
+    for i, frame in enumerate(frames):
+        prepared, err = prepare_quadrant_df(frame)
+        if err:
+            raise ValueError(f"Period {periods[i]!r}: {err}")
+        prepared = prepared[prepared['Authors'].notna()]
+        parts.append(prepared.assign(period=np.int32(i)))
+    long = pd.concat(parts, ignore_index=True)
+    long['Sentiment Score'] = long['Sentiment Score'].astype('float64')
+    # Hash join: factorize the raw names (cheap), normalize each distinct spelling once, then
+    # factorize the normalized keys so every period shares the same author codes
+    raw_codes, spellings = pd.factorize(long['Authors'])
+    names = pd.Series(np.asarray(spellings, dtype=object)).astype(str)
+    if resolver is not None:
+        names = resolver.resolve(names)
+    key_codes, keys = pd.factorize(normalize_names(names))
+    # Spellings are in order of first appearance, so the first one per key is the first seen
+    _, first_spelling = np.unique(key_codes, return_index=True)
+    authors = names.to_numpy(dtype=object)[first_spelling]
+    # Dense (period, author) cells: sums and counts via bincount on the flattened cell index
+    shape = (len(frames), len(keys))
+    cell = long['period'].to_numpy(dtype=np.int64) * len(keys) + key_codes[raw_codes]
+    size = shape[0] * shape[1]
+    counts = np.bincount(cell, minlength=size).reshape(shape)
+    reach_sum = np.bincount(cell, weights=long['Reach'].to_numpy(dtype=float), minlength=size).reshape(shape)
+    sentiment_sum = np.bincount(cell, weights=long['Sentiment Score'].to_numpy(), minlength=size).reshape(shape)
+    present = counts > 0
+    reach = np.where(present, reach_sum, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sentiment = np.where(present, sentiment_sum / counts, np.nan)
+    return PeriodComparison(
+        periods, np.asarray(keys, dtype=object), authors, reach, sentiment, reach_split, sentiment_split,
+    )
+
+
+def build_transition_figure(matrix: pd.DataFrame):
+    """Heatmap of a transitions() matrix (counts, rows = from, columns = to). Returns a plotly Figure."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Heatmap(
+        z=matrix.to_numpy(),
+        x=list(matrix.columns),
+        y=list(matrix.index),
+        text=matrix.to_numpy(),
+        texttemplate="%{text:,}",
+        colorscale='Blues',
+        hovertemplate="From %{y}<br>To %{x}<br>Authors: %{z:,}<extra></extra>",
+    ))
+    fig.update_layout(
+        xaxis_title="To", yaxis_title="From", yaxis_autorange='reversed',
+        template='plotly_white', height=500, margin=dict(t=40, b=40, l=60, r=40),
+    )
+    return fig
+
+
+def build_quadrant_animation(comparison: PeriodComparison, max_authors: Optional[int] = DEFAULT_ANIMATION_AUTHORS,
+                             frame_ms: int = 800):
+    """
+    Animated quadrant chart with one frame per period and a period slider. Points keep their
+    identity across frames (ids), so movers glide between quadrants; each frame has its own mean
+    lines. Only the max_authors largest by total reach are drawn (None draws all).
+    Returns a plotly Figure.
+    """
+    import plotly.graph_objects as go
+
+    n = len(comparison)
+    keep = np.arange(n)
+    if max_authors is not None and n > max_authors:
+        total = np.nansum(comparison.reach, axis=0)
+        keep = np.sort(np.argpartition(-total, max_authors - 1)[:max_authors])
+    authors = comparison.authors[keep].astype(str)
+    ids = comparison.keys[keep].astype(str)
+    # Numeric colour codes on a stepped colourscale: per-point colour strings are slow to validate
+    k = len(QUADRANT_LABELS)
+    colorscale = [
+        [edge, QUADRANT_COLORS[label]]
+        for i, label in enumerate(QUADRANT_LABELS)
+        for edge in (i / k, (i + 1) / k)
+    ]
+    names = np.array(QUADRANT_LABELS, dtype=object)
+    scatter = go.Scattergl if len(keep) > 5000 else go.Scatter
+
+    def period_trace(i):
+        present = comparison.present[i, keep]
+        codes = comparison.codes[i, keep][present]
+        return scatter(
+            x=comparison.reach[i, keep][present],
+            y=comparison.sentiment[i, keep][present],
+            ids=ids[present],
+            mode='markers',
+            customdata=np.column_stack([authors[present], names[codes]]),
+            marker=dict(size=8, color=codes, colorscale=colorscale, cmin=-0.5, cmax=k - 0.5,
+                        line=dict(width=0.5, color='black')),
+            hovertemplate=(
+                "<b>%{customdata[0]}</b><br>Reach: %{x:,.0f}<br>Sentiment: %{y:.2f}<br>"
+                "Quadrant: %{customdata[1]}<extra></extra>"
+            ),
+            showlegend=False,
+        )
+
+    def mean_lines(i):
+        line = dict(dash='dash', width=1)
+        return [
+            dict(type='line', xref='x', yref='paper', x0=comparison.reach_split[i], x1=comparison.reach_split[i],
+                 y0=0, y1=1, line=line, opacity=0.7),
+            dict(type='line', xref='paper', yref='y', x0=0, x1=1, y0=comparison.sentiment_split[i],
+                 y1=comparison.sentiment_split[i], line=line, opacity=0.7),
+        ]
+
+    labels = [str(p) for p in comparison.periods]
+    frames = [
+        go.Frame(data=[period_trace(i)], traces=[0], name=label, layout=dict(shapes=mean_lines(i)))
+        for i, label in enumerate(labels)
+    ]
+    fig = go.Figure(data=[period_trace(0)], frames=frames)
+    # Legend-only traces: the point colours come from the per-point marker array
+    for label in QUADRANT_LABELS:
+        fig.add_trace(go.Scatter(x=[None], y=[None], mode='markers', name=label,
+                                 marker=dict(size=10, color=QUADRANT_COLORS[label])))
+
+    reach = comparison.reach[:, keep]
+    sentiment = comparison.sentiment[:, keep]
+    x_max = float(np.nanmax(reach)) if np.isfinite(reach).any() else 1.0
+    y_min = float(np.nanmin(sentiment)) if np.isfinite(sentiment).any() else -1.0
+    y_max = float(np.nanmax(sentiment)) if np.isfinite(sentiment).any() else 1.0
+    pad = (y_max - y_min) * 0.05 or 0.5
+    play = dict(frame=dict(duration=frame_ms, redraw=True), transition=dict(duration=frame_ms // 2), fromcurrent=True)
+    fig.update_layout(
+        shapes=mean_lines(0),
+        xaxis=dict(title="Reach", tickformat=',.0f', range=[0, x_max * 1.05]),
+        yaxis=dict(title="Sentiment Score", range=[y_min - pad, y_max + pad]),
+        legend_title="Quadrants",
+        hovermode='closest',
+        template='plotly_white',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=650,
+        margin=dict(t=40, b=40, l=60, r=80),
+        updatemenus=[dict(
+            type='buttons', showactive=False, x=0, y=-0.12, xanchor='left', direction='left',
+            buttons=[
+                dict(label='Play', method='animate', args=[None, play]),
+                dict(label='Pause', method='animate',
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode='immediate')]),
+            ],
+        )],
+        sliders=[dict(
+            active=0, x=0.12, y=-0.08, len=0.88, currentvalue=dict(prefix="Period: "),
+            steps=[
+                dict(label=label, method='animate',
+                     args=[[label], dict(frame=dict(duration=0, redraw=True), mode='immediate')])
+                for label in labels
+            ],
+        )],
+    )
+    return fig
@@ -1,8 +1,14 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import os
-from matplotlib.ticker import FuncFormatter
+import sys
+
+if __package__ in (None, ''):
+    # Run as a script (python src/chart_creation/quadrant.py): make src importable for the absolute imports
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_creation.authors import author_column_position
+from chart_creation.thresholds import DEFAULT_SPLIT, split_value
 
 try:
     import plotly.graph_objects as go
@@ -10,6 +16,22 @@ try:
 except ImportError:
     PLOTLY_AVAILABLE = False
 
+QUADRANT_LABELS = [
+    'KEY ALLIES',
+    'POTENTIAL ADVOCATES',
+    'HIGH-VISIBILITY NEUTRALS',
+    'LIMITED REACH NEUTRALS',
+]
+QUADRANT_COLORS = {
+    'KEY ALLIES': 'green',
+    'POTENTIAL ADVOCATES': 'blue',
+    'HIGH-VISIBILITY NEUTRALS': 'red',
+    'LIMITED REACH NEUTRALS': 'gray'
+}
+# Above this many points the Plotly builder switches to WebGL and thins labels
+WEBGL_POINT_THRESHOLD = 5000
+DEFAULT_MAX_LABELS = 50
+
 
 def format_reach(x, pos=None):
     """Format large numbers with K/M/B suffixes for thousands/millions/billions."""
@@ -33,81 +55,198 @@ def format_reach(x, pos=None):
     return f"{s}{suffix}"
 
 
-def prepare_quadrant_df(df):
-    """Normalize and validate DataFrame for quadrant analysis. Returns (df, error_msg)."""
-    df = df.copy()
-    df.columns = [str(c).strip() for c in df.columns]
-    if 'Authors' not in df.columns and len(df.columns) > 0:
-        df = df.rename(columns={df.columns[0]: 'Authors'})
-    reach_col = None
-    for c in df.columns:
-        if 'reach' in str(c).lower():
-            reach_col = c
-            break
-    if reach_col is None:
+_REACH_SUFFIXES = {'K': 1e3, 'M': 1e6, 'B': 1e9, 'k': 1e3, 'm': 1e6, 'b': 1e9}
+_INT64_MAX = np.nextafter(float(np.iinfo(np.int64).max), 0)
+# Currency symbols, whitespace (incl. non-breaking) and comma thousands separators are dropped
+_REACH_NOISE = r'[$€£¥₹₩₽¢,\s]'
+# "1.234.567": two or more dot-separated groups of three digits are thousands separators
+_DOT_THOUSANDS = r'^\d{1,3}(?:\.\d{3}){2,}$'
+
+
+def _parse_suffixed(text):
+    """Float value of plain numbers with an optional K/M/B suffix; NaN where unparseable."""
+    scale = text.str[-1:].map(_REACH_SUFFIXES)
+    has_suffix = scale.notna()
+    if has_suffix.any():
+        text = text.where(~has_suffix, text.str[:-1])
+    try:
+        # Fast path: every value is a plain number once separators/suffixes are gone
+        nums = text.to_numpy(dtype=object).astype(float)
+    except ValueError:
+        nums = pd.to_numeric(text, errors='coerce').to_numpy(dtype=float)
+    return nums * scale.fillna(1.0).to_numpy()
+
+
+def _parse_reach_strings(text):
+    """
+    Vectorized parse of reach strings ("1,234", "$1,234", "1 234", "1.234.567", "12.5", "€2.5k",
+    "1.2M") to float. Anything else falls back to its digits ("approx. 300" -> 300); NaN if it has none.
+    """
+    nums = _parse_suffixed(text.str.replace(',', '', regex=False).str.strip())
+    failed = np.isnan(nums)
+    if failed.any():
+        # Only the values the common format missed pay for the slower cleanup
+        rest = text[failed]
+        cleaned = rest.str.replace(_REACH_NOISE, '', regex=True)
+        cleaned = cleaned.where(~cleaned.str.match(_DOT_THOUSANDS), cleaned.str.replace('.', '', regex=False))
+        parsed = _parse_suffixed(cleaned)
+        missing = np.isnan(parsed)
+        if missing.any():
+            digits = rest[missing].str.replace(r'\D', '', regex=True)
+            parsed[missing] = pd.to_numeric(digits, errors='coerce').to_numpy(dtype=float)
+        nums[failed] = parsed
+    return nums
+
+
+def parse_reach(values):
+    """
+    Parse a Reach column into int64. Integer columns pass through (copy-on-write avoids a copy);
+    strings like "1,234", "$1,234", "1 234", "1.234.567", "12.5", "1.2M" or "3K" (the
+    format_reach output) are converted in vectorized form, once per distinct value; other
+    strings keep their digits. Halves round away from zero, values without digits become 0
+    and huge values are clipped to int64.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in 'iu':
+        return s.astype(np.int64)
+    if pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+        nums = s.astype(float).to_numpy()
+    else:
+        # Exports repeat the same reach strings a lot; parse each distinct value once
+        codes, uniques = pd.factorize(s)
+        parsed = _parse_reach_strings(pd.Series(uniques).astype(str))
+        nums = np.where(codes >= 0, parsed[codes] if parsed.size else 0.0, np.nan)
+    nums = np.nan_to_num(nums, nan=0.0)
+    out = np.clip(np.trunc(nums + np.copysign(0.5, nums)), -_INT64_MAX, _INT64_MAX)
+    return pd.Series(out.astype(np.int64), index=s.index, name=s.name)
+
+
+def to_float32(values):
+    """Column as float32; values that are not numbers become NaN."""
+    return pd.to_numeric(values, errors='coerce').astype('float32')
+
+
+def _find_column(columns, keyword, skip=None):
+    """Position of the first column whose name contains keyword (case-insensitive), or None."""
+    for i, c in enumerate(columns):
+        if i != skip and keyword in c.lower():
+            return i
+    return None
+
+
+def _quadrant_column_positions(columns):
+    """
+    Positions of the (author, reach, sentiment) columns, or (None, error_msg).
+    Author is the 'Authors' column (any case) if present, else the first column.
+    """
+    columns = [str(c).strip() for c in columns]
+    author_idx = author_column_position(columns)
+    reach_idx = _find_column(columns, 'reach', skip=author_idx)
+    if reach_idx is None:
         return None, 'Could not find a Reach column (need a column whose name contains "reach").'
-    sent_col = None
-    for c in df.columns:
-        if 'sentiment' in str(c).lower():
-            sent_col = c
-            break
-    if sent_col is None:
+    sent_idx = _find_column(columns, 'sentiment', skip=author_idx)
+    if sent_idx is None:
         return None, 'Could not find a Sentiment column (need a column whose name contains "sentiment").'
-    df['Reach'] = (
-        df[reach_col].astype(str)
-        .str.replace(r'[^0-9]', '', regex=True)
-        .replace('', '0')
-        .astype(int)
-    )
-    df['Sentiment Score'] = pd.to_numeric(df[sent_col], errors='coerce').fillna(0)
-    return df, None
+    return (author_idx, reach_idx, sent_idx), None
 
 
-def build_quadrant_figure(df):
-    """Build quadrant analysis figure (matplotlib). Returns a matplotlib Figure."""
+def quadrant_read_schema(sample):
+    """
+    Columns and compact dtypes to read for quadrant analysis, from a header/sample frame.
+    Returns (usecols, dtype): categorical authors and, when the sample is numeric, reach parsed
+    to int64 and sentiment coerced to float32 after the read (see helper.readers.Schema), so
+    later rows such as "1.2M" or "n/a" cannot fail it. String reach stays categorical.
+    """
+    positions, err = _quadrant_column_positions(sample.columns)
+    if err:
+        raise ValueError(err)
+    author, reach, sent = (sample.columns[i] for i in positions)
+    numeric_reach = pd.api.types.is_numeric_dtype(sample[reach].dtype)
+    dtype = {author: 'category', reach: parse_reach if numeric_reach else 'category'}
+    if pd.api.types.is_numeric_dtype(sample[sent].dtype):
+        dtype[sent] = to_float32
+    return [author, reach, sent], dtype
+
+
+def prepare_quadrant_df(df):
+    """
+    Normalize and validate DataFrame for quadrant analysis. Returns (df, error_msg).
+    Only the author, reach and sentiment columns are copied into the result
+    (as 'Authors', 'Reach' and 'Sentiment Score').
+    """
+    positions, err = _quadrant_column_positions(df.columns)
+    if err:
+        return None, err
+    author_idx, reach_idx, sent_idx = positions
+    out = pd.DataFrame({
+        'Authors': df.iloc[:, author_idx],
+        'Reach': parse_reach(df.iloc[:, reach_idx]),
+        'Sentiment Score': pd.to_numeric(df.iloc[:, sent_idx], errors='coerce').fillna(0),
+    })
+    return out, None
+
+
+def classify_quadrants(reach, sentiment, reach_split, sentiment_split):
+    """Return quadrant codes (indices into QUADRANT_LABELS) for reach/sentiment arrays."""
+    reach = np.asarray(reach)
+    sentiment = np.asarray(sentiment)
+    high_reach = reach >= reach_split
+    high_sent = sentiment >= sentiment_split
+    return np.select(
+        [high_reach & high_sent, ~high_reach & high_sent, high_reach & ~high_sent],
+        [0, 1, 2],
+        default=3,
+    ).astype(np.int8)
+
+
+def quadrant_frame(df, reach_split=DEFAULT_SPLIT, sentiment_split=DEFAULT_SPLIT):
+    """
+    Prepare df and add a categorical 'Quadrant' column split on reach/sentiment lines chosen by
+    reach_split/sentiment_split (see chart_creation.thresholds: 'mean', 'median', 'log-mean',
+    'pNN', a fixed number or a callable). Returns (df, reach_line, sentiment_line); raises
+    ValueError if columns are missing or a split spec is invalid.
+    """
     df, err = prepare_quadrant_df(df)
     if err:
         raise ValueError(err)
-    authors = df['Authors'].astype(str).tolist()
-    reach = df['Reach'].tolist()
-    sentiment = df['Sentiment Score'].tolist()
-    mean_reach = np.mean(reach)
-    mean_sentiment = np.mean(sentiment)
+    reach = df['Reach'].to_numpy()
+    sentiment = df['Sentiment Score'].to_numpy()
+    reach_line = split_value(reach, reach_split)
+    sentiment_line = split_value(sentiment, sentiment_split)
+    codes = classify_quadrants(reach, sentiment, reach_line, sentiment_line)
+    df['Quadrant'] = pd.Categorical.from_codes(codes, categories=QUADRANT_LABELS)
+    return df, reach_line, sentiment_line
+
+
+def build_quadrant_figure(df, reach_split=DEFAULT_SPLIT, sentiment_split=DEFAULT_SPLIT):
+    """Build quadrant analysis figure (matplotlib). Returns a matplotlib Figure."""
+    # matplotlib is imported here so the Plotly-only app never loads it
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import FuncFormatter
+
+    df, reach_line, sentiment_line = quadrant_frame(df, reach_split, sentiment_split)
+    authors = df['Authors'].astype(str).to_numpy()
+    reach = df['Reach'].to_numpy()
+    sentiment = df['Sentiment Score'].to_numpy()
+    codes = df['Quadrant'].cat.codes.to_numpy()
 
     fig = plt.figure(figsize=(16, 10))
     fig.patch.set_alpha(0)
     ax = plt.gca()
     ax.patch.set_alpha(0)
 
-    quadrant_labels = []
-    for r, s in zip(reach, sentiment):
-        if r >= mean_reach and s >= mean_sentiment:
-            quadrant_labels.append('KEY ALLIES')
-        elif r < mean_reach and s >= mean_sentiment:
-            quadrant_labels.append('POTENTIAL ADVOCATES')
-        elif r >= mean_reach and s < mean_sentiment:
-            quadrant_labels.append('HIGH-VISIBILITY NEUTRALS')
-        else:
-            quadrant_labels.append('LIMITED REACH NEUTRALS')
-
-    color_map = {
-        'KEY ALLIES': 'green',
-        'POTENTIAL ADVOCATES': 'blue',
-        'HIGH-VISIBILITY NEUTRALS': 'red',
-        'LIMITED REACH NEUTRALS': 'gray'
-    }
-    plt.axvline(mean_reach, linestyle='--', linewidth=1)
-    plt.axhline(mean_sentiment, linestyle='--', linewidth=1)
-    for label, color in color_map.items():
-        xs = [r for r, q in zip(reach, quadrant_labels) if q == label]
-        ys = [s for s, q in zip(sentiment, quadrant_labels) if q == label]
-        if xs:
-            plt.scatter(xs, ys, s=40, c=color, label=label, edgecolors='k', linewidths=0.3)
-    x_offset = (max(reach) - min(reach)) * 0.01 if reach else 0
-    y_range = (max(sentiment) - min(sentiment)) if sentiment else 1
+    plt.axvline(reach_line, linestyle='--', linewidth=1)
+    plt.axhline(sentiment_line, linestyle='--', linewidth=1)
+    for code, label in enumerate(QUADRANT_LABELS):
+        mask = codes == code
+        if mask.any():
+            plt.scatter(reach[mask], sentiment[mask], s=40, c=QUADRANT_COLORS[label], label=label,
+                        edgecolors='k', linewidths=0.3)
+    x_offset = (reach.max() - reach.min()) * 0.01 if reach.size else 0
+    y_range = (sentiment.max() - sentiment.min()) if sentiment.size else 1
     y_offset = y_range * 0.02 if y_range else 0.5
-    for i, name in enumerate(authors):
-        plt.text(reach[i] + x_offset, sentiment[i] + y_offset, name, fontsize=6)
+    for x, y, name in zip(reach + x_offset, sentiment + y_offset, authors):
+        plt.text(x, y, name, fontsize=6)
     plt.legend(title='Quadrants')
     ax.xaxis.set_major_formatter(FuncFormatter(format_reach))
     plt.xlabel("Reach")
@@ -116,56 +255,69 @@ def build_quadrant_figure(df):
     return fig
 
 
-def build_quadrant_figure_plotly(df):
-    """Build interactive quadrant figure (Plotly). Returns a plotly Figure."""
+def _label_mask(reach, sentiment, reach_line, sentiment_line, max_labels, label_by='reach'):
+    """
+    Boolean mask of the points that get a text label: the top max_labels by reach,
+    or by (standardized) distance from the split lines when label_by='distance'.
+    """
+    n = reach.size
+    if max_labels is None or n <= max_labels:
+        return np.ones(n, dtype=bool)
+    if label_by == 'distance':
+        r_std = reach.std() or 1.0
+        s_std = sentiment.std() or 1.0
+        score = np.hypot((reach - reach_line) / r_std, (sentiment - sentiment_line) / s_std)
+    elif label_by == 'reach':
+        score = reach.astype(float)
+    else:
+        raise ValueError(f"label_by must be 'reach' or 'distance', got {label_by!r}")
+    mask = np.zeros(n, dtype=bool)
+    if max_labels > 0:
+        mask[np.argpartition(-score, max_labels - 1)[:max_labels]] = True
+    return mask
+
+
+def build_quadrant_figure_plotly(df, webgl_threshold=WEBGL_POINT_THRESHOLD, max_labels=None, label_by='reach',
+                                 reach_split=DEFAULT_SPLIT, sentiment_split=DEFAULT_SPLIT):
+    """
+    Build interactive quadrant figure (Plotly). Returns a plotly Figure.
+    Above webgl_threshold points (None disables) uses Scattergl and labels only the top
+    max_labels authors (default DEFAULT_MAX_LABELS) by reach or distance from the split lines;
+    hover always shows the full author name. reach_split/sentiment_split as in quadrant_frame.
+    """
     if not PLOTLY_AVAILABLE:
         raise ImportError("plotly is required. Install with: pip install plotly")
-    df, err = prepare_quadrant_df(df)
-    if err:
-        raise ValueError(err)
-    authors = df['Authors'].astype(str).tolist()
-    reach = df['Reach'].tolist()
-    sentiment = df['Sentiment Score'].tolist()
-    mean_reach = np.mean(reach)
-    mean_sentiment = np.mean(sentiment)
-
-    quadrant_labels = []
-    for r, s in zip(reach, sentiment):
-        if r >= mean_reach and s >= mean_sentiment:
-            quadrant_labels.append('KEY ALLIES')
-        elif r < mean_reach and s >= mean_sentiment:
-            quadrant_labels.append('POTENTIAL ADVOCATES')
-        elif r >= mean_reach and s < mean_sentiment:
-            quadrant_labels.append('HIGH-VISIBILITY NEUTRALS')
-        else:
-            quadrant_labels.append('LIMITED REACH NEUTRALS')
-
-    color_map = {
-        'KEY ALLIES': 'green',
-        'POTENTIAL ADVOCATES': 'blue',
-        'HIGH-VISIBILITY NEUTRALS': 'red',
-        'LIMITED REACH NEUTRALS': 'gray'
-    }
+    df, reach_line, sentiment_line = quadrant_frame(df, reach_split, sentiment_split)
+    authors = df['Authors'].astype(str).to_numpy()
+    reach = df['Reach'].to_numpy()
+    sentiment = df['Sentiment Score'].to_numpy()
+    codes = df['Quadrant'].cat.codes.to_numpy()
+
+    large = webgl_threshold is not None and len(df) > webgl_threshold
+    if large and max_labels is None:
+        max_labels = DEFAULT_MAX_LABELS
+    labelled = _label_mask(reach, sentiment, reach_line, sentiment_line, max_labels, label_by)
+    text = np.where(labelled, authors, '')
+    scatter = go.Scattergl if large else go.Scatter
+    marker_size = 6 if large else 10
 
     fig = go.Figure()
-    for label, color in color_map.items():
-        mask = [q == label for q in quadrant_labels]
-        if not any(mask):
+    for code, label in enumerate(QUADRANT_LABELS):
+        mask = codes == code
+        if not mask.any():
             continue
-        r_list = [r for r, m in zip(reach, mask) if m]
-        s_list = [s for s, m in zip(sentiment, mask) if m]
-        names = [a for a, m in zip(authors, mask) if m]
-        fig.add_trace(go.Scatter(
-            x=r_list,
-            y=s_list,
+        fig.add_trace(scatter(
+            x=reach[mask],
+            y=sentiment[mask],
             mode='markers+text',
-            text=names,
+            text=text[mask],
+            customdata=authors[mask],
             textposition='top center',
             textfont=dict(size=9, color='black'),
             name=label,
-            marker=dict(size=10, color=color, line=dict(width=0.5, color='black')),
+            marker=dict(size=marker_size, color=QUADRANT_COLORS[label], line=dict(width=0.5, color='black')),
             hovertemplate=(
-                "<b>%{text}</b><br>"
+                "<b>%{customdata}</b><br>"
                 "Reach: %{x:,.0f}<br>"
                 "Sentiment: %{y:.2f}<br>"
                 "Quadrant: " + label + "<extra></extra>"
@@ -173,8 +325,8 @@ def build_quadrant_figure_plotly(df):
             hoverlabel=dict(font_size=12),
         ))
 
-    fig.add_vline(x=mean_reach, line_dash="dash", line_width=1, opacity=0.7)
-    fig.add_hline(y=mean_sentiment, line_dash="dash", line_width=1, opacity=0.7)
+    fig.add_vline(x=reach_line, line_dash="dash", line_width=1, opacity=0.7)
+    fig.add_hline(y=sentiment_line, line_dash="dash", line_width=1, opacity=0.7)
 
     fig.update_layout(
         xaxis_title="Reach",
@@ -193,15 +345,17 @@ def build_quadrant_figure_plotly(df):
 
 
 if __name__ == '__main__':
-    import sys
-    _src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    if _src not in sys.path:
-        sys.path.insert(0, _src)
     from helper import read_file
     csv_path = os.path.join(os.path.dirname(__file__), 'authors_quadrant.csv')
     if not os.path.isfile(csv_path):
         csv_path = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'quadrant_analysis_sample_files', 'quadrant_sample.csv')
     df = read_file(csv_path)
+    import matplotlib.pyplot as plt
+    from chart_creation.export import ExportPool
+    # The package's copy, so the pickled figure's tick formatter resolves in the export worker
+    from chart_creation.quadrant import build_quadrant_figure
     fig = build_quadrant_figure(df)
-    plt.savefig('authors_quadrant.png', dpi=300, transparent=True, bbox_inches='tight')
+    with ExportPool(workers=1) as pool:
+        with open('authors_quadrant.png', 'wb') as f:
+            f.write(pool.export(fig, 'png', dpi=300))
     plt.show()
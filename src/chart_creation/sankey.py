@@ -1,9 +1,17 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
-from collections import defaultdict
+if __package__ in (None, ''):
+    # Run as a script (python src/chart_creation/sankey.py): make src importable for the absolute imports
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_creation.authors import author_column_position
+from chart_creation.quadrant import to_float32
 
 AUTHOR_COL = "Authors"
 THEME_COLS = [
@@ -12,18 +20,14 @@ THEME_COLS = [
     "Sustainability & Social Impact",
     "Corporate Reputation & Leadership",
 ]
+OTHER_AUTHORS_LABEL = "Other authors"
 
 
 def _detect_theme_columns(df):
     """Return list of theme-like columns (Authors excluded). Prefer THEME_COLS if present."""
     df.columns = [str(c).strip() for c in df.columns]
-    author_col = None
-    for c in df.columns:
-        if str(c).strip().lower() == 'authors':
-            author_col = c
-            break
-    if author_col is None and len(df.columns) > 0:
-        author_col = df.columns[0]
+    author_idx = author_column_position(df.columns)
+    author_col = df.columns[author_idx] if author_idx is not None else None
     found = [c for c in THEME_COLS if c in df.columns]
     if found:
         return author_col, found
@@ -36,60 +40,171 @@ def _detect_theme_columns(df):
     return author_col, theme_cols if theme_cols else list(df.columns.drop(author_col))
 
 
-def build_sankey_figure(df):
+def _format_value_pct(values, pct):
+    """Vectorized "<value> (<pct>%)" strings for link and node labels."""
+    values = np.asarray(values)
+    if values.dtype.kind == 'f' and np.isfinite(values).all() and (values == np.round(values)).all():
+        values = values.astype(np.int64)
+    return np.char.add(
+        np.char.add(values.astype(str), " ("),
+        np.char.add(np.char.mod("%.1f", pct), "%)"),
+    )
+
+
+def _build_links(grouped, authors, themes):
     """
-    Build Sankey diagram from a DataFrame with Authors and theme contribution columns.
-    Returns a plotly Figure.
+    Build Sankey link arrays from the author x theme totals in one vectorized pass.
+    Authors are nodes 0..n-1 (in the given order), themes follow. Emits one link per
+    author/theme pair with a positive total. Returns a dict of NumPy arrays plus the total flow.
     """
-    df = df.copy()
-    df.columns = [str(c).strip() for c in df.columns]
-    author_col, theme_cols = _detect_theme_columns(df)
+    matrix = grouped.reindex(index=authors, columns=themes).fillna(0).to_numpy()
+    n_authors, n_themes = matrix.shape
+    sources = np.repeat(np.arange(n_authors), n_themes)
+    targets = np.tile(np.arange(n_themes), n_authors) + n_authors
+    values = matrix.ravel()
+    keep = values > 0
+    sources, targets, values = sources[keep], targets[keep], values[keep]
+
+    source_totals = np.bincount(sources, weights=values, minlength=n_authors)
+    total_flow = values.sum() if values.size else 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct_source = np.where(source_totals[sources] > 0, values / source_totals[sources] * 100, 0.0)
+    pct_total = values / total_flow * 100 if total_flow else np.zeros(values.shape)
+    return {
+        "source": sources,
+        "target": targets,
+        "value": values,
+        "percent_source": pct_source,
+        "percent_total": pct_total,
+        "label": _format_value_pct(values, pct_source),
+        "total": total_flow,
+    }
+
+
+def _node_labels(names, totals, overall_total):
+    """Node labels "<name>\n<total> (<pct>%)" for a block of nodes."""
+    totals = np.asarray(totals)
+    pct = totals / overall_total * 100 if overall_total else np.zeros(totals.shape)
+    names = np.asarray([str(n) for n in names], dtype=str)
+    return np.char.add(np.char.add(names, "\n"), _format_value_pct(totals, pct)).tolist()
+
+
+def sankey_read_schema(sample):
+    """
+    Columns and compact dtypes to read for the Sankey, from a header/sample frame
+    (same detection as build_sankey_figure). Returns (usecols, dtype): categorical
+    authors, and theme columns that are numeric in the sample coerced to float32 after
+    the read (non-numeric values later in the file become NaN rather than failing it).
+    """
+    stripped = sample.copy()
+    author_col, theme_cols = _detect_theme_columns(stripped)
     if not theme_cols:
         raise ValueError(
             "Need an 'Authors' column and at least one numeric theme column."
         )
-    if author_col not in df.columns:
-        df = df.rename(columns={df.columns[0]: author_col})
+    raw_names = dict(zip(stripped.columns, sample.columns))
+    usecols = [raw_names[author_col]] + [raw_names[c] for c in theme_cols]
+    dtype = {raw_names[author_col]: 'category'}
+    for c in theme_cols:
+        if pd.api.types.is_numeric_dtype(stripped[c].dtype):
+            dtype[raw_names[c]] = to_float32
+    return usecols, dtype
+
+
+def _other_label(names):
+    """OTHER_AUTHORS_LABEL, or a numbered variant of it when a real author already has that name."""
+    existing = set(names)
+    label, n = OTHER_AUTHORS_LABEL, 1
+    while label in existing:
+        n += 1
+        label = f"{OTHER_AUTHORS_LABEL} ({n})"
+    return label
+
+
+def _aggregate_by_author(df):
+    """
+    Normalize columns, coerce theme values to numbers and sum them per author.
+    Only the author and theme columns are copied. Returns (grouped, theme_cols)
+    where grouped is indexed by author.
+    """
+    header = df.iloc[:0].copy()
+    author_col, theme_cols = _detect_theme_columns(header)
+    if not theme_cols:
+        raise ValueError(
+            "Need an 'Authors' column and at least one numeric theme column."
+        )
+    positions = {name: i for i, name in enumerate(header.columns)}
+    data = {author_col: df.iloc[:, positions[author_col]]}
     for tc in theme_cols:
-        if tc in df.columns:
-            df[tc] = pd.to_numeric(df[tc], errors='coerce').fillna(0)
+        data[tc] = pd.to_numeric(df.iloc[:, positions[tc]], errors='coerce').fillna(0)
+    projected = pd.DataFrame(data)
+    return projected.groupby(author_col, observed=True)[theme_cols].sum(), theme_cols
+
+
+def _split_authors(author_sums, max_authors=None, min_share=None):
+    """
+    Order authors by total contribution (descending) and split them into (kept, tail).
+    max_authors caps the kept list; min_share (0-1) drops authors below that share of the total.
+    """
+    ordered = author_sums.sort_values(ascending=False)
+    keep = np.ones(len(ordered), dtype=bool)
+    if max_authors is not None:
+        keep[max(int(max_authors), 0):] = False
+    if min_share is not None:
+        total = ordered.sum()
+        if total:
+            keep &= (ordered / total >= min_share).to_numpy()
+    return ordered.index[keep].tolist(), ordered.index[~keep].tolist()
+
+
+def aggregate_sankey_df(df):
+    """
+    Author-level theme totals as a DataFrame (author column first). Passing it to
+    build_sankey_figure / sankey_tail_authors gives the same result as the raw rows.
+    """
+    grouped, _ = _aggregate_by_author(df)
+    return grouped.reset_index()
 
-    grouped = df.groupby(author_col)[theme_cols].sum()
+
+def sankey_tail_authors(df, max_authors=None, min_share=None):
+    """
+    Authors that build_sankey_figure folds into the "Other authors" node for the same
+    max_authors / min_share, largest first. Use with only_authors to drill into the tail page by page.
+    """
+    grouped, _ = _aggregate_by_author(df)
+    return _split_authors(grouped.sum(axis=1), max_authors, min_share)[1]
+
+
+def build_sankey_figure(df, max_authors=None, min_share=None, only_authors=None):
+    """
+    Build Sankey diagram from a DataFrame with Authors and theme contribution columns.
+    max_authors / min_share keep the top contributors and fold the rest into an
+    "Other authors" node; only_authors restricts the diagram to the given authors.
+    Returns a plotly Figure.
+    """
+    grouped, theme_cols = _aggregate_by_author(df)
+    if only_authors is not None:
+        grouped = grouped[grouped.index.isin(list(only_authors))]
+    authors, tail = _split_authors(grouped.sum(axis=1), max_authors, min_share)
+    if tail:
+        # A unique label keeps the folded row from sharing an index entry with a real author
+        other_label = _other_label(grouped.index)
+        other = grouped.loc[tail].sum().to_frame(other_label).T
+        grouped = pd.concat([grouped.loc[authors], other])
+        authors = authors + [other_label]
     author_sums = grouped.sum(axis=1)
-    authors = author_sums.sort_values(ascending=False).index.tolist()
     themes = theme_cols.copy()
     nodes = authors + themes
-    node_index = {name: i for i, name in enumerate(nodes)}
-
-    sources = []
-    targets = []
-    values = []
-    for _, row in df.iterrows():
-        author = row[author_col]
-        for theme in theme_cols:
-            count = row[theme]
-            if count > 0:
-                sources.append(node_index[author])
-                targets.append(node_index[theme])
-                values.append(count)
-
-    total_flow = sum(values) if values else 0
-    source_totals = defaultdict(int)
-    for s, v in zip(sources, values):
-        source_totals[s] += v
-    link_percent_source = []
-    link_percent_total = []
-    link_labels = []
-    for s, v in zip(sources, values):
-        p_src = (v / source_totals[s] * 100) if source_totals[s] else 0
-        p_tot = (v / total_flow * 100) if total_flow else 0
-        link_percent_source.append(p_src)
-        link_percent_total.append(p_tot)
-        link_labels.append(f"{v} ({p_src:.1f}%)")
+
+    links = _build_links(grouped, authors, themes)
+    total_flow = links["total"]
 
     theme_colors = ["#FF5733", "#33A1FF", "#8E44AD", "#27AE60"]
     author_color = "#4C72B0"
+    other_color = "#A0A0A0"
     node_colors = [author_color] * len(authors) + theme_colors[: len(themes)]
+    if tail:
+        node_colors[len(authors) - 1] = other_color
 
     fig = go.Figure(data=[go.Sankey(
         node=dict(
@@ -100,12 +215,12 @@ def build_sankey_figure(df):
             color=node_colors
         ),
         link=dict(
-            source=sources,
-            target=targets,
-            value=values,
-            label=link_labels,
+            source=links["source"],
+            target=links["target"],
+            value=links["value"],
+            label=links["label"],
             color="rgba(0, 0, 0, 0.3)",
-            customdata=[[ps, pt] for ps, pt in zip(link_percent_source, link_percent_total)],
+            customdata=np.column_stack([links["percent_source"], links["percent_total"]]),
             hovertemplate=(
                 "Value: %{value}<br>Percent of source: %{customdata[0]:.1f}%<br>"
                 "Percent of total: %{customdata[1]:.1f}%<extra></extra>"
@@ -120,33 +235,23 @@ def build_sankey_figure(df):
         font=dict(color="black", size=14)
     )
 
-    theme_totals = df[theme_cols].sum()
-    author_totals = author_sums.to_dict()
+    theme_totals = grouped[themes].sum()
     overall_total = total_flow if total_flow else theme_totals.sum()
-    node_labels = []
-    for author in authors:
-        val = author_totals.get(author, 0)
-        pct = (val / overall_total * 100) if overall_total else 0
-        node_labels.append(f"{author}\n{val} ({pct:.1f}%)")
-    for theme in themes:
-        val = int(theme_totals.get(theme, 0))
-        pct = (val / overall_total * 100) if overall_total else 0
-        node_labels.append(f"{theme}\n{val} ({pct:.1f}%)")
+    node_labels = _node_labels(authors, author_sums.loc[authors].to_numpy(), overall_total)
+    node_labels += _node_labels(themes, theme_totals.to_numpy().astype(int), overall_total)
     fig.data[0].node.label = node_labels
     return fig
 
 
 if __name__ == '__main__':
-    import os
-    import sys
-    _src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    if _src not in sys.path:
-        sys.path.insert(0, _src)
+    from chart_creation.export import ExportPool
     from helper import read_file
     path = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'sankey_diagram_sample_files', 'authors_themes.csv')
     if not os.path.isfile(path):
         path = path.replace('.csv', '.xlsx')
     df = read_file(path)
     fig = build_sankey_figure(df)
-    fig.write_image("sankey_diagram.png", width=1200, height=800)
+    with ExportPool(workers=1) as pool:
+        with open("sankey_diagram.png", "wb") as f:
+            f.write(pool.export(fig, "png", width=1200, height=800))
     print("Saved sankey_diagram.png")
@@ -0,0 +1,260 @@
+"""
+Persistent author-level aggregate store for rolling daily updates (SQLite, standard library only).
+Keeps per-author reach sums, sentiment sum/count and theme totals. Each delta file is aggregated
+on its own and upserted, so a refresh costs O(delta rows + touched authors) instead of re-reading
+the full history. A file whose content was already merged is skipped.
+quadrant_df() / sankey_df() return frames that prepare_quadrant_df / build_sankey_figure accept.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import pandas as pd
+
+from helper.cache import content_hash
+from helper.readers import iter_csv_chunks, read_file
+
+from .aggregate import DEFAULT_CHUNKSIZE, _fold, quadrant_from_partial, quadrant_partial, sankey_partial
+from .quadrant import quadrant_read_schema
+from .sankey import AUTHOR_COL, sankey_read_schema
+
+ANALYSIS_TYPES = ("quadrant", "sankey")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quadrant_authors (
+    author TEXT PRIMARY KEY,
+    reach INTEGER NOT NULL,
+    sentiment_sum REAL NOT NULL,
+    mentions INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sankey_totals (
+    author TEXT NOT NULL,
+    theme TEXT NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (author, theme)
+);
+CREATE TABLE IF NOT EXISTS sankey_themes (
+    theme TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    source_id TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    name TEXT,
+    rows INTEGER NOT NULL,
+    authors INTEGER NOT NULL,
+    merged_at REAL NOT NULL,
+    PRIMARY KEY (source_id, analysis)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_UPSERT_QUADRANT = """
+INSERT INTO quadrant_authors (author, reach, sentiment_sum, mentions) VALUES (?, ?, ?, ?)
+ON CONFLICT(author) DO UPDATE SET
+    reach = reach + excluded.reach,
+    sentiment_sum = sentiment_sum + excluded.sentiment_sum,
+    mentions = mentions + excluded.mentions
+"""
+
+_UPSERT_SANKEY = """
+INSERT INTO sankey_totals (author, theme, total) VALUES (?, ?, ?)
+ON CONFLICT(author, theme) DO UPDATE SET total = total + excluded.total
+"""
+
+
+def _analysis_key(analysis_type: Optional[str]) -> str:
+    key = (analysis_type or "").strip().lower()
+    if key not in ANALYSIS_TYPES + ("auto",):
+        raise ValueError(f"Unknown analysis type: {analysis_type!r} (expected 'quadrant', 'sankey' or 'auto')")
+    return key
+
+
+def _auto_analysis(sample: pd.DataFrame) -> str:
+    """'quadrant' when the frame has Reach and Sentiment columns, else 'sankey'."""
+    try:
+        quadrant_read_schema(sample.iloc[:0])
+        return "quadrant"
+    except ValueError:
+        return "sankey"
+
+
+def _auto_schema(sample: pd.DataFrame):
+    if _auto_analysis(sample) == "quadrant":
+        return quadrant_read_schema(sample)
+    return sankey_read_schema(sample)
+
+
+class AuthorStore:
+    """
+    Author-level aggregates persisted in one SQLite file. Safe to share between threads;
+    each merge is a single transaction, so an interrupted update leaves the store unchanged.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = str(path)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "AuthorStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def has_source(self, source_id: str, analysis_type: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM sources WHERE source_id = ? AND analysis = ?", (source_id, analysis_type)
+            ).fetchone()
+        return row is not None
+
+    def merge_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        analysis_type: str,
+        source_id: Optional[str] = None,
+        name: Optional[str] = None,
+    ) -> dict:
+        """
+        Aggregate article-level chunks per author and upsert them into the store.
+        analysis_type is 'quadrant', 'sankey' or 'auto' (decided on the first chunk). With a
+        source_id that was already merged for that analysis, nothing is written (skipped=True).
+        Returns {"analysis", "rows", "authors", "skipped", "seconds"}.
+        """
+        t0 = time.perf_counter()
+        analysis = _analysis_key(analysis_type)
+        acc, rows, author_col = None, 0, None
+        for chunk in chunks:
+            if analysis == "auto":
+                analysis = _auto_analysis(chunk)
+            if source_id is not None and rows == 0 and self.has_source(source_id, analysis):
+                return {"analysis": analysis, "rows": 0, "authors": 0, "skipped": True,
+                        "seconds": time.perf_counter() - t0}
+            if analysis == "quadrant":
+                part = quadrant_partial(chunk)
+            else:
+                part = sankey_partial(chunk)
+                author_col = part.index.name
+            acc = _fold(acc, part)
+            rows += len(chunk)
+        if analysis == "auto":
+            raise ValueError("Cannot detect the analysis type of an empty input.")
+        authors = 0 if acc is None else len(acc)
+        with self._lock, self._conn:
+            if source_id is not None and self.has_source(source_id, analysis):
+                return {"analysis": analysis, "rows": 0, "authors": 0, "skipped": True,
+                        "seconds": time.perf_counter() - t0}
+            if acc is not None and analysis == "quadrant":
+                self._conn.executemany(_UPSERT_QUADRANT, zip(
+                    acc.index.tolist(),
+                    acc['Reach'].astype('int64').tolist(),
+                    acc['sentiment_sum'].astype('float64').tolist(),
+                    acc['Mentions'].astype('int64').tolist(),
+                ))
+            elif acc is not None:
+                self._add_themes(list(acc.columns))
+                if author_col is not None:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO meta (key, value) VALUES ('sankey_author_col', ?)", (str(author_col),)
+                    )
+                long = acc.stack()
+                self._conn.executemany(_UPSERT_SANKEY, zip(
+                    long.index.get_level_values(0).tolist(),
+                    long.index.get_level_values(1).astype(str).tolist(),
+                    long.astype('float64').tolist(),
+                ))
+            if source_id is not None:
+                self._conn.execute(
+                    "INSERT INTO sources (source_id, analysis, name, rows, authors, merged_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (source_id, analysis, name, rows, authors, time.time()),
+                )
+        return {"analysis": analysis, "rows": rows, "authors": authors, "skipped": False,
+                "seconds": time.perf_counter() - t0}
+
+    def merge_frame(self, df: pd.DataFrame, analysis_type: str, source_id: Optional[str] = None,
+                    name: Optional[str] = None) -> dict:
+        """merge_chunks for a single in-memory frame."""
+        return self.merge_chunks([df], analysis_type, source_id=source_id, name=name)
+
+    def merge_file(self, path: Union[str, Path], analysis_type: str = "auto",
+                   chunksize: int = DEFAULT_CHUNKSIZE) -> dict:
+        """
+        Merge a delta file (.csv streamed in chunks, or .xlsx). The file's content hash is its
+        source id, so merging the same file twice counts it once.
+        """
+        path = Path(path)
+        analysis = _analysis_key(analysis_type)
+        data = path.read_bytes()
+        source_id = content_hash(data)
+        schema = {"quadrant": quadrant_read_schema, "sankey": sankey_read_schema}.get(analysis, _auto_schema)
+        if path.suffix.lower() == ".csv":
+            chunks = iter_csv_chunks(data, chunksize, schema=schema)
+        else:
+            chunks = [read_file(path, schema=schema)]
+        result = self.merge_chunks(chunks, analysis, source_id=source_id, name=path.name)
+        result["source"] = path.name
+        return result
+
+    def _add_themes(self, themes: list) -> None:
+        known = {t for (t,) in self._conn.execute("SELECT theme FROM sankey_themes")}
+        new = [str(t) for t in themes if str(t) not in known]
+        start = len(known)
+        self._conn.executemany(
+            "INSERT INTO sankey_themes (theme, position) VALUES (?, ?)",
+            [(t, start + i) for i, t in enumerate(new)],
+        )
+
+    def quadrant_df(self) -> pd.DataFrame:
+        """Authors, Reach (sum), Sentiment Score (mean) and Mentions over everything merged."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT author, reach, sentiment_sum, mentions FROM quadrant_authors ORDER BY rowid"
+            ).fetchall()
+        if not rows:
+            return quadrant_from_partial(None)
+        acc = pd.DataFrame(rows, columns=['Authors', 'Reach', 'sentiment_sum', 'Mentions']).set_index('Authors')
+        return quadrant_from_partial(acc)
+
+    def sankey_df(self) -> pd.DataFrame:
+        """Per-author theme totals (author column first, themes in first-seen order) over everything merged."""
+        with self._lock:
+            rows = self._conn.execute("SELECT author, theme, total FROM sankey_totals ORDER BY rowid").fetchall()
+            themes = [t for (t,) in self._conn.execute("SELECT theme FROM sankey_themes ORDER BY position")]
+            meta = self._conn.execute("SELECT value FROM meta WHERE key = 'sankey_author_col'").fetchone()
+        author_col = meta[0] if meta else AUTHOR_COL
+        if not rows:
+            return pd.DataFrame(columns=[author_col, *themes])
+        long = pd.DataFrame(rows, columns=['author', 'theme', 'total'])
+        wide = long.pivot(index='author', columns='theme', values='total')
+        wide = wide.reindex(index=pd.unique(long['author']), columns=themes).fillna(0.0)
+        wide.index.name = author_col
+        wide.columns.name = None
+        return wide.reset_index()
+
+    def frame(self, analysis_type: str) -> pd.DataFrame:
+        """quadrant_df() or sankey_df()."""
+        key = _analysis_key(analysis_type)
+        if key == "quadrant":
+            return self.quadrant_df()
+        if key == "sankey":
+            return self.sankey_df()
+        raise ValueError("Pass 'quadrant' or 'sankey'.")
+
+    def sources(self) -> pd.DataFrame:
+        """Merged files / frames, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source_id, analysis, name, rows, authors, merged_at FROM sources ORDER BY merged_at"
+            ).fetchall()
+        return pd.DataFrame(rows, columns=['source_id', 'analysis', 'name', 'rows', 'authors', 'merged_at'])
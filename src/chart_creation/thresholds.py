@@ -0,0 +1,195 @@
+"""
+Quadrant split lines: pluggable threshold strategies and a mergeable quantile sketch.
+A split spec is 'mean', 'median', 'log-mean' (mean on a log1p scale, so one mega-outlet does not
+drag the line), 'pNN' (NN-th percentile, e.g. 'p75'), a fixed number (or numeric string) or a
+callable(values) -> float. QuantileSketch (KLL-style compactors) gives the same lines in one pass
+over chunks with bounded memory; sketches of separate chunks or processes merge.
+"""
+import math
+import re
+from typing import Any, Callable, Optional, Union
+
+import numpy as np
+
+DEFAULT_SPLIT = "mean"
+# Items kept per sketch level; rank error stays around 1% at 200
+DEFAULT_SKETCH_K = 200
+
+SplitSpec = Union[str, float, int, Callable[[np.ndarray], float]]
+
+_PERCENTILE = re.compile(r"^p(\d+(?:\.\d+)?)$")
+
+
+def parse_split(spec: Optional[SplitSpec]) -> tuple[str, Any]:
+    """
+    Normalize a split spec to (kind, arg): ('mean', None), ('log-mean', None), ('quantile', q),
+    ('fixed', value) or ('callable', fn). Raises ValueError for unknown specs.
+    """
+    if spec is None:
+        spec = DEFAULT_SPLIT
+    if callable(spec):
+        return "callable", spec
+    if isinstance(spec, (int, float, np.integer, np.floating)) and not isinstance(spec, bool):
+        return "fixed", float(spec)
+    text = str(spec).strip().lower().replace("_", "-")
+    if text in ("mean", "log-mean"):
+        return text, None
+    if text == "median":
+        return "quantile", 0.5
+    match = _PERCENTILE.match(text)
+    if match and 0 <= float(match.group(1)) <= 100:
+        return "quantile", float(match.group(1)) / 100
+    try:
+        return "fixed", float(text)
+    except ValueError:
+        raise ValueError(
+            f"Unknown split {spec!r}; expected 'mean', 'median', 'log-mean', 'pNN' (e.g. 'p75') or a number"
+        ) from None
+
+
+def describe_split(spec: Optional[SplitSpec]) -> str:
+    """Short label for a split spec, e.g. 'mean', 'median', '75th percentile', 'fixed'."""
+    kind, arg = parse_split(spec)
+    if kind == "quantile":
+        return "median" if arg == 0.5 else f"{arg * 100:g}th percentile"
+    return {"log-mean": "log-scale mean", "callable": "custom"}.get(kind, kind)
+
+
+def split_value(values, spec: Optional[SplitSpec] = DEFAULT_SPLIT, axis: Optional[int] = None):
+    """
+    Split line for values under spec (NaN values are ignored). With axis, one line per slice
+    along the other axis (e.g. per period of a periods x authors array).
+    """
+    kind, arg = parse_split(spec)
+    values = np.asarray(values, dtype=float)
+    if kind == "fixed":
+        if axis is None:
+            return arg
+        return np.full(np.delete(values.shape, axis), arg)
+    if kind == "callable":
+        if axis is None:
+            return float(arg(values[~np.isnan(values)]))
+        rows = np.moveaxis(values, axis, -1)
+        return np.array([float(arg(row[~np.isnan(row)])) for row in rows.reshape(-1, rows.shape[-1])]).reshape(
+            rows.shape[:-1])
+    if kind == "mean":
+        return np.nanmean(values, axis=axis)
+    if kind == "log-mean":
+        if np.nanmin(values, initial=0.0) < 0:
+            raise ValueError("The log-mean split needs non-negative values (use it for reach).")
+        return np.expm1(np.nanmean(np.log1p(values), axis=axis))
+    return np.nanquantile(values, arg, axis=axis)
+
+
+class QuantileSketch:
+    """
+    Mergeable streaming summary of a numeric column (KLL-style): level h keeps at most about
+    k items of weight 2**h, so memory is O(k log(n / k)). Also tracks the exact count, sum,
+    log1p sum, min and max, so every split spec except callables can be answered from it.
+    """
+
+    def __init__(self, k: int = DEFAULT_SKETCH_K, seed: Optional[int] = None):
+        self.k = k
+        self.count = 0
+        self.total = 0.0
+        self.log_total = 0.0
+        self.negative = False
+        self.min = math.inf
+        self.max = -math.inf
+        self._levels: list = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size(self) -> int:
+        """Items currently retained (the memory footprint)."""
+        return sum(len(level) for level in self._levels)
+
+    def _capacity(self, level: int) -> int:
+        # Lower levels get geometrically smaller buffers (KLL's 2/3 decay)
+        depth = len(self._levels) - level - 1
+        return max(8, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = items[:0]
+                if len(items) % 2:
+                    keep, items = items[-1:], items[:-1]
+                # Every other item (random start) moves up one level with double weight
+                promoted = items[int(self._rng.integers(2))::2]
+                self._levels[level] = keep
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values) -> "QuantileSketch":
+        """Add a batch of values (NaN ignored)."""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return self
+        self.count += values.size
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        if values.min() < 0:
+            self.negative = True
+        else:
+            self.log_total += float(np.log1p(values).sum())
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold another sketch into this one (in place) and return self."""
+        self.count += other.count
+        self.total += other.total
+        self.log_total += other.log_total
+        self.negative = self.negative or other.negative
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> float:
+        """Approximate q-quantile (0 <= q <= 1); NaN when empty."""
+        if not self.count:
+            return math.nan
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self._levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        idx = int(np.searchsorted(cumulative, q * cumulative[-1]))
+        return float(items[order][min(idx, len(items) - 1)])
+
+    def split(self, spec: Optional[SplitSpec] = DEFAULT_SPLIT) -> float:
+        """Split line for spec from the sketch (callable specs need the raw data and raise ValueError)."""
+        kind, arg = parse_split(spec)
+        if kind == "fixed":
+            return arg
+        if kind == "callable":
+            raise ValueError("Callable splits need the raw values; use split_value instead of a sketch.")
+        if not self.count:
+            return math.nan
+        if kind == "mean":
+            return self.total / self.count
+        if kind == "log-mean":
+            if self.negative:
+                raise ValueError("The log-mean split needs non-negative values (use it for reach).")
+            return math.expm1(self.log_total / self.count)
+        return self.quantile(arg)
@@ -1,6 +1,55 @@
 """
-Helper utilities: file readers, etc.
+Helper utilities: file readers, caching, tracing, etc.
+Submodules are imported on first attribute access (PEP 562), so `from helper.tracing import span`
+does not pull in pandas through the readers and cache.
 """
-from .readers import read_csv, read_excel, read_file, read_uploaded_file
+import importlib
 
-__all__ = ["read_csv", "read_excel", "read_file", "read_uploaded_file"]
+_EXPORTS = {
+    "read_csv": ".readers",
+    "read_excel": ".readers",
+    "read_file": ".readers",
+    "read_uploaded_file": ".readers",
+    "sniff_encoding": ".readers",
+    "iter_csv_chunks": ".readers",
+    "LRUCache": ".cache",
+    "content_hash": ".cache",
+    "shared_cache": ".cache",
+    "Trace": ".tracing",
+    "start_trace": ".tracing",
+    "current_trace": ".tracing",
+    "span": ".tracing",
+    "traced": ".tracing",
+    "profiled": ".tracing",
+}
+
+__all__ = [
+    "read_csv",
+    "read_excel",
+    "read_file",
+    "read_uploaded_file",
+    "sniff_encoding",
+    "iter_csv_chunks",
+    "LRUCache",
+    "content_hash",
+    "shared_cache",
+    "Trace",
+    "start_trace",
+    "current_trace",
+    "span",
+    "traced",
+    "profiled",
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,133 @@
+"""
+Process-wide LRU cache with a byte budget, keyed by content hashes of uploads.
+Shared across Streamlit reruns and sessions (module state lives for the whole process).
+"""
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import pandas as pd
+
+# Default budget; override with TCA_CACHE_MAX_MB
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def content_hash(data: bytes, *parts: Any) -> str:
+    """Hash of raw bytes plus any extra key parts (analysis type, parameters, ...)."""
+    h = hashlib.blake2b(data, digest_size=16)
+    for part in parts:
+        h.update(b"\0")
+        h.update(repr(part).encode("utf-8"))
+    return h.hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate in-memory size of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by total (estimated) bytes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Hashable, tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        """Store value, evicting least recently used entries to stay within max_bytes.
+        Values larger than the whole budget are not stored."""
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes:
+                return
+            while self._items and self._bytes + size > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+            self._items[key] = (value, size)
+            self._bytes += size
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing and storing it with factory() on a miss."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                return default
+            self._bytes -= item[1]
+            return item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self._items),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_shared: Optional[LRUCache] = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> LRUCache:
+    """The process-wide cache instance (created on first use)."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            mb = os.environ.get("TCA_CACHE_MAX_MB", "").strip()
+            _shared = LRUCache(int(float(mb) * 1024 * 1024) if mb else DEFAULT_MAX_BYTES)
+        return _shared
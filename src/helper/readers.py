@@ -1,69 +1,311 @@
 """
 CSV and Excel file readers for uploaded data and local paths.
 """
+import codecs
+import importlib.util
 import io
 from pathlib import Path
-from typing import Union
+from typing import Callable, Iterator, Optional, Union
 
 import pandas as pd
 
+from .tracing import traced
+
+# Availability only; pandas imports the engine itself when a read asks for it
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+CALAMINE_AVAILABLE = importlib.util.find_spec("python_calamine") is not None
+
 # Encodings to try for CSV (in order)
 CSV_ENCODINGS = ["utf-8", "utf-8-sig", "cp1252", "latin1"]
+CSV_ENGINES = ["c", "pyarrow", "auto"]
+# Bytes inspected when sniffing the encoding
+SNIFF_BYTES = 64 * 1024
+EXCEL_ENGINES = ["pandas", "calamine", "stream", "auto"]
+# The streaming Excel reader stops after this many consecutive empty rows
+EXCEL_MAX_BLANK_RUN = 1000
+# Rows read to resolve columns and dtypes before a schema-projected read
+PEEK_ROWS = 200
+
+# Maps a small sample frame to (usecols, dtype) for the full read, e.g. chart_creation.quadrant_read_schema.
+# dtype values are read-time dtypes or callables that convert the column after the read, so a value
+# past the sample that does not fit ("1.2M" in a numeric column) is coerced instead of failing the read
+Schema = Callable[[pd.DataFrame], tuple[list, dict]]
 
 
-def read_csv(file_or_bytes: Union[bytes, io.BytesIO]) -> pd.DataFrame:
+def sniff_encoding(raw: bytes, sample_size: int = SNIFF_BYTES) -> str:
     """
-    Read a CSV from raw bytes or a file-like object.
-    Tries multiple encodings; falls back to default if none succeed.
+    Pick a CSV_ENCODINGS entry from a bounded prefix of raw: a UTF-8 BOM gives utf-8-sig,
+    otherwise the first encoding that decodes the prefix (a multi-byte character cut at the
+    end of the prefix is tolerated).
     """
-    if isinstance(file_or_bytes, bytes):
-        file_or_bytes = io.BytesIO(file_or_bytes)
-    df = None
-    raw = file_or_bytes.read()
-    file_or_bytes.seek(0)
+    if raw.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    sample = raw[:sample_size]
     for enc in CSV_ENCODINGS:
+        if enc == "utf-8-sig":
+            continue
+        try:
+            codecs.getincrementaldecoder(enc)().decode(sample, final=len(raw) <= sample_size)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return CSV_ENCODINGS[-1]
+
+
+def _resolve_engine(engine: str) -> str:
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Unknown CSV engine {engine!r}; expected one of {CSV_ENGINES}")
+    if engine == "auto":
+        return "pyarrow" if PYARROW_AVAILABLE else "c"
+    if engine == "pyarrow" and not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required for engine='pyarrow'. Install with: pip install pyarrow")
+    return engine
+
+
+def _validated_encoding(raw: bytes, encoding: str, sample_size: int = SNIFF_BYTES) -> str:
+    """
+    Confirm the sniffed encoding decodes the whole buffer (decoding is far cheaper than a parse);
+    otherwise fall back to cp1252, then latin1 (which always succeeds).
+    """
+    if len(raw) <= sample_size:
+        return encoding
+    candidates = [encoding] + [e for e in ("cp1252", "latin1") if e != encoding]
+    for enc in candidates[:-1]:
         try:
-            df = pd.read_csv(io.BytesIO(raw), encoding=enc)
-            break
-        except Exception:
+            codecs.decode(raw, enc)
+            return enc
+        except UnicodeDecodeError:
             continue
-    if df is None:
-        df = pd.read_csv(io.BytesIO(raw))
+    return candidates[-1]
+
+
+def read_csv(
+    file_or_bytes: Union[bytes, io.BytesIO],
+    engine: str = "c",
+    usecols: Optional[list] = None,
+    dtype: Optional[dict] = None,
+    nrows: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Read a CSV from raw bytes or a file-like object.
+    The encoding is sniffed from a bounded prefix and validated against the whole buffer
+    (falling back to cp1252, then latin1), so the file is parsed exactly once.
+    engine is "c", "pyarrow" or "auto" (pyarrow when installed). The chosen encoding and engine
+    are reported in df.attrs["encoding"] and df.attrs["engine"].
+    usecols / dtype / nrows are passed to pandas (nrows reads use the C engine and skip the
+    full-buffer encoding check).
+    """
+    if isinstance(file_or_bytes, (bytes, bytearray)):
+        raw = bytes(file_or_bytes)
+    else:
+        raw = file_or_bytes.read()
+        file_or_bytes.seek(0)
+    engine = _resolve_engine(engine) if nrows is None else "c"
+    encoding = sniff_encoding(raw)
+    if nrows is None:
+        encoding = _validated_encoding(raw, encoding)
+    df = pd.read_csv(
+        io.BytesIO(raw), encoding=encoding, engine=engine, usecols=usecols, dtype=dtype, nrows=nrows,
+    )
+    df.attrs["encoding"] = encoding
+    df.attrs["engine"] = engine
     return df
 
 
-def read_excel(file_or_path) -> pd.DataFrame:
+def _resolve_excel_engine(engine: str) -> str:
+    if engine not in EXCEL_ENGINES:
+        raise ValueError(f"Unknown Excel engine {engine!r}; expected one of {EXCEL_ENGINES}")
+    if engine == "auto":
+        return "calamine" if CALAMINE_AVAILABLE else "stream"
+    if engine == "calamine" and not CALAMINE_AVAILABLE:
+        raise ImportError("python-calamine is required for engine='calamine'. Install with: pip install python-calamine")
+    return engine
+
+
+def _excel_header(cells) -> list:
+    """Header names as pandas would give them ("Unnamed: <i>" for blanks, ".1" suffixes for duplicates)."""
+    names = list(cells)
+    while names and names[-1] is None:
+        names.pop()
+    header, seen = [], {}
+    for i, v in enumerate(names):
+        name = f"Unnamed: {i}" if v is None else v
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+
+def _read_excel_stream(file_or_path, sheet_name=None, usecols=None, nrows=None) -> pd.DataFrame:
+    """
+    Read a sheet with openpyxl's read-only, values-only iterator straight into column lists.
+    Empty rows are only kept when followed by data; reading stops after EXCEL_MAX_BLANK_RUN
+    consecutive empty rows (the padding some exporters leave below the data).
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file_or_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name is not None else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = _excel_header(next(rows, ()))
+        if usecols is None:
+            keep = list(range(len(header)))
+        else:
+            wanted = set(usecols)
+            keep = [i for i, name in enumerate(header) if name in wanted]
+        columns = [[] for _ in keep]
+        width = len(header)
+        n = 0
+        blank_run = 0
+        for row in rows:
+            if nrows is not None and n >= nrows:
+                break
+            if not any(v is not None for v in row[:width]):
+                blank_run += 1
+                if blank_run >= EXCEL_MAX_BLANK_RUN:
+                    break
+                continue
+            for _ in range(blank_run):
+                for col in columns:
+                    col.append(None)
+            n += blank_run + 1
+            blank_run = 0
+            for col, i in zip(columns, keep):
+                col.append(row[i] if i < len(row) else None)
+    finally:
+        wb.close()
+    return pd.DataFrame({header[i]: pd.Series(col) for i, col in zip(keep, columns)})
+
+
+def read_excel(
+    file_or_path,
+    usecols: Optional[list] = None,
+    dtype: Optional[dict] = None,
+    nrows: Optional[int] = None,
+    sheet_name: Optional[str] = None,
+    engine: str = "auto",
+) -> pd.DataFrame:
     """
     Read an Excel file (.xlsx). Accepts file-like object or path.
+    Reads the first sheet, or sheet_name. engine is "pandas" (plain pd.read_excel), "calamine"
+    (needs python-calamine), "stream" (openpyxl read-only rows into columns) or "auto"
+    (calamine when installed, else stream). The engine used is reported in df.attrs["engine"].
+    """
+    if hasattr(file_or_path, "seek"):
+        file_or_path.seek(0)
+    engine = _resolve_excel_engine(engine)
+    if engine == "stream":
+        df = _read_excel_stream(file_or_path, sheet_name=sheet_name, usecols=usecols, nrows=nrows)
+        if dtype:
+            df = df.astype({c: t for c, t in dtype.items() if c in df.columns})
+    else:
+        df = pd.read_excel(
+            file_or_path,
+            sheet_name=0 if sheet_name is None else sheet_name,
+            usecols=usecols,
+            dtype=dtype,
+            nrows=nrows,
+            engine="calamine" if engine == "calamine" else None,
+        )
+    df.attrs["engine"] = engine
+    return df
+
+
+def _split_dtype(dtype: Optional[dict]) -> tuple[Optional[dict], dict]:
+    """Schema dtype -> (dtypes applied by the reader, {column: converter} applied after the read)."""
+    if not dtype:
+        return dtype, {}
+    converters = {c: t for c, t in dtype.items() if callable(t) and not isinstance(t, type)}
+    return {c: t for c, t in dtype.items() if c not in converters} or None, converters
+
+
+def _convert(df: pd.DataFrame, converters: dict) -> pd.DataFrame:
+    for column, convert in converters.items():
+        if column in df.columns:
+            df[column] = convert(df[column])
+    return df
+
+
+def _read_projected(read: Callable[..., pd.DataFrame], schema: Optional[Schema]) -> pd.DataFrame:
+    """Read everything, or peek PEEK_ROWS rows, resolve (usecols, dtype) with schema and read only those."""
+    if schema is None:
+        return read()
+    usecols, dtype = schema(read(nrows=PEEK_ROWS))
+    dtype, converters = _split_dtype(dtype)
+    return _convert(read(usecols=usecols, dtype=dtype), converters)
+
+
+def iter_csv_chunks(
+    source: Union[str, Path, bytes, io.IOBase],
+    chunksize: int = 200_000,
+    schema: Optional[Schema] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV (path, bytes or binary file-like) in DataFrame chunks of chunksize rows,
+    so memory stays bounded regardless of file size. The encoding is sniffed from the first
+    SNIFF_BYTES; since the rest is never held in memory, undecodable bytes later in the file
+    are replaced rather than failing the read. With a schema, only its columns/dtypes are read.
     """
-    return pd.read_excel(file_or_path)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(bytes(source))
+    opened = None
+    if isinstance(source, (str, Path)):
+        opened = source = open(source, "rb")
+    try:
+        start = source.tell()
+        encoding = sniff_encoding(source.read(SNIFF_BYTES + 1))
+        source.seek(start)
+        options = dict(encoding=encoding, encoding_errors="replace")
+        if schema is not None:
+            usecols, dtype = schema(pd.read_csv(source, nrows=PEEK_ROWS, **options))
+            source.seek(start)
+            dtype, converters = _split_dtype(dtype)
+            options.update(usecols=usecols, dtype=dtype)
+        else:
+            converters = {}
+        with pd.read_csv(source, chunksize=chunksize, **options) as reader:
+            for chunk in reader:
+                yield _convert(chunk, converters)
+    finally:
+        if opened is not None:
+            opened.close()
 
 
-def read_file(path: Union[str, Path]) -> pd.DataFrame:
+def read_file(path: Union[str, Path], csv_engine: str = "c", schema: Optional[Schema] = None) -> pd.DataFrame:
     """
     Read a local file by path. Dispatches to read_csv or read_excel by extension.
+    With a schema, only the columns it selects are read, with its dtypes.
     """
     path = Path(path)
     if not path.is_file():
         raise FileNotFoundError(f"File not found: {path}")
     suffix = path.suffix.lower()
     if suffix == ".csv":
-        return read_csv(path.read_bytes())
+        raw = path.read_bytes()
+        return _read_projected(lambda **kw: read_csv(raw, engine=csv_engine, **kw), schema)
     if suffix in (".xlsx", ".xls"):
-        return read_excel(path)
+        engine = "auto" if suffix == ".xlsx" else "pandas"
+        return _read_projected(lambda **kw: read_excel(path, engine=engine, **kw), schema)
     raise ValueError(f"Unsupported file type: {suffix}")
 
 
-def read_uploaded_file(uploaded) -> pd.DataFrame:
+@traced("read_uploaded_file")
+def read_uploaded_file(uploaded, csv_engine: str = "c", schema: Optional[Schema] = None) -> pd.DataFrame:
     """
     Read an uploaded file (Streamlit UploadedFile or similar).
     Dispatches to read_csv or read_excel by filename extension.
+    With a schema, only the columns it selects are read, with its dtypes.
     """
     name = (uploaded.name or "").lower()
     if name.endswith(".csv"):
         raw = uploaded.read()
         uploaded.seek(0)
-        return read_csv(raw)
+        return _read_projected(lambda **kw: read_csv(raw, engine=csv_engine, **kw), schema)
     if name.endswith(".xlsx") or name.endswith(".xls"):
-        return read_excel(uploaded)
+        engine = "auto" if name.endswith(".xlsx") else "pandas"
+        return _read_projected(lambda **kw: read_excel(uploaded, engine=engine, **kw), schema)
     raise ValueError(f"Unsupported file type: {uploaded.name}")
@@ -0,0 +1,185 @@
+"""
+Lightweight stage timing: spans recorded into the current Trace (a context variable, so each
+Streamlit script run / asyncio task has its own). Spans are no-ops when no trace is active.
+Traces export as JSON lines or Chrome trace format (chrome://tracing, Perfetto).
+TCA_PROFILE=cprofile,tracemalloc adds a cProfile / tracemalloc report to a profiled() block.
+"""
+import contextvars
+import cProfile
+import functools
+import inspect
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+PROFILE_ENV = "TCA_PROFILE"
+# Rows kept in the cProfile / tracemalloc reports
+PROFILE_TOP = 30
+
+
+class Trace:
+    """Spans of one run: name, start offset and duration (seconds), thread, nesting depth and attributes."""
+
+    def __init__(self, name: str = "run"):
+        self.name = name
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: list[dict] = []
+        self.profile: Optional[str] = None
+        self.memory: Optional[str] = None
+
+    def add(self, name: str, start: float, end: float, depth: int, attrs: dict) -> None:
+        record = {
+            "name": name,
+            "start": start - self._t0,
+            "duration": end - start,
+            "thread": threading.get_ident(),
+            "depth": depth,
+            "attrs": attrs,
+        }
+        with self._lock:
+            self.spans.append(record)
+
+    def stage_totals(self) -> list[dict]:
+        """Total seconds and call count per span name, slowest first."""
+        totals = {}
+        for s in self.spans:
+            entry = totals.setdefault(s["name"], {"stage": s["name"], "calls": 0, "seconds": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += s["duration"]
+        return sorted(totals.values(), key=lambda e: e["seconds"], reverse=True)
+
+    def to_jsonl(self) -> str:
+        """One JSON object per span, tagged with the trace name and wall-clock start."""
+        lines = [
+            json.dumps({"trace": self.name, "trace_started_at": self.started_at, **s}, default=str)
+            for s in sorted(self.spans, key=lambda s: s["start"])
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def to_chrome_trace(self) -> str:
+        """Chrome trace event JSON (complete "X" events, microseconds)."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": s["name"],
+                "ph": "X",
+                "ts": round(s["start"] * 1e6, 1),
+                "dur": round(s["duration"] * 1e6, 1),
+                "pid": pid,
+                "tid": s["thread"],
+                "args": {k: str(v) for k, v in s["attrs"].items()},
+            }
+            for s in self.spans
+        ]
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace": self.name}})
+
+    def write_jsonl(self, path: str) -> None:
+        """Append the spans to a JSON lines file (e.g. one line per stage per app run)."""
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.to_jsonl())
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("tca_trace", default=None)
+_depth: contextvars.ContextVar[int] = contextvars.ContextVar("tca_trace_depth", default=0)
+
+
+def start_trace(name: str = "run") -> Trace:
+    """Make a new Trace current for this context (thread / task) and return it."""
+    trace = Trace(name)
+    _current.set(trace)
+    _depth.set(0)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any):
+    """Time the block into the current trace; does nothing if no trace is active."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    depth = _depth.get()
+    _depth.set(depth + 1)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        # set() rather than reset(token): generators may be closed from another context
+        _depth.set(depth)
+        trace.add(name, start, end, depth, attrs)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator: record each call of a function (sync or async) as a span."""
+    def decorate(fn):
+        label = name or fn.__qualname__
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(label):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def profiling_modes() -> set:
+    """Profilers requested through TCA_PROFILE (comma separated: cprofile, tracemalloc)."""
+    raw = os.environ.get(PROFILE_ENV, "")
+    return {m.strip().lower() for m in raw.split(",") if m.strip()}
+
+
+@contextmanager
+def profiled(trace: Optional[Trace] = None):
+    """
+    Run the block under the profilers named in TCA_PROFILE and attach their reports to trace
+    (trace.profile: top functions by cumulative time; trace.memory: peak and top allocation sites).
+    cProfile covers the calling thread only; tracemalloc is process-wide.
+    """
+    trace = trace or _current.get()
+    modes = profiling_modes()
+    profiler = cProfile.Profile() if "cprofile" in modes else None
+    trace_memory = "tracemalloc" in modes and not tracemalloc.is_tracing()
+    if trace_memory:
+        tracemalloc.start()
+    if profiler is not None:
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active (e.g. a concurrent profiled run)
+            profiler = None
+    try:
+        yield trace
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            if trace is not None:
+                trace.profile = out.getvalue()
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            lines = [f"Current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB", ""]
+            lines += [str(stat) for stat in snapshot.statistics("lineno")[:PROFILE_TOP]]
+            if trace is not None:
+                trace.memory = "\n".join(lines)
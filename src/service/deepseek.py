@@ -1,24 +1,261 @@
 """
 DeepSeek API client (OpenAI-compatible).
 Uses DEEPSEEK_API_KEY from environment or myenv; base URL: https://api.deepseek.com
+(or DEEPSEEK_BASE_URL, e.g. a local mock server from benchmarks/mock_deepseek.py).
+OpenAI clients (and their keep-alive connection pools) are shared per process, keyed by base
+URL, key and timeout. Calls retry 429/5xx/connection errors with jittered backoff and pass
+through a process-wide rate limiter (DEEPSEEK_MAX_CONCURRENCY, DEEPSEEK_RATE_PER_SEC).
+Async variants (achat / acomplete / astream_complete) use AsyncOpenAI with the same config
+and share the same limits. openai and myenv/.env are loaded on first use, not at import.
 """
+import asyncio
 import os
-from typing import Optional
+import random
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional, TypeVar
 
-try:
-    from dotenv import load_dotenv
+from helper.tracing import span, traced
+
+DEFAULT_BASE_URL = "https://api.deepseek.com"
+DEFAULT_MODEL = "deepseek-chat"
+# Used unless DEEPSEEK_TIMEOUT / DEEPSEEK_MAX_RETRIES are set
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_MAX_RETRIES = 4
+# Backoff: full jitter on base * 2**attempt, capped
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20.0
+# Poll interval while an async caller waits for a limiter slot
+ASYNC_SLOT_POLL = 0.01
+
+T = TypeVar("T")
+
+_env_loaded = False
+_openai_module = None
+
+
+def _load_env() -> None:
+    """Load myenv/.env once, on first use rather than at import (python-dotenv is optional)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
     load_dotenv("myenv/.env")
-except ImportError:
-    pass
 
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None  # type: ignore
 
+def _openai():
+    """The openai module, imported on first use (it is slow to import); None if not installed."""
+    global _openai_module
+    if _openai_module is None:
+        try:
+            import openai
+        except ImportError:
+            openai = False
+        _openai_module = openai
+    return _openai_module or None
+
+
+class RateLimiter:
+    """
+    Process-wide limit on DeepSeek calls: at most max_concurrent in flight and, if rate_per_sec
+    is set, a token bucket refilled at rate_per_sec with room for `burst` back-to-back calls.
+    """
+
+    def __init__(self, max_concurrent: int = 8, rate_per_sec: Optional[float] = None, burst: Optional[int] = None):
+        self.max_concurrent = max_concurrent
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst or max(1, max_concurrent)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _token_wait(self) -> float:
+        """Take a token if one is available (returns 0), else return seconds until the next one."""
+        if not self.rate_per_sec:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_sec)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate_per_sec
+
+    def _take_token(self) -> None:
+        while (wait := self._token_wait()) > 0:
+            time.sleep(wait)
+
+    def acquire(self) -> None:
+        self._slots.acquire()
+        try:
+            self._take_token()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self) -> None:
+        self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def aacquire(self) -> None:
+        """Async acquire without blocking the event loop (the limits are shared with sync callers)."""
+        while not self._slots.acquire(blocking=False):
+            await asyncio.sleep(ASYNC_SLOT_POLL)
+        try:
+            while (wait := self._token_wait()) > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    @asynccontextmanager
+    async def aslot(self):
+        await self.aacquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def _env_float(name: str) -> Optional[float]:
+    raw = os.environ.get(name, "").strip()
+    return float(raw) if raw else None
+
+
+_limiter: Optional[RateLimiter] = None
+_clients: dict[tuple, "OpenAI"] = {}
+# Async clients hold loop-bound connection pools, so they are cached per event loop
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def shared_limiter() -> RateLimiter:
+    """Process-wide limiter from DEEPSEEK_MAX_CONCURRENCY / DEEPSEEK_RATE_PER_SEC (created on first use)."""
+    global _limiter
+    with _clients_lock:
+        if _limiter is None:
+            _load_env()
+            _limiter = RateLimiter(
+                max_concurrent=int(os.environ.get("DEEPSEEK_MAX_CONCURRENCY", "8")),
+                rate_per_sec=_env_float("DEEPSEEK_RATE_PER_SEC"),
+            )
+        return _limiter
+
+
+def get_client(api_key: str, base_url: str = DEFAULT_BASE_URL, timeout: float = DEFAULT_TIMEOUT) -> "OpenAI":
+    """
+    Process-wide OpenAI client for (base_url, api_key, timeout). Reusing it keeps HTTP
+    connections alive across calls. SDK retries are off; _with_retries handles them.
+    """
+    openai = _openai()
+    if openai is None:
+        raise ImportError("Install the openai package: pip install openai")
+    key = (base_url, api_key, timeout)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = openai.OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+            _clients[key] = client
+        return client
+
+
+def get_async_client(api_key: str, base_url: str = DEFAULT_BASE_URL, timeout: float = DEFAULT_TIMEOUT) -> "AsyncOpenAI":
+    """AsyncOpenAI counterpart of get_client, shared within the running event loop."""
+    openai = _openai()
+    if openai is None:
+        raise ImportError("Install the openai package: pip install openai")
+    loop = asyncio.get_running_loop()
+    key = (base_url, api_key, timeout)
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+            clients[key] = client
+        return client
+
+
+async def aclose_async_clients() -> None:
+    """Close and forget the running loop's AsyncOpenAI clients (call before the loop ends)."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.pop(loop, {})
+    for client in clients.values():
+        await client.close()
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """
+    asyncio.run(coro), closing the AsyncOpenAI clients it opened before the loop is torn down.
+    Each client's connection pool refers back to its loop, so unclosed ones keep both alive.
+    """
+    async def main():
+        try:
+            return await coro
+        finally:
+            await aclose_async_clients()
+
+    return asyncio.run(main())
+
+
+def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying after error, or None if it is not retryable."""
+    openai = _openai()
+    if openai is None:
+        return None
+    if isinstance(error, openai.APIStatusError):
+        if not (error.status_code == 429 or error.status_code >= 500):
+            return None
+        retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    elif not isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return None
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
 
-DEFAULT_BASE_URL = "https://api.deepseek.com"
-DEFAULT_MODEL = "deepseek-chat"
+
+def _with_retries(call: Callable[[], T], max_retries: int = DEFAULT_MAX_RETRIES) -> T:
+    attempt = 0
+    while True:
+        try:
+            return call()
+        except Exception as e:
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt >= max_retries:
+                raise
+            attempt += 1
+            time.sleep(delay)
+
+
+async def _awith_retries(call: Callable[[], Awaitable[T]], max_retries: int = DEFAULT_MAX_RETRIES) -> T:
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            delay = _retry_delay(e, attempt)
+            if delay is None or attempt >= max_retries:
+                raise
+            attempt += 1
+            await asyncio.sleep(delay)
 
 
 class DeepSeekService:
@@ -29,27 +266,54 @@ class DeepSeekService:
         api_key: Optional[str] = None,
         base_url: Optional[str] = None,
         model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        limiter: Optional[RateLimiter] = None,
     ):
+        _load_env()
         self.api_key = api_key or os.environ.get("DEEPSEEK_API_KEY", "")
-        self.base_url = base_url or DEFAULT_BASE_URL
+        self.base_url = base_url or os.environ.get("DEEPSEEK_BASE_URL") or DEFAULT_BASE_URL
         self.model = model or DEFAULT_MODEL
-        self._client: Optional["OpenAI"] = None
+        self.timeout = timeout or _env_float("DEEPSEEK_TIMEOUT") or DEFAULT_TIMEOUT
+        if max_retries is None:
+            max_retries = int(os.environ.get("DEEPSEEK_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+        self.max_retries = max_retries
+        self.limiter = limiter or shared_limiter()
 
-    @property
-    def client(self) -> "OpenAI":
-        if OpenAI is None:
-            raise ImportError("Install the openai package: pip install openai")
+    def _require_key(self) -> None:
         if not self.api_key:
             raise ValueError(
                 "DeepSeek API key is required. Set DEEPSEEK_API_KEY or pass api_key=..."
             )
-        if self._client is None:
-            self._client = OpenAI(
-                api_key=self.api_key,
-                base_url=self.base_url,
-            )
-        return self._client
 
+    @property
+    def client(self) -> "OpenAI":
+        if _openai() is None:
+            raise ImportError("Install the openai package: pip install openai")
+        self._require_key()
+        return get_client(self.api_key, self.base_url, self.timeout)
+
+    @property
+    def async_client(self) -> "AsyncOpenAI":
+        """AsyncOpenAI client for the running event loop (call from inside a coroutine)."""
+        if _openai() is None:
+            raise ImportError("Install the openai package: pip install openai")
+        self._require_key()
+        return get_async_client(self.api_key, self.base_url, self.timeout)
+
+    def _create(self, messages: list[dict[str, str]], model: Optional[str], stream: bool, **kwargs):
+        client = self.client
+        return _with_retries(
+            lambda: client.chat.completions.create(
+                model=model or self.model,
+                messages=messages,
+                stream=stream,
+                **kwargs,
+            ),
+            self.max_retries,
+        )
+
+    @traced("DeepSeekService.chat")
     def chat(
         self,
         messages: list[dict[str, str]],
@@ -69,26 +333,100 @@ class DeepSeekService:
 
         Returns:
             Completion response (or stream iterator if stream=True).
+            Streams hold a rate-limiter slot only while the request is opened;
+            use stream_complete() to hold it until the stream is consumed.
         """
-        return self.client.chat.completions.create(
-            model=model or self.model,
-            messages=messages,
-            stream=stream,
-            **kwargs,
-        )
+        with self.limiter.slot():
+            return self._create(messages, model, stream, **kwargs)
+
+    @staticmethod
+    def _messages(user_content: str, system_content: Optional[str] = None) -> list[dict[str, str]]:
+        messages = []
+        if system_content:
+            messages.append({"role": "system", "content": system_content})
+        messages.append({"role": "user", "content": user_content})
+        return messages
 
     def complete(self, user_content: str, system_content: Optional[str] = None, **kwargs) -> str:
         """
         Simple completion: one user message, optional system message.
         Returns the assistant reply text.
         """
-        messages = []
-        if system_content:
-            messages.append({"role": "system", "content": system_content})
-        messages.append({"role": "user", "content": user_content})
-        resp = self.chat(messages, **kwargs)
+        resp = self.chat(self._messages(user_content, system_content), **kwargs)
         return (resp.choices[0].message.content or "").strip()
 
+    def stream_complete(
+        self, user_content: str, system_content: Optional[str] = None, **kwargs
+    ) -> Iterator[str]:
+        """
+        Streaming variant of complete(): yields text deltas as they arrive.
+        Closing the generator early (e.g. on a Streamlit rerun) closes the HTTP stream.
+        """
+        model = kwargs.pop("model", None)
+        with span("DeepSeekService.stream_complete"), self.limiter.slot():
+            stream = self._create(self._messages(user_content, system_content), model, True, **kwargs)
+            try:
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+
+    async def _acreate(self, messages: list[dict[str, str]], model: Optional[str], stream: bool, **kwargs):
+        client = self.async_client
+        return await _awith_retries(
+            lambda: client.chat.completions.create(
+                model=model or self.model,
+                messages=messages,
+                stream=stream,
+                **kwargs,
+            ),
+            self.max_retries,
+        )
+
+    @traced("DeepSeekService.achat")
+    async def achat(
+        self,
+        messages: list[dict[str, str]],
+        *,
+        model: Optional[str] = None,
+        stream: bool = False,
+        **kwargs,
+    ):
+        """Async chat(): same arguments and return value, awaited on the AsyncOpenAI client."""
+        async with self.limiter.aslot():
+            return await self._acreate(messages, model, stream, **kwargs)
+
+    async def acomplete(self, user_content: str, system_content: Optional[str] = None, **kwargs) -> str:
+        """Async complete(): returns the assistant reply text."""
+        resp = await self.achat(self._messages(user_content, system_content), **kwargs)
+        return (resp.choices[0].message.content or "").strip()
+
+    async def astream_complete(
+        self, user_content: str, system_content: Optional[str] = None, **kwargs
+    ) -> AsyncIterator[str]:
+        """Async stream_complete(): async generator of text deltas; aclose() closes the HTTP stream."""
+        model = kwargs.pop("model", None)
+        with span("DeepSeekService.astream_complete"):
+            async with self.limiter.aslot():
+                stream = await self._acreate(self._messages(user_content, system_content), model, True, **kwargs)
+                try:
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            yield delta
+                finally:
+                    close = getattr(stream, "close", None)
+                    if close is not None:
+                        await close()
+
 
 def chat_completion(
     messages: list[dict[str, str]],
@@ -0,0 +1,98 @@
+"""
+Rolling update: merge daily delta files into an author aggregate store, then render the
+quadrant / Sankey charts from the accumulated store (cost scales with the delta, not the history).
+Usage: python main.py update store.sqlite "data/daily/*.csv" --out reports [--formats html png]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Optional
+
+# Ensure src is on path when run as python src/update.py
+_src_dir = os.path.dirname(os.path.abspath(__file__))
+if _src_dir not in sys.path:
+    sys.path.insert(0, _src_dir)
+
+from batch import ANALYSIS_TYPES, EXPORT_TIMEOUT, FORMATS, _split_arg, collect_inputs  # noqa: E402
+from chart_creation import AuthorStore, build_quadrant_figure_plotly, build_sankey_figure  # noqa: E402
+from chart_creation.thresholds import DEFAULT_SPLIT  # noqa: E402
+
+
+def render_from_store(store: AuthorStore, analysis: str, out_dir: str, formats: tuple,
+                      max_authors: Optional[int], splits: tuple = (DEFAULT_SPLIT, DEFAULT_SPLIT)) -> list[str]:
+    """
+    Write <out_dir>/store_<analysis>.<fmt> from the store's author-level frame; returns the paths.
+    splits is the quadrant (reach_split, sentiment_split) pair.
+    """
+    df = store.frame(analysis)
+    if df.empty:
+        return []
+    if analysis == "quadrant":
+        fig = build_quadrant_figure_plotly(df, reach_split=splits[0], sentiment_split=splits[1])
+    else:
+        fig = build_sankey_figure(df, max_authors=max_authors)
+    stem = os.path.join(out_dir, f"store_{analysis}")
+    outputs = []
+    if "html" in formats:
+        fig.write_html(f"{stem}.html", include_plotlyjs="cdn")
+        outputs.append(f"{stem}.html")
+    if "png" in formats:
+        from chart_creation import export_figure
+
+        with open(f"{stem}.png", "wb") as f:
+            f.write(export_figure(fig, "png", timeout=EXPORT_TIMEOUT))
+        outputs.append(f"{stem}.png")
+    return outputs
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="main.py update", description="Merge delta files into an aggregate store.")
+    parser.add_argument("store", help="SQLite store file (created if missing).")
+    parser.add_argument("inputs", nargs="*", help="Delta files, directories or glob patterns (.csv, .xlsx).")
+    parser.add_argument("--out", default="reports", help="Output directory (default: reports).")
+    parser.add_argument("--analysis", choices=("auto",) + ANALYSIS_TYPES, default="auto")
+    parser.add_argument("--formats", nargs="*", choices=FORMATS, default=["html"], help="Pass none to only merge.")
+    parser.add_argument("--max-authors", type=int, default=30, help="Sankey authors before folding into 'Other'.")
+    for axis in ("reach", "sentiment"):
+        parser.add_argument(f"--{axis}-split", type=_split_arg, default=DEFAULT_SPLIT,
+                            help=f"Quadrant {axis} split line (as in batch; default: mean).")
+    args = parser.parse_args(argv)
+
+    inputs = collect_inputs(args.inputs) if args.inputs else []
+    failed = 0
+    touched = set()
+    with AuthorStore(args.store) as store:
+        for path in inputs:
+            try:
+                result = store.merge_file(path, args.analysis)
+            except Exception as e:
+                failed += 1
+                print(f"{path.name}: failed ({e})", file=sys.stderr)
+                continue
+            if result["skipped"]:
+                print(f"{path.name}: already merged, skipped", file=sys.stderr)
+                continue
+            touched.add(result["analysis"])
+            print(
+                f"{path.name}: {result['analysis']}, {result['rows']} rows -> {result['authors']} authors "
+                f"in {result['seconds']:.2f}s",
+                file=sys.stderr,
+            )
+        # Without new inputs, re-render whatever the store holds
+        analyses = touched or ({args.analysis} if args.analysis != "auto" else set(ANALYSIS_TYPES))
+        if args.formats:
+            os.makedirs(args.out, exist_ok=True)
+            for analysis in sorted(analyses):
+                t0 = time.perf_counter()
+                outputs = render_from_store(
+                    store, analysis, args.out, tuple(args.formats), args.max_authors,
+                    (args.reach_split, args.sentiment_split),
+                )
+                if outputs:
+                    print(f"{analysis}: {', '.join(outputs)} in {time.perf_counter() - t0:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
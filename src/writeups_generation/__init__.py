@@ -1,6 +1,8 @@
 """
 Writeups generation: sample writeups from dataframe via DeepSeek API.
 """
-from .chat_completion import generate_writeups
+from .chat_completion import generate_writeups, generate_writeups_stream
+from .context import build_context, estimate_tokens
+from .response_cache import WriteupCache
 
-__all__ = ["generate_writeups"]
+__all__ = ["generate_writeups", "generate_writeups_stream", "WriteupCache", "build_context", "estimate_tokens"]
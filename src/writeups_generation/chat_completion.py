@@ -1,20 +1,38 @@
 """
 Chat completion module: generates sample writeups from the user's uploaded dataframe.
-Uses the DeepSeek service and prompts from prompts.json (sankey / quadrant).
+Uses the DeepSeek service and prompts from prompts.json (sankey / quadrant, plus the
+section / reduce prompts used by map-reduce mode).
 """
+import asyncio
 import json
 import os
-from typing import Optional
+import sqlite3
+from typing import Iterator, Optional
 
 import pandas as pd
 
-from service.deepseek import DeepSeekService
+from chart_creation.thresholds import DEFAULT_SPLIT
+from helper.tracing import traced
+from service.deepseek import DeepSeekService, run_async
+
+from .context import DEFAULT_TOKEN_BUDGET, build_context
+from .map_reduce import (
+    DEFAULT_CONCURRENCY,
+    DEFAULT_SECTION_ROWS,
+    asummarize_sections,
+    reduce_content,
+    split_sections,
+    summarize_sections,
+)
+from .response_cache import cache_key, default_cache
 
 _PROMPTS_PATH = os.path.join(os.path.dirname(__file__), "prompts.json")
 
 _DEFAULT_PROMPTS = {
     "sankey": "",
     "quadrant": "",
+    "section": "Summarize the key contributors and figures in this section of the data as a short bullet list.",
+    "reduce": "Combine the section summaries below into a single report.",
 }
 
 
@@ -25,10 +43,7 @@ def _load_prompts() -> dict:
     try:
         with open(_PROMPTS_PATH, "r", encoding="utf-8") as f:
             data = json.load(f)
-        return {
-            "sankey": data.get("sankey", ""),
-            "quadrant": data.get("quadrant", ""),
-        }
+        return {key: data.get(key, default) for key, default in _DEFAULT_PROMPTS.items()}
     except Exception:
         return _DEFAULT_PROMPTS.copy()
 
@@ -37,11 +52,12 @@ def _get_prompt_for_analysis(analysis_type: str) -> str:
     """Return the prompt text for the given analysis type ('sankey' or 'quadrant')."""
     prompts = _load_prompts()
     key = analysis_type.strip().lower() if analysis_type else "sankey"
-    if key not in prompts:
+    if key not in ("sankey", "quadrant"):
         key = "sankey"
     return prompts[key] or "Generate a professional analysis summary based on the provided data."
 
 
+@traced("_dataframe_context")
 def _dataframe_context(df: pd.DataFrame, max_sample_rows: int = 30) -> str:
     """Build a concise text summary of the dataframe for the model."""
     lines = [
@@ -54,6 +70,152 @@ def _dataframe_context(df: pd.DataFrame, max_sample_rows: int = 30) -> str:
     return "\n".join(lines)
 
 
+def _build_user_content(
+    df: pd.DataFrame,
+    analysis_type: Optional[str],
+    prompt: Optional[str],
+    max_sample_rows: int,
+    context_tokens: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    splits: tuple = (DEFAULT_SPLIT, DEFAULT_SPLIT),
+) -> str:
+    """
+    Data context followed by the instruction for the analysis type. The context is the compact
+    whole-dataset statistics (see context.build_context) unless context_tokens is None or the
+    data does not fit the analysis, in which case the first max_sample_rows rows are sent.
+    splits is the quadrant (reach_split, sentiment_split) pair.
+    """
+    instruction = prompt if prompt is not None else _get_prompt_for_analysis(analysis_type or "sankey")
+    if context_tokens is not None:
+        try:
+            context, _ = build_context(
+                df, analysis_type, token_budget=context_tokens, reach_split=splits[0], sentiment_split=splits[1],
+            )
+            return (
+                "Here are summary statistics computed over the whole dataset:\n\n"
+                f"{context}\n\n"
+                f"{instruction}"
+            )
+        except (ValueError, KeyError):
+            pass
+    context = _dataframe_context(df, max_sample_rows=max_sample_rows)
+    return (
+        "Here is the dataframe summary and sample data:\n\n"
+        f"{context}\n\n"
+        f"{instruction}"
+    )
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def _map_reduce_content(
+    df: pd.DataFrame,
+    analysis_type: Optional[str],
+    prompt: Optional[str],
+    complete,
+    acomplete,
+    concurrency: int,
+    section_rows: int,
+    splits: tuple = (DEFAULT_SPLIT, DEFAULT_SPLIT),
+) -> str:
+    """
+    Summarize every section of df concurrently and return the user content for the reduce call.
+    Sections fan out from one event loop (acomplete); inside an already running loop a thread
+    pool runs complete() instead.
+    """
+    prompts = _load_prompts()
+    overview, sections = split_sections(
+        df, analysis_type, rows=section_rows, reach_split=splits[0], sentiment_split=splits[1],
+    )
+    if _in_event_loop():
+        summaries = summarize_sections(sections, prompts["section"], complete, concurrency=concurrency)
+    else:
+        summaries = run_async(asummarize_sections(sections, prompts["section"], acomplete, concurrency=concurrency))
+    instruction = prompt if prompt is not None else _get_prompt_for_analysis(analysis_type or "sankey")
+    return reduce_content(overview, sections, summaries, f"{prompts['reduce']}\n\n{instruction}")
+
+
+def _cache_lookup(key: str, refresh: bool):
+    """Return (cache, cached_text); cache is None when the on-disk cache is unavailable."""
+    try:
+        cache = default_cache()
+        return cache, (None if refresh else cache.get(key))
+    except (sqlite3.Error, OSError):
+        return None, None
+
+
+def _cache_store(cache, key: str, text: str, model: str) -> None:
+    if cache is None or not text:
+        return
+    try:
+        cache.put(key, text, model=model)
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def _response_key(svc: DeepSeekService, user_content: str, kwargs: dict) -> tuple[str, str]:
+    model = kwargs.get("model") or svc.model
+    return cache_key(model, user_content, **{k: v for k, v in kwargs.items() if k != "model"}), model
+
+
+def _cached_complete(svc: DeepSeekService, user_content: str, use_cache: bool, refresh: bool, kwargs: dict) -> str:
+    """svc.complete() through the on-disk response cache."""
+    if not use_cache:
+        return svc.complete(user_content, **kwargs)
+    key, model = _response_key(svc, user_content, kwargs)
+    cache, cached = _cache_lookup(key, refresh)
+    if cached is not None:
+        return cached
+    text = svc.complete(user_content, **kwargs)
+    _cache_store(cache, key, text, model)
+    return text
+
+
+async def _acached_complete(
+    svc: DeepSeekService, user_content: str, use_cache: bool, refresh: bool, kwargs: dict,
+) -> str:
+    """Async _cached_complete (cache reads and writes are short local SQLite calls)."""
+    if not use_cache:
+        return await svc.acomplete(user_content, **kwargs)
+    key, model = _response_key(svc, user_content, kwargs)
+    cache, cached = _cache_lookup(key, refresh)
+    if cached is not None:
+        return cached
+    text = await svc.acomplete(user_content, **kwargs)
+    _cache_store(cache, key, text, model)
+    return text
+
+
+def _writeup_content(
+    svc: DeepSeekService,
+    df: pd.DataFrame,
+    analysis_type: Optional[str],
+    prompt: Optional[str],
+    max_sample_rows: int,
+    context_tokens: Optional[int],
+    map_reduce: bool,
+    concurrency: int,
+    section_rows: int,
+    splits: tuple,
+    use_cache: bool,
+    refresh: bool,
+    kwargs: dict,
+) -> str:
+    if not map_reduce:
+        return _build_user_content(df, analysis_type, prompt, max_sample_rows, context_tokens, splits)
+    return _map_reduce_content(
+        df, analysis_type, prompt,
+        lambda content: _cached_complete(svc, content, use_cache, refresh, kwargs),
+        lambda content: _acached_complete(svc, content, use_cache, refresh, kwargs),
+        concurrency, section_rows, splits,
+    )
+
+
 def generate_writeups(
     df: pd.DataFrame,
     *,
@@ -61,15 +223,71 @@ def generate_writeups(
     prompt: Optional[str] = None,
     api_key: Optional[str] = None,
     max_sample_rows: int = 30,
+    context_tokens: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    map_reduce: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    section_rows: int = DEFAULT_SECTION_ROWS,
+    reach_split=DEFAULT_SPLIT,
+    sentiment_split=DEFAULT_SPLIT,
+    use_cache: bool = True,
+    refresh: bool = False,
     **kwargs,
 ) -> str:
-    """Generate writeups from the dataframe. Uses the prompt for analysis_type from prompts.json unless prompt is provided."""
-    context = _dataframe_context(df, max_sample_rows=max_sample_rows)
-    instruction = prompt if prompt is not None else _get_prompt_for_analysis(analysis_type or "sankey")
-    user_content = (
-        "Here is the dataframe summary and sample data:\n\n"
-        f"{context}\n\n"
-        f"{instruction}"
+    """
+    Generate writeups from the dataframe. Uses the prompt for analysis_type from prompts.json unless prompt is provided.
+    By default the model sees compact statistics over the whole dataset within about context_tokens tokens
+    (context_tokens=None sends the first max_sample_rows rows instead). map_reduce=True summarizes sections of
+    section_rows authors (up to `concurrency` calls at once) and merges them in a final call.
+    Quadrant data is split on reach_split / sentiment_split, matching the chart (see chart_creation.thresholds).
+    Responses are cached on disk (see response_cache); refresh=True forces regeneration, use_cache=False skips the cache.
+    """
+    svc = DeepSeekService(api_key=api_key)
+    user_content = _writeup_content(
+        svc, df, analysis_type, prompt, max_sample_rows, context_tokens, map_reduce, concurrency, section_rows,
+        (reach_split, sentiment_split), use_cache, refresh, kwargs,
     )
+    return _cached_complete(svc, user_content, use_cache, refresh, kwargs)
+
+
+def generate_writeups_stream(
+    df: pd.DataFrame,
+    *,
+    analysis_type: Optional[str] = None,
+    prompt: Optional[str] = None,
+    api_key: Optional[str] = None,
+    max_sample_rows: int = 30,
+    context_tokens: Optional[int] = DEFAULT_TOKEN_BUDGET,
+    map_reduce: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    section_rows: int = DEFAULT_SECTION_ROWS,
+    reach_split=DEFAULT_SPLIT,
+    sentiment_split=DEFAULT_SPLIT,
+    use_cache: bool = True,
+    refresh: bool = False,
+    **kwargs,
+) -> Iterator[str]:
+    """
+    Streaming generate_writeups: yields text deltas as the model produces them.
+    A cached response is yielded in one piece. Only fully received responses are cached;
+    closing the generator early cancels the request. With map_reduce=True the section
+    summaries run first and only the final merge is streamed.
+    """
     svc = DeepSeekService(api_key=api_key)
-    return svc.complete(user_content, **kwargs)
+    user_content = _writeup_content(
+        svc, df, analysis_type, prompt, max_sample_rows, context_tokens, map_reduce, concurrency, section_rows,
+        (reach_split, sentiment_split), use_cache, refresh, kwargs,
+    )
+    if not use_cache:
+        yield from svc.stream_complete(user_content, **kwargs)
+        return
+
+    key, model = _response_key(svc, user_content, kwargs)
+    cache, cached = _cache_lookup(key, refresh)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    for delta in svc.stream_complete(user_content, **kwargs):
+        parts.append(delta)
+        yield delta
+    _cache_store(cache, key, "".join(parts).strip(), model)
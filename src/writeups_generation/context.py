@@ -0,0 +1,122 @@
+"""
+Compact statistical context for writeup prompts.
+Instead of raw sample rows, precompute the figures the prompts ask about over the whole
+dataset: quadrant counts, the chart's reach/sentiment split lines and top authors per quadrant,
+or theme totals, shares and top contributors per theme. Tables are emitted as CSV (or JSON)
+and the per-group listings are shortened until the context fits a token budget.
+"""
+import json
+from typing import Optional
+
+import pandas as pd
+
+from chart_creation import QUADRANT_LABELS, aggregate_sankey_df, quadrant_frame
+from chart_creation.thresholds import DEFAULT_SPLIT, describe_split
+from helper.tracing import traced
+
+DEFAULT_TOKEN_BUDGET = 1500
+# Authors listed per quadrant / theme before the budget trims them
+DEFAULT_TOP_N = 10
+CONTEXT_FORMATS = ("csv", "json")
+# Rough characters per token for English text and numbers (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _table(df: pd.DataFrame, fmt: str) -> str:
+    if fmt == "json":
+        split = df.to_dict(orient="split")
+        return json.dumps([split["columns"], *split["data"]], separators=(",", ":"), default=str)
+    return df.to_csv(index=False, lineterminator="\n").strip()
+
+
+def _quadrant_stats(df: pd.DataFrame, reach_split=DEFAULT_SPLIT, sentiment_split=DEFAULT_SPLIT):
+    frame, reach_line, sentiment_line = quadrant_frame(df, reach_split, sentiment_split)
+    frame['Sentiment Score'] = frame['Sentiment Score'].astype('float64').round(3)
+    frame = frame.sort_values('Reach', ascending=False)
+    counts = frame['Quadrant'].value_counts()
+    header = {
+        "authors": len(frame),
+        "split_method": f"{describe_split(reach_split)} reach, {describe_split(sentiment_split)} sentiment",
+        "split_reach": round(float(reach_line)),
+        "split_sentiment": round(float(sentiment_line), 3),
+        "total_reach": int(frame['Reach'].sum()),
+        "quadrant_counts": {label: int(counts.get(label, 0)) for label in QUADRANT_LABELS},
+    }
+    groups = {
+        label: frame.loc[frame['Quadrant'] == label, ['Authors', 'Reach', 'Sentiment Score']]
+        for label in QUADRANT_LABELS
+    }
+    return header, groups
+
+
+def _sankey_stats(df: pd.DataFrame):
+    totals = aggregate_sankey_df(df)
+    author_col = totals.columns[0]
+    themes = list(totals.columns[1:])
+    theme_totals = totals[themes].sum()
+    grand = float(theme_totals.sum()) or 1.0
+    header = {
+        "authors": len(totals),
+        "theme_totals": {t: round(float(v), 2) for t, v in theme_totals.items()},
+        "theme_shares": {t: round(float(v) / grand, 3) for t, v in theme_totals.items()},
+    }
+    groups = {}
+    for theme in themes:
+        col = totals[[author_col, theme]]
+        col = col[col[theme] > 0].sort_values(theme, ascending=False)
+        denom = float(theme_totals[theme]) or 1.0
+        groups[theme] = col.assign(share_of_theme=(col[theme] / denom).round(3)).round({theme: 2})
+    author_totals = totals[themes].sum(axis=1)
+    groups["All themes"] = (
+        totals[[author_col]]
+        .assign(total=author_totals.round(2), share=(author_totals / grand).round(3))
+        .sort_values('total', ascending=False)
+    )
+    return header, groups
+
+
+def _render(header: dict, groups: dict, top_n: int, fmt: str, group_name: str) -> str:
+    lines = ["Summary: " + json.dumps(header, separators=(",", ":"))]
+    for name, table in groups.items():
+        shown = table.head(top_n)
+        lines.append(f"Top {len(shown)} of {len(table)} authors, {group_name} {name}:")
+        lines.append(_table(shown, fmt))
+    return "\n".join(lines)
+
+
+@traced("build_context")
+def build_context(
+    df: pd.DataFrame,
+    analysis_type: Optional[str],
+    *,
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    top_n: int = DEFAULT_TOP_N,
+    fmt: str = "csv",
+    reach_split=DEFAULT_SPLIT,
+    sentiment_split=DEFAULT_SPLIT,
+) -> tuple[str, int]:
+    """
+    Compact context for analysis_type ('quadrant' or 'sankey') over all of df.
+    Returns (text, estimated_tokens); the top-authors listings shrink until the text fits
+    token_budget (the summary line is always kept). Quadrants are split as in the chart
+    (reach_split / sentiment_split). Raises ValueError if df does not fit the analysis.
+    """
+    if fmt not in CONTEXT_FORMATS:
+        raise ValueError(f"Unknown context format {fmt!r}; expected one of {CONTEXT_FORMATS}")
+    if (analysis_type or "sankey").strip().lower() == "quadrant":
+        header, groups = _quadrant_stats(df, reach_split, sentiment_split)
+        group_name = "quadrant"
+    else:
+        header, groups = _sankey_stats(df)
+        group_name = "theme"
+    n = top_n
+    text = _render(header, groups, n, fmt, group_name)
+    while n > 1 and estimate_tokens(text) > token_budget:
+        n = max(1, n * 2 // 3)
+        text = _render(header, groups, n, fmt, group_name)
+    return text, estimate_tokens(text)
@@ -0,0 +1,128 @@
+"""
+Map-reduce writeups for datasets too large for a single prompt.
+The author-level data is split into sections (per quadrant, or chunks of authors ranked by
+theme total), each section is summarized concurrently, and the summaries are merged in one
+final call. Wall-clock time scales with sections / concurrency rather than with sections.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+import pandas as pd
+
+from chart_creation import QUADRANT_LABELS, aggregate_sankey_df, quadrant_frame
+from chart_creation.thresholds import DEFAULT_SPLIT, describe_split
+
+DEFAULT_SECTION_ROWS = 150
+DEFAULT_CONCURRENCY = 4
+
+
+def _chunks(df: pd.DataFrame, rows: int):
+    for start in range(0, len(df), rows):
+        yield start, df.iloc[start:start + rows]
+
+
+def _quadrant_sections(
+    df: pd.DataFrame, rows: int, reach_split=DEFAULT_SPLIT, sentiment_split=DEFAULT_SPLIT,
+) -> tuple[str, list[tuple[str, str]]]:
+    frame, reach_line, sentiment_line = quadrant_frame(df, reach_split, sentiment_split)
+    frame = frame.sort_values('Reach', ascending=False)
+    counts = frame['Quadrant'].value_counts()
+    overview = [
+        f"Authors: {len(frame)}",
+        f"Quadrant split: {describe_split(reach_split)} reach {reach_line:,.0f}, "
+        f"{describe_split(sentiment_split)} sentiment {sentiment_line:.3f}",
+        "Authors per quadrant: " + ", ".join(f"{label} {int(counts.get(label, 0))}" for label in QUADRANT_LABELS),
+    ]
+    sections = []
+    for label in QUADRANT_LABELS:
+        part = frame.loc[frame['Quadrant'] == label, ['Authors', 'Reach', 'Sentiment Score']]
+        for start, chunk in _chunks(part, rows):
+            title = f"Quadrant {label}, authors {start + 1}-{start + len(chunk)} of {len(part)} by reach"
+            sections.append((title, chunk.to_csv(index=False, float_format='%.3f')))
+    return "\n".join(overview), sections
+
+
+def _sankey_sections(df: pd.DataFrame, rows: int) -> tuple[str, list[tuple[str, str]]]:
+    totals = aggregate_sankey_df(df)
+    author_col = totals.columns[0]
+    themes = totals.columns[1:]
+    totals = totals.assign(Total=totals[themes].sum(axis=1)).sort_values('Total', ascending=False)
+    theme_totals = totals[themes].sum()
+    grand = float(theme_totals.sum()) or 1.0
+    overview = [
+        f"Authors: {len(totals)}",
+        "Theme totals: " + ", ".join(f"{t} {v:,.0f} ({v / grand:.0%})" for t, v in theme_totals.items()),
+    ]
+    sections = []
+    for start, chunk in _chunks(totals[[author_col, *themes, 'Total']], rows):
+        title = f"Authors {start + 1}-{start + len(chunk)} of {len(totals)} by total contribution"
+        sections.append((title, chunk.to_csv(index=False, float_format='%g')))
+    return "\n".join(overview), sections
+
+
+def split_sections(
+    df: pd.DataFrame, analysis_type: Optional[str], rows: int = DEFAULT_SECTION_ROWS,
+    reach_split=DEFAULT_SPLIT, sentiment_split=DEFAULT_SPLIT,
+) -> tuple[str, list[tuple[str, str]]]:
+    """
+    Split df into (overview, [(title, csv_text), ...]) for the analysis type (quadrants split
+    as in the chart, by reach_split / sentiment_split). Data that does not fit the analysis is
+    chunked row by row.
+    """
+    key = (analysis_type or "sankey").strip().lower()
+    try:
+        if key == "quadrant":
+            return _quadrant_sections(df, rows, reach_split, sentiment_split)
+        return _sankey_sections(df, rows)
+    except (ValueError, KeyError):
+        overview = f"Shape: {df.shape[0]} rows, {df.shape[1]} columns"
+        return overview, [
+            (f"Rows {start + 1}-{start + len(chunk)} of {len(df)}", chunk.to_csv(index=False))
+            for start, chunk in _chunks(df, rows)
+        ]
+
+
+def _section_prompts(sections: list[tuple[str, str]], instruction: str) -> list[str]:
+    return [f"{title}\n\n{data}\n\n{instruction}" for title, data in sections]
+
+
+def summarize_sections(
+    sections: list[tuple[str, str]],
+    instruction: str,
+    complete: Callable[[str], str],
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> list[str]:
+    """Map step: run complete() on every section with at most `concurrency` calls in flight; keeps order."""
+    prompts = _section_prompts(sections, instruction)
+    if len(prompts) <= 1 or concurrency <= 1:
+        return [complete(p) for p in prompts]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(prompts)), thread_name_prefix="writeups-map") as pool:
+        # Each call runs in a copy of the caller's context so tracing spans land in the caller's trace
+        return list(pool.map(lambda p: contextvars.copy_context().run(complete, p), prompts))
+
+
+async def asummarize_sections(
+    sections: list[tuple[str, str]],
+    instruction: str,
+    acomplete: Callable[[str], Awaitable[str]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> list[str]:
+    """Async summarize_sections: all sections fan out from one event loop, `concurrency` at a time."""
+    gate = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(prompt: str) -> str:
+        async with gate:
+            return await acomplete(prompt)
+
+    return list(await asyncio.gather(*(run(p) for p in _section_prompts(sections, instruction))))
+
+
+def reduce_content(overview: str, sections: list[tuple[str, str]], summaries: list[str], instruction: str) -> str:
+    """User content for the reduce call: overall figures, the section summaries, then the report instruction."""
+    parts = ["Overall figures:", overview, ""]
+    for (title, _), summary in zip(sections, summaries):
+        parts += [f"## {title}", summary.strip(), ""]
+    parts.append(instruction)
+    return "\n".join(parts)
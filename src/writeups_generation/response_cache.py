@@ -0,0 +1,120 @@
+"""
+Persistent on-disk cache for writeup responses (SQLite).
+Entries are keyed by a hash of the model, prompt text (including the data context) and
+request kwargs, expire after a TTL, and the oldest-accessed entries are evicted past a size budget.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "top-contributors", "writeups.sqlite")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS writeups (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+)
+"""
+
+
+def cache_key(model: str, user_content: str, system_content: Optional[str] = None, **kwargs: Any) -> str:
+    """Stable hash of everything that determines a completion."""
+    payload = json.dumps(
+        {"model": model, "user": user_content, "system": system_content, "kwargs": kwargs},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class WriteupCache:
+    """SQLite-backed response cache with TTL and size-based eviction."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.path = path or os.environ.get("TCA_WRITEUPS_CACHE") or DEFAULT_CACHE_PATH
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection (safe across Streamlit threads); commits on success."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT response, created FROM writeups WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM writeups WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE writeups SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key: str, response: str, model: Optional[str] = None) -> None:
+        """Store a response, then drop expired entries and evict least recently used ones over max_bytes."""
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO writeups (key, model, response, created, accessed, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, now, now, size),
+            )
+            if self.ttl_seconds is not None:
+                conn.execute("DELETE FROM writeups WHERE created < ?", (now - self.ttl_seconds,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM writeups").fetchone()[0]
+            if total > self.max_bytes:
+                rows = conn.execute("SELECT key, size FROM writeups ORDER BY accessed ASC").fetchall()
+                evict = []
+                for k, s in rows:
+                    if total <= self.max_bytes:
+                        break
+                    evict.append((k,))
+                    total -= s
+                conn.executemany("DELETE FROM writeups WHERE key = ?", evict)
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM writeups")
+
+
+_default: Optional[WriteupCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> WriteupCache:
+    """Process-wide cache at TCA_WRITEUPS_CACHE (or ~/.cache/top-contributors/writeups.sqlite)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = WriteupCache()
+        return _default
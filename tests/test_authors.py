@@ -0,0 +1,74 @@
+"""
+Author name variants: initial-block ambiguity regardless of input order, and mapping scope.
+"""
+import itertools
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation.authors import AuthorResolver  # noqa: E402
+
+
+def _resolve(names):
+    return dict(zip(names, AuthorResolver(":memory:").resolve(pd.Series(names))))
+
+
+@pytest.mark.parametrize("order", list(itertools.permutations(["J. Smith", "John Smith", "Jane Smith"])))
+@pytest.mark.parametrize("repeat", [1, 5])
+def test_ambiguous_initial_stays_separate_in_one_batch(order, repeat):
+    # The first name in the order is also the most frequent one
+    names = [order[0]] * repeat + list(order[1:])
+    mapping = _resolve(names)
+    assert mapping == {"J. Smith": "J. Smith", "John Smith": "John Smith", "Jane Smith": "Jane Smith"}
+
+
+def test_ambiguous_initial_against_stored_names():
+    resolver = AuthorResolver(":memory:")
+    resolver.resolve(pd.Series(["John Smith"]))
+    resolver.resolve(pd.Series(["Jane Smith"]))
+    assert resolver.resolve(pd.Series(["J. Smith"])).tolist() == ["J. Smith"]
+
+
+def test_unambiguous_variants_merge():
+    mapping = _resolve(["J. Smith", "J. Smith", "John Smith", "SMITH, John", "John  Smith "])
+    assert set(mapping.values()) == {"John Smith"}
+
+
+def test_canonicalize_authors_is_scoped_per_dataset(monkeypatch):
+    from chart_creation.authors import canonicalize_authors
+
+    monkeypatch.delenv("TCA_AUTHOR_MAP", raising=False)
+    first, _ = canonicalize_authors(pd.DataFrame({"Authors": ["John Smith", "J. Smith"]}))
+    assert first["Authors"].tolist() == ["John Smith", "John Smith"]
+    # A later, unrelated file where J. Smith is Jane's initial is not bound by the first mapping
+    second, _ = canonicalize_authors(pd.DataFrame({"Authors": ["J. Smith", "Jane Smith"]}))
+    assert second["Authors"].tolist() == ["Jane Smith", "Jane Smith"]
+
+
+def test_persistent_map_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv("TCA_AUTHOR_MAP", raising=False)
+    assert AuthorResolver().path == ":memory:"
+    path = str(tmp_path / "map.sqlite")
+    AuthorResolver(path).resolve(pd.Series(["John Smith", "J. Smith"]))
+    assert AuthorResolver(path).mapping == {"John Smith": "John Smith", "J. Smith": "John Smith"}
+
+
+@pytest.mark.parametrize("header", ["Authors", "authors", " AUTHORS "])
+def test_canonicalized_column_is_the_one_the_charts_group_by(header):
+    from chart_creation.authors import canonicalize_authors
+    from chart_creation.quadrant import prepare_quadrant_df
+    from chart_creation.sankey import aggregate_sankey_df
+
+    df = pd.DataFrame({"Outlet": ["x", "y", "z"], header: ["John Smith", "SMITH, John", "Ann Lee"],
+                       "Reach": [1, 2, 3], "Sentiment": [0.1, 0.2, 0.3]})
+    canonical, _ = canonicalize_authors(df, resolver=AuthorResolver(":memory:"))
+    prepared, err = prepare_quadrant_df(canonical)
+    assert err is None
+    assert prepared["Authors"].tolist() == ["John Smith", "John Smith", "Ann Lee"]
+    assert sorted(aggregate_sankey_df(canonical.drop(columns="Outlet")).iloc[:, 0]) == ["Ann Lee", "John Smith"]
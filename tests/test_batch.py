@@ -0,0 +1,40 @@
+"""
+Batch output naming: inputs that share a stem must not overwrite each other's reports.
+"""
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from batch import output_names, run_batch  # noqa: E402
+
+
+def test_output_names_unique():
+    inputs = [Path("a/q.csv"), Path("a/q.xlsx"), Path("b/q.csv"), Path("a/q_csv_2.csv"), Path("a/other.csv")]
+    names = output_names(inputs)
+    assert names["a/other.csv"] == "other"
+    assert names["a/q.csv"] == "q_csv" and names["a/q.xlsx"] == "q_xlsx"
+    assert names["b/q.csv"] == "q_csv_3"
+    assert names["a/q_csv_2.csv"] == "q_csv_2"
+    assert len(set(names.values())) == len(inputs)
+
+
+def test_run_batch_keeps_same_stem_outputs_apart(tmp_path):
+    df = pd.DataFrame({"Authors": ["A", "B", "C"], "Reach": [10, 200, 3000], "Sentiment": [0.1, -0.2, 0.5]})
+    (tmp_path / "b").mkdir()
+    df.to_csv(tmp_path / "q.csv", index=False)
+    df.to_excel(tmp_path / "q.xlsx", index=False)
+    df.assign(Reach=np.array([1, 2, 3])).to_csv(tmp_path / "b" / "q.csv", index=False)
+    inputs = [tmp_path / "q.csv", tmp_path / "q.xlsx", tmp_path / "b" / "q.csv"]
+    out = tmp_path / "out"
+    results = run_batch(inputs, str(out), writeups=False, workers=1, log=lambda msg: None)
+    assert not any(r.get("error") for r in results)
+    outputs = [o for r in results for o in r["outputs"]]
+    assert len(set(outputs)) == 3
+    assert sorted(os.listdir(out)) == ["q_csv_2_quadrant.html", "q_csv_quadrant.html", "q_xlsx_quadrant.html"]
@@ -0,0 +1,41 @@
+"""
+LRUCache: least recently used entries go first once the byte budget is exceeded.
+"""
+import os
+import sys
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from helper.cache import LRUCache  # noqa: E402
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=100)
+    cache.put("a", b"x" * 40)
+    cache.put("b", b"x" * 40)
+    assert cache.get("a") is not None  # "a" is now the most recently used
+    cache.put("c", b"x" * 40)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.stats()["bytes"] == 80
+    assert cache.evictions == 1
+
+
+def test_replacing_a_key_releases_its_bytes():
+    cache = LRUCache(max_bytes=100)
+    cache.put("a", b"x" * 60)
+    cache.put("a", b"x" * 30)
+    cache.put("b", b"x" * 60)
+    assert len(cache) == 2 and cache.stats()["bytes"] == 90 and cache.evictions == 0
+
+
+def test_oversized_values_are_not_stored():
+    cache = LRUCache(max_bytes=100)
+    cache.put("a", b"x" * 50)
+    cache.put("big", b"x" * 101)
+    assert "big" not in cache and "a" in cache
+    calls = []
+    assert cache.get_or_set("big", lambda: calls.append(1) or b"x" * 101) == b"x" * 101
+    assert cache.get_or_set("big", lambda: calls.append(1) or b"x" * 101) == b"x" * 101
+    assert len(calls) == 2
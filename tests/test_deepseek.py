@@ -0,0 +1,78 @@
+"""
+DeepSeek client limits: concurrency / token-bucket rate limiter and retries on 429 / 5xx.
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from service import deepseek  # noqa: E402
+from service.deepseek import RateLimiter  # noqa: E402
+
+
+def test_limiter_caps_concurrency():
+    limiter = RateLimiter(max_concurrent=2)
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def call():
+        with limiter.slot():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 2
+
+
+def test_limiter_rate_after_burst():
+    limiter = RateLimiter(max_concurrent=4, rate_per_sec=50, burst=2)
+    t0 = time.monotonic()
+    for _ in range(5):
+        with limiter.slot():
+            pass
+    # Two calls ride the burst, the other three wait about 1/50 s each
+    assert time.monotonic() - t0 >= 0.05
+
+
+def _status_error(status, retry_after="0"):
+    openai = pytest.importorskip("openai")
+    httpx = pytest.importorskip("httpx")
+    request = httpx.Request("POST", "http://mock/chat/completions")
+    response = httpx.Response(status, headers={"retry-after": retry_after}, request=request)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+def test_retries_transient_errors_then_succeeds():
+    errors = [_status_error(429), _status_error(503)]
+
+    def call():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert deepseek._with_retries(call, max_retries=3) == "ok"
+
+
+def test_does_not_retry_client_errors():
+    calls = []
+
+    def call():
+        calls.append(1)
+        raise _status_error(400)
+
+    with pytest.raises(Exception):
+        deepseek._with_retries(call, max_retries=3)
+    assert len(calls) == 1
@@ -0,0 +1,35 @@
+"""
+ExportPool: a job over its timeout recycles its worker, and the pool keeps serving.
+"""
+import os
+import sys
+
+import pytest
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation.export import ExportPool, ExportTimeout  # noqa: E402
+
+matplotlib = pytest.importorskip("matplotlib")
+matplotlib.use("Agg")
+
+
+def _figure():
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 8))
+    ax.plot(range(100_000))
+    return fig
+
+
+def test_timeout_recycles_worker():
+    fig = _figure()
+    with ExportPool(workers=1, warm=False) as pool:
+        with pytest.raises(ExportTimeout):
+            # Far too short for a 300 dpi render
+            pool.export(fig, "png", timeout=0.001)
+        assert pool.recycled == 1
+        data = pool.export(fig, "png", dpi=50, timeout=120)
+    assert data.startswith(b"\x89PNG")
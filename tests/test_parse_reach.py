@@ -0,0 +1,53 @@
+"""
+Reach parsing: export formats seen in the wild (run with python -m pytest tests).
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation.quadrant import format_reach, parse_reach  # noqa: E402
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1,234", 1234),
+    ("$1,234", 1234),
+    ("1 234", 1234),
+    ("1 234", 1234),
+    ("1.234.567", 1234567),
+    ("€2.5k", 2500),
+    ("1.2M", 1_200_000),
+    ("3K", 3000),
+    ("2.5 M", 2_500_000),
+    ("12.5", 13),
+    ("approx. 300", 300),
+    ("n/a", 0),
+    ("", 0),
+])
+def test_parse_reach_strings(text, expected):
+    assert parse_reach([text]).tolist() == [expected]
+
+
+def test_parse_reach_mixed_column_keeps_index():
+    s = pd.Series(["$1,234", None, "1.2M", "1,234"], index=[10, 11, 12, 13], name="Reach")
+    out = parse_reach(s)
+    assert out.dtype == np.int64
+    assert out.index.tolist() == [10, 11, 12, 13]
+    assert out.tolist() == [1234, 0, 1_200_000, 1234]
+
+
+def test_parse_reach_numeric_columns():
+    ints = pd.Series([1, 2, 3], dtype=np.int64)
+    assert parse_reach(ints).tolist() == [1, 2, 3]
+    assert parse_reach(pd.Series([1.5, 2.5, np.nan])).tolist() == [2, 3, 0]
+
+
+def test_parse_reach_round_trips_format_reach():
+    values = [999, 1500, 2_000_000, 3_100_000_000]
+    assert parse_reach([format_reach(v) for v in values]).tolist() == values
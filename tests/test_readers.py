@@ -0,0 +1,54 @@
+"""
+Schema-projected reads: values past the PEEK_ROWS sample that do not match its dtypes.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation import quadrant_read_schema, sankey_read_schema  # noqa: E402
+from helper.readers import PEEK_ROWS, iter_csv_chunks, read_file  # noqa: E402
+
+N = PEEK_ROWS + 100
+
+
+def _quadrant_csv(tmp_path):
+    df = pd.DataFrame({
+        'Authors': [f'A{i}' for i in range(N)],
+        'Reach': np.arange(N),
+        'Sentiment': np.linspace(-1, 1, N),
+    }).astype(object)
+    df.loc[PEEK_ROWS + 10:PEEK_ROWS + 13, 'Reach'] = ['1.2M', '12.5', '1,234', 'n/a x']
+    df.loc[PEEK_ROWS + 20:PEEK_ROWS + 21, 'Sentiment'] = ['positive', 'n/a x']
+    path = tmp_path / 'quadrant.csv'
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_quadrant_read_coerces_late_values(tmp_path):
+    df = read_file(_quadrant_csv(tmp_path), schema=quadrant_read_schema)
+    assert len(df) == N
+    assert df['Reach'].iloc[PEEK_ROWS + 10:PEEK_ROWS + 14].tolist() == [1_200_000, 13, 1234, 0]
+    assert df['Sentiment'].iloc[PEEK_ROWS + 20:PEEK_ROWS + 22].isna().all()
+
+
+def test_quadrant_chunks_coerce_late_values(tmp_path):
+    chunks = list(iter_csv_chunks(_quadrant_csv(tmp_path), 100, schema=quadrant_read_schema))
+    assert sum(len(c) for c in chunks) == N
+    assert all(c['Reach'].dtype == np.int64 for c in chunks)
+
+
+def test_sankey_read_coerces_late_values(tmp_path):
+    df = pd.DataFrame({'Authors': [f'A{i % 10}' for i in range(N)], 'T1': np.arange(N), 'T2': 1.0}).astype(object)
+    df.loc[PEEK_ROWS + 5, 'T1'] = 'n/a x'
+    df.loc[PEEK_ROWS + 6, 'T2'] = '12.5'
+    path = tmp_path / 'sankey.csv'
+    df.to_csv(path, index=False)
+    out = read_file(path, schema=sankey_read_schema)
+    assert out['T1'].dtype == np.float32 and np.isnan(out['T1'].iloc[PEEK_ROWS + 5])
+    assert out['T2'].iloc[PEEK_ROWS + 6] == 12.5
@@ -0,0 +1,27 @@
+"""
+Sankey tail folding: the synthetic "Other authors" node never collides with a real author.
+"""
+import os
+import sys
+
+import pandas as pd
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation.sankey import OTHER_AUTHORS_LABEL, build_sankey_figure  # noqa: E402
+
+
+def test_real_author_named_other_authors_is_not_merged_with_the_tail():
+    df = pd.DataFrame({
+        "Authors": ["A", OTHER_AUTHORS_LABEL, "C", "D"],
+        "T1": [100.0, 50.0, 2.0, 1.0],
+        "T2": [0.0, 10.0, 1.0, 1.0],
+    })
+    node = build_sankey_figure(df, max_authors=2).data[0].node
+    assert [label.split("\n")[0] for label in node.label[:3]] == ["A", OTHER_AUTHORS_LABEL, f"{OTHER_AUTHORS_LABEL} (2)"]
+    # Totals are not double-counted: the real author keeps 60, the folded tail holds C + D
+    assert [label.split("\n")[1].split(" ")[0] for label in node.label[:3]] == ["100", "60", "5"]
+    # Only the folded node is greyed out
+    assert list(node.color[:3]) == ["#4C72B0", "#4C72B0", "#A0A0A0"]
@@ -0,0 +1,49 @@
+"""
+AuthorStore: deltas are upserted per author, and a source merged twice counts once.
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation.store import AuthorStore  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    with AuthorStore(tmp_path / "store.sqlite") as s:
+        yield s
+
+
+def test_quadrant_deltas_upsert_per_author(store):
+    store.merge_frame(pd.DataFrame({"Authors": ["A", "B"], "Reach": [10, 20], "Sentiment": [1.0, 0.0]}), "quadrant")
+    store.merge_frame(pd.DataFrame({"Authors": ["A", "C"], "Reach": ["1K", 5], "Sentiment": [0.0, -1.0]}), "quadrant")
+    df = store.quadrant_df().set_index("Authors")
+    assert df.loc["A", "Reach"] == 1010 and df.loc["A", "Mentions"] == 2
+    assert df.loc["A", "Sentiment Score"] == pytest.approx(0.5)
+    assert sorted(df.index) == ["A", "B", "C"]
+
+
+def test_same_file_is_merged_once(store, tmp_path):
+    path = tmp_path / "day1.csv"
+    pd.DataFrame({"Authors": ["A", "A", "B"], "Reach": [1, 2, 3], "Sentiment": [0.1, 0.2, 0.3]}).to_csv(path, index=False)
+    first = store.merge_file(path)
+    second = store.merge_file(path)
+    assert first["analysis"] == "quadrant" and not first["skipped"] and first["authors"] == 2
+    assert second["skipped"]
+    assert store.quadrant_df().set_index("Authors")["Reach"].to_dict() == {"A": 3, "B": 3}
+    assert len(store.sources()) == 1
+
+
+def test_sankey_totals_accumulate_with_new_themes(store):
+    store.merge_frame(pd.DataFrame({"Authors": ["A", "B"], "T1": [1.0, 2.0]}), "sankey", source_id="d1")
+    store.merge_frame(pd.DataFrame({"Authors": ["A"], "T1": [3.0], "T2": [4.0]}), "sankey", source_id="d2")
+    assert store.merge_frame(pd.DataFrame({"Authors": ["A"], "T1": [9.0]}), "sankey", source_id="d1")["skipped"]
+    df = store.sankey_df().set_index("Authors")
+    assert list(df.columns) == ["T1", "T2"]
+    assert df.to_dict("index") == {"A": {"T1": 4.0, "T2": 4.0}, "B": {"T1": 2.0, "T2": 0.0}}
@@ -0,0 +1,65 @@
+"""
+Split specs and the mergeable QuantileSketch: merged shards stay close to exact quantiles.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _src not in sys.path:
+    sys.path.insert(0, _src)
+
+from chart_creation.thresholds import QuantileSketch, parse_split, split_value  # noqa: E402
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("mean", ("mean", None)),
+    ("median", ("quantile", 0.5)),
+    ("P75", ("quantile", 0.75)),
+    ("log_mean", ("log-mean", None)),
+    ("1000", ("fixed", 1000.0)),
+    (2.5, ("fixed", 2.5)),
+])
+def test_parse_split(spec, expected):
+    assert parse_split(spec) == expected
+
+
+def test_parse_split_rejects_unknown():
+    with pytest.raises(ValueError):
+        parse_split("p150")
+
+
+def _rank_error(sorted_values, value, q):
+    return abs(np.searchsorted(sorted_values, value) / len(sorted_values) - q)
+
+
+def test_merged_sketches_match_exact_quantiles():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(9, 2.5, 200_000)
+    shards = [QuantileSketch(seed=i) for i in range(8)]
+    for i, chunk in enumerate(np.array_split(values, 40)):
+        shards[i % 8].update(chunk)
+    merged = shards[0]
+    for shard in shards[1:]:
+        merged.merge(shard)
+
+    assert merged.count == len(values)
+    assert merged.size < 2_000
+    ordered = np.sort(values)
+    for q in (0.25, 0.5, 0.75, 0.9):
+        assert _rank_error(ordered, merged.quantile(q), q) < 0.02
+    assert merged.split("mean") == pytest.approx(split_value(values, "mean"), rel=1e-9)
+    assert merged.split("log-mean") == pytest.approx(split_value(values, "log-mean"), rel=1e-9)
+    assert (merged.min, merged.max) == (values.min(), values.max())
+
+
+def test_sketch_split_edge_cases():
+    assert np.isnan(QuantileSketch().split("median"))
+    sketch = QuantileSketch().update([-1.0, 2.0, np.nan])
+    assert sketch.count == 2 and sketch.split(5) == 5.0
+    with pytest.raises(ValueError):
+        sketch.split("log-mean")
+    with pytest.raises(ValueError):
+        sketch.split(np.median)